@@ -0,0 +1,224 @@
+# app/bulk_ingest.py
+
+import csv
+import json
+from collections import defaultdict
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+
+from . import feature_store
+from .ml import invalidate_patient_predictions
+from .models.observation import DailyObservation
+from .models.patient import Patient
+from .schemas.observation import BulkObservation
+
+FORMATS = ("ndjson", "csv")
+
+# Row errors listed in a response; further failures are only counted
+MAX_REPORTED_ERRORS = 1000
+# Longest line, or CSV record with its quoted newlines, so one bad record can't pull the rest of an upload into memory
+MAX_RECORD_BYTES = 64 * 1024
+
+_rows_adapter = TypeAdapter(List[BulkObservation])
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_bytes: int = MAX_RECORD_BYTES
+                     ) -> AsyncIterator[Optional[bytes]]:
+    """
+    Splits a byte stream into undecoded lines without holding more than one
+    partial line. A line longer than `max_bytes` is yielded as None and the
+    rest of it is skipped.
+    """
+    buffer = b""
+    skipping = False
+    async for chunk in chunks:
+        # Only the new chunk is scanned for newlines
+        *lines, tail = chunk.split(b"\n")
+        for piece in lines:
+            if skipping:
+                # The end of an overlong line
+                skipping = False
+                continue
+            line, buffer = buffer + piece, b""
+            yield line.rstrip(b"\r") if len(line) <= max_bytes else None
+        if skipping:
+            continue
+        buffer += tail
+        if len(buffer) > max_bytes:
+            yield None
+            buffer, skipping = b"", True
+    if buffer:
+        yield buffer.rstrip(b"\r")
+
+async def iter_records(lines: AsyncIterator[Optional[bytes]], fmt: str) -> AsyncIterator[Tuple[int, Any, str]]:
+    """
+    Yields `(row, record, error)` for each non-blank record.
+
+    Rows are numbered from 1 and don't count blank lines or the CSV header.
+    `record` is a dict of raw values, or None with `error` set if the line
+    could not be parsed, e.g. because it is too long or isn't UTF-8. Empty
+    CSV fields become None. A quoted CSV field may contain newlines; the
+    record's lines are gathered until its quotes balance.
+    """
+    header = None
+    row = 0
+    pending = None
+    async for raw in lines:
+        error = None
+        if raw is None:
+            error = f"Line longer than {MAX_RECORD_BYTES} bytes"
+        else:
+            try:
+                line = raw.decode("utf-8")
+            except UnicodeDecodeError:
+                error = "Invalid UTF-8"
+        if error is not None:
+            # A bad line also ends any CSV record it was part of
+            row += 1
+            pending = None
+            yield row, None, error
+            continue
+        if fmt == "csv":
+            pending = line if pending is None else f"{pending}\n{line}"
+            # An odd number of quotes leaves a field open (escaped quotes come in pairs)
+            if pending.count('"') % 2:
+                if len(pending) > MAX_RECORD_BYTES:
+                    row += 1
+                    pending = None
+                    yield row, None, f"Unterminated quoted field within {MAX_RECORD_BYTES} characters"
+                continue
+            line, pending = pending, None
+        if not line.strip():
+            continue
+        if fmt == "csv":
+            values = next(csv.reader([line]))
+            if header is None:
+                header = [name.strip() for name in values]
+                continue
+            row += 1
+            if len(values) != len(header):
+                yield row, None, f"Expected {len(header)} fields, got {len(values)}"
+                continue
+            yield row, {name: value if value != "" else None for name, value in zip(header, values)}, None
+        else:
+            row += 1
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield row, None, f"Invalid JSON: {e.msg}"
+                continue
+            if not isinstance(record, dict):
+                yield row, None, "Expected a JSON object"
+                continue
+            yield row, record, None
+    if pending is not None:
+        yield row + 1, None, "Unterminated quoted field"
+
+def validate_batch(batch: List[Tuple[int, Dict[str, Any]]]):
+    """
+    Validates a batch of raw records with one pydantic call.
+
+    Returns:
+        `(valid, errors)`: `(row, values)` pairs for the rows that passed and
+        one error report per row that didn't.
+    """
+    records = [record for _, record in batch]
+    try:
+        valid = _rows_adapter.validate_python(records)
+        return [(row, item.model_dump()) for (row, _), item in zip(batch, valid)], []
+    except ValidationError as e:
+        messages = defaultdict(list)
+        for error in e.errors():
+            index, *field = error["loc"]
+            messages[index].append(f"{'.'.join(map(str, field)) or 'row'}: {error['msg']}")
+
+    passed = [item for i, item in enumerate(batch) if i not in messages]
+    valid = _rows_adapter.validate_python([record for _, record in passed])
+    errors = [{"row": batch[i][0], "errors": found} for i, found in sorted(messages.items())]
+    return [(row, item.model_dump()) for (row, _), item in zip(passed, valid)], errors
+
+def write_batch(db: Session, batch: List[Tuple[int, Dict[str, Any]]]):
+    """
+    Writes validated rows in one transaction, skipping rows that would
+    conflict with the database or with each other.
+
+    Returns:
+        `(inserted, errors, patient_ids)`.
+    """
+    patient_ids = {values["patient_id"] for _, values in batch}
+    known = {pid for (pid,) in db.query(Patient.id).filter(Patient.id.in_(patient_ids))}
+    keys = {(values["patient_id"], values["date"]) for _, values in batch}
+    taken = set(
+        db.query(DailyObservation.patient_id, DailyObservation.date)
+        .filter(tuple_(DailyObservation.patient_id, DailyObservation.date).in_(keys))
+        .all()
+    )
+
+    rows, errors = [], []
+    for row, values in batch:
+        key = (values["patient_id"], values["date"])
+        if values["patient_id"] not in known:
+            errors.append({"row": row, "errors": ["patient_id: Patient not found"]})
+        elif key in taken:
+            errors.append({"row": row, "errors": ["date: An observation for this date already exists"]})
+        else:
+            taken.add(key)
+            rows.append((row, values))
+
+    try:
+        inserted = feature_store.add_observations(db, [values for _, values in rows])
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        # Rows already rejected keep their own reason
+        failed = [{"row": row, "errors": [f"Batch could not be written: {e}"]} for row, _ in rows]
+        return 0, errors + failed, set()
+    return inserted, errors, {values["patient_id"] for _, values in rows}
+
+async def ingest(chunks: AsyncIterator[bytes], fmt: str, db: Session, batch_size: int) -> Dict[str, Any]:
+    """
+    Streams an NDJSON or CSV upload into `daily_observations`.
+
+    The body is parsed as it arrives and handled `batch_size` rows at a time:
+    each batch is validated in one call and written in its own transaction,
+    so a bad row or batch is reported without aborting the rest.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}'. Expected one of {FORMATS}.")
+
+    result = {"received": 0, "inserted": 0, "failed": 0, "errors": [], "errors_truncated": False}
+
+    def report(errors):
+        result["failed"] += len(errors)
+        room = MAX_REPORTED_ERRORS - len(result["errors"])
+        result["errors"].extend(errors[:room])
+        if len(errors) > room:
+            result["errors_truncated"] = True
+
+    def process(batch):
+        valid, errors = validate_batch(batch)
+        inserted, write_errors, patient_ids = write_batch(db, valid) if valid else (0, [], set())
+        for patient_id in patient_ids:
+            invalidate_patient_predictions(patient_id)
+        return inserted, sorted(errors + write_errors, key=lambda error: error["row"])
+
+    batch = []
+    async for row, record, error in iter_records(iter_lines(chunks), fmt):
+        result["received"] += 1
+        if error is not None:
+            report([{"row": row, "errors": [error]}])
+            continue
+        batch.append((row, record))
+        if len(batch) >= batch_size:
+            inserted, errors = await run_in_threadpool(process, batch)
+            result["inserted"] += inserted
+            report(errors)
+            batch = []
+    if batch:
+        inserted, errors = await run_in_threadpool(process, batch)
+        result["inserted"] += inserted
+        report(errors)
+    return result
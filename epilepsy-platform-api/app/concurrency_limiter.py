@@ -0,0 +1,93 @@
+# app/concurrency_limiter.py
+
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable
+
+class ConcurrencyLimitExceeded(Exception):
+    """Raised when a key already has the maximum number of requests in flight."""
+
+class ConcurrencyLimiter:
+    """
+    Caps how many operations may run at once for the same key, e.g. the same
+    account or client IP. Unlike a rate limit it doesn't count requests
+    over time, only those currently in progress, so well-behaved clients are
+    never throttled while a storm from one source can't occupy every worker.
+    """
+
+    def __init__(self, max_concurrent: int):
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent must be at least 1.")
+        self.max_concurrent = max_concurrent
+        self._active: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key: Hashable):
+        with self._lock:
+            active = self._active.get(key, 0)
+            if active >= self.max_concurrent:
+                raise ConcurrencyLimitExceeded(key)
+            self._active[key] = active + 1
+
+    def release(self, key: Hashable):
+        with self._lock:
+            active = self._active.get(key, 0) - 1
+            if active > 0:
+                self._active[key] = active
+            else:
+                self._active.pop(key, None)
+
+    def active(self, key: Hashable) -> int:
+        with self._lock:
+            return self._active.get(key, 0)
+
+    @contextmanager
+    def hold(self, key: Hashable):
+        self.acquire(key)
+        try:
+            yield
+        finally:
+            self.release(key)
+
+class PoolFull(Exception):
+    """Raised when no more work can be queued on a `BoundedPool`."""
+
+class BoundedPool:
+    """
+    Runs CPU-bound work (model scoring, password hashing) on a bounded
+    thread pool, off the event loop.
+
+    At most `max_pending` distinct computations may be queued or running;
+    beyond that `run` raises `PoolFull` so callers can shed load.
+    Concurrent calls with the same key share a single computation, which
+    runs in the context of the call that started it (so its stage timings
+    are attributed to that request).
+    """
+
+    def __init__(self, max_workers: int, max_pending: int, thread_name_prefix: str = "pool"):
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    @property
+    def pending(self) -> int:
+        return len(self._inflight)
+
+    async def run(self, key: Hashable, fn: Callable[..., Any], *args: Any) -> Any:
+        future = self._inflight.get(key)
+        if future is None:
+            if len(self._inflight) >= self.max_pending:
+                raise PoolFull()
+            loop = asyncio.get_running_loop()
+            context = contextvars.copy_context()
+            future = loop.run_in_executor(self._executor, context.run, fn, *args)
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so one cancelled request doesn't cancel the work others await
+        return await asyncio.shield(future)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,17 +1,103 @@
 import os
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Defaults to DATABASE_URL with its async driver (aiosqlite / asyncpg)
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
 
-engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False}
-)
+# --- Pool Configuration ---
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Seconds before a pooled connection is replaced; -1 keeps connections forever
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# --- SQLite Configuration ---
+# WAL lets readers proceed while one connection writes; busy_timeout makes writers wait instead of failing
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+# Async drivers used when ASYNC_DATABASE_URL isn't set
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+def _is_sqlite_memory(url) -> bool:
+    return url.database in (None, "", ":memory:") or url.query.get("mode") == "memory"
+
+def _engine_options(url) -> dict:
+    options = {"pool_pre_ping": DB_POOL_PRE_PING, "pool_recycle": DB_POOL_RECYCLE}
+    if url.get_backend_name() == "sqlite":
+        options["connect_args"] = {"check_same_thread": False}
+        if _is_sqlite_memory(url):
+            # In-memory databases use a per-thread pool that takes no sizing options
+            return options
+    options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+    return options
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+def _configure_sqlite(engine):
+    if engine.dialect.name == "sqlite" and not _is_sqlite_memory(engine.url):
+        # Async engines fire connection events on their sync core
+        event.listen(getattr(engine, "sync_engine", engine), "connect", _set_sqlite_pragmas)
+    return engine
+
+def create_db_engine(url=None, **overrides):
+    """
+    Builds the engine for `url` (default `DATABASE_URL`) from the DB_* settings.
+
+    SQLite files get WAL mode and the pragmas above on every connection;
+    any other backend SQLAlchemy has a driver for, e.g.
+    `postgresql+psycopg://...`, works by changing the URL alone.
+    `overrides` are passed to `create_engine` as is.
+    """
+    url = make_url(url or DATABASE_URL)
+    return _configure_sqlite(create_engine(url, **{**_engine_options(url), **overrides}))
+
+def async_url_for(url) -> str:
+    """The async-driver equivalent of a sync database URL."""
+    url = make_url(url)
+    if "+" not in url.drivername and url.drivername in ASYNC_DRIVERS:
+        url = url.set(drivername=ASYNC_DRIVERS[url.drivername])
+    return url.render_as_string(hide_password=False)
+
+def create_async_db_engine(url=None, **overrides):
+    """
+    Async counterpart of `create_db_engine` (needs aiosqlite or asyncpg).
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = make_url(url or ASYNC_DATABASE_URL or async_url_for(DATABASE_URL))
+    return _configure_sqlite(create_async_engine(url, **{**_engine_options(url), **overrides}))
+
+engine = create_db_engine()
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
\ No newline at end of file
+# Created on first use, so the async drivers stay optional
+_async_sessionmaker = None
+
+def get_async_sessionmaker():
+    global _async_sessionmaker
+    if _async_sessionmaker is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        _async_sessionmaker = async_sessionmaker(create_async_db_engine(), autoflush=False, expire_on_commit=False)
+    return _async_sessionmaker
+
+Base = declarative_base()
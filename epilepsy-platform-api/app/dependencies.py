@@ -1,8 +1,22 @@
-from .database import SessionLocal
+from .database import SessionLocal, get_async_sessionmaker
 
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    # For async routes; needs an async driver for the configured database
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+# The ML providers import app.ml on first use so get_db (and auth) don't depend on it
+def get_inference_pool():
+    from .ml import inference_pool
+    return inference_pool
+
+def get_prediction_cache():
+    from .ml import get_prediction_cache
+    return get_prediction_cache()
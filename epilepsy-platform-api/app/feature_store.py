@@ -0,0 +1,234 @@
+# app/feature_store.py
+
+import json
+import math
+import os
+from collections import defaultdict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .ml import get_inference_module
+from .models.observation import DailyObservation, PatientFeatures, PatientFeatureVector
+from .models.risk_score import PrecomputedRiskScore
+
+if TYPE_CHECKING:
+    from ml_workspace.src.feature_spec import FeaturePlan
+
+# Rows written per transaction by bulk ingestion
+BULK_INGEST_BATCH_SIZE = int(os.getenv("BULK_INGEST_BATCH_SIZE", "1000"))
+# Model versions whose features are stored, comma separated (default: every version in the models directory)
+FEATURE_STORE_MODEL_VERSIONS = [
+    version.strip() for version in os.getenv("FEATURE_STORE_MODEL_VERSIONS", "").split(",") if version.strip()
+]
+
+# Raw fields of a day that features are computed from
+OBSERVATION_FIELDS = ("hours_of_sleep", "stress_level", "medication_taken", "eeg_feature_1", "mri_lesion_present")
+
+class DuplicateObservation(Exception):
+    """Raised when the patient already has an observation for that date."""
+
+class FeaturesUnavailable(Exception):
+    """Raised when the store can't provide a model version's features."""
+
+def plan_for(model_version: str) -> "FeaturePlan":
+    """
+    The feature plan of a model version whose features the store keeps.
+
+    Raises:
+        FeaturesUnavailable: The version isn't stored, or its features read
+            fields that daily observations don't record.
+        ValueError: The version doesn't exist.
+    """
+    inference = get_inference_module()
+    plan = inference.feature_plan_for(inference.registry.get(model_version))
+    missing = [source for source in plan.sources if source not in OBSERVATION_FIELDS]
+    if missing:
+        raise FeaturesUnavailable(
+            f"Model {model_version} reads {', '.join(missing)}, which daily observations don't record."
+        )
+    if FEATURE_STORE_MODEL_VERSIONS and model_version not in FEATURE_STORE_MODEL_VERSIONS:
+        raise FeaturesUnavailable(f"Features of model {model_version} are not stored (see FEATURE_STORE_MODEL_VERSIONS).")
+    return plan
+
+def stored_plans() -> Dict[str, "FeaturePlan"]:
+    """Plans of every version the store keeps features for, by version."""
+    # Each version is loaded through the registry; keep MAX_LOADED_MODELS at least as large as this set
+    versions = FEATURE_STORE_MODEL_VERSIONS or get_inference_module().registry.available_versions()
+    plans = {}
+    for version in versions:
+        try:
+            plans[version] = plan_for(version)
+        except FeaturesUnavailable:
+            continue
+    return plans
+
+def _encode(row: np.ndarray) -> str:
+    return json.dumps([None if math.isnan(value) else value for value in row.tolist()])
+
+def row_from_storage(plan: "FeaturePlan", digest: Optional[str], values: Optional[str], window: str,
+                     n_days: int) -> Optional[np.ndarray]:
+    """
+    A patient's feature row for `plan` from the stored columns.
+
+    Uses the stored vector if it was computed with this exact spec, and
+    otherwise rebuilds the row from the stored raw window when that covers
+    the plan's lookback (e.g. for a version added since the last update).
+
+    Returns:
+        A float32 row in the plan's order, or None if neither is usable.
+    """
+    if values is not None and digest == plan.digest:
+        return np.array(json.loads(values), dtype=np.float32)
+    days = json.loads(window)
+    if len(days) >= min(plan.lookback, n_days):
+        return plan.fill(days)
+    return None
+
+def _recent_window(db: Session, patient_id: int, lookback: int) -> list:
+    days = (
+        db.query(DailyObservation)
+        .filter(DailyObservation.patient_id == patient_id)
+        .order_by(DailyObservation.date.desc())
+        .limit(lookback)
+        .all()
+    )
+    return [{field: getattr(day, field) for field in OBSERVATION_FIELDS} for day in reversed(days)]
+
+def _locked_features(db: Session, patient_ids) -> Dict[int, PatientFeatures]:
+    # Row locks on backends that have them; SQLite serializes writers instead
+    rows = (
+        db.query(PatientFeatures)
+        .filter(PatientFeatures.patient_id.in_(list(patient_ids)))
+        .with_for_update()
+        .all()
+    )
+    return {row.patient_id: row for row in rows}
+
+def _stored_vectors(db: Session, patient_ids) -> Dict[Tuple[int, str], PatientFeatureVector]:
+    rows = db.query(PatientFeatureVector).filter(PatientFeatureVector.patient_id.in_(list(patient_ids))).all()
+    return {(row.patient_id, row.model_version): row for row in rows}
+
+def _update_features(db: Session, features: PatientFeatures, days: List[Dict[str, Any]],
+                     plans: Dict[str, "FeaturePlan"], vectors: Dict[Tuple[int, str], PatientFeatureVector]):
+    # `days` are already inserted and sorted by date
+    lookback = max((plan.lookback for plan in plans.values()), default=1)
+    window = json.loads(features.window)
+    appended = features.n_days == 0 or days[0]["date"] > features.as_of_date
+    # A window kept for a shorter lookback (before a version was added) is read again
+    if appended and len(window) >= min(lookback, features.n_days):
+        window = window + [{field: day.get(field) for field in OBSERVATION_FIELDS} for day in days]
+        window = window[-lookback:]
+        features.as_of_date = days[-1]["date"]
+    else:
+        window = _recent_window(db, features.patient_id, lookback)
+        features.as_of_date = max(features.as_of_date, days[-1]["date"])
+
+    features.n_days += len(days)
+    features.window = json.dumps(window)
+    for version, plan in plans.items():
+        vector = vectors.get((features.patient_id, version))
+        if vector is None:
+            vector = PatientFeatureVector(patient_id=features.patient_id, model_version=version)
+            db.add(vector)
+        vector.spec_digest = plan.digest
+        vector.values = _encode(plan.fill(window))
+
+def _features_for(db: Session, existing: Dict[int, PatientFeatures], patient_id: int, first_date) -> PatientFeatures:
+    features = existing.get(patient_id)
+    if features is None:
+        features = PatientFeatures(patient_id=patient_id, as_of_date=first_date, n_days=0, window="[]")
+        db.add(features)
+    return features
+
+def add_observation(db: Session, patient_id: int, observation: Dict[str, Any]) -> DailyObservation:
+    """
+    Stores one day of data and updates the patient's materialized features.
+
+    Appending a day after the latest one only touches the patient's
+    `patient_features` row and feature vectors: the stored window of
+    trailing days is shifted by one and every stored version's plan (see
+    `stored_plans`) fills its vector from that window, so the cost doesn't
+    grow with the length of the history. A day inserted before the latest
+    one rebuilds the window from the last few stored days. The caller commits.
+
+    Raises:
+        DuplicateObservation: The patient already has a day with this date.
+            Any other `IntegrityError`, e.g. from the commit when a concurrent
+            request created the patient's features row first, is left to the
+            caller, which can roll back and retry.
+    """
+    day = DailyObservation(patient_id=patient_id, **observation)
+    db.add(day)
+    try:
+        db.flush()
+    except IntegrityError as e:
+        # One observation per patient and date is the only constraint on the day itself
+        raise DuplicateObservation(f"Patient {patient_id} already has an observation for {day.date}") from e
+
+    features = _features_for(db, _locked_features(db, [patient_id]), patient_id, day.date)
+    _update_features(db, features, [observation], stored_plans(), _stored_vectors(db, [patient_id]))
+    return day
+
+def add_observations(db: Session, observations: List[Dict[str, Any]]) -> int:
+    """
+    Bulk version of `add_observation` for rows that each carry a `patient_id`.
+
+    Rows are written with a single executemany insert, and every affected
+    patient's features are advanced once over all of that patient's new days.
+    The caller commits.
+
+    Returns:
+        The number of rows inserted.
+    """
+    if not observations:
+        return 0
+    db.execute(insert(DailyObservation), observations)
+
+    by_patient = defaultdict(list)
+    for observation in observations:
+        by_patient[observation["patient_id"]].append(observation)
+    existing = _locked_features(db, by_patient)
+    plans = stored_plans()
+    vectors = _stored_vectors(db, by_patient)
+    for patient_id, days in by_patient.items():
+        days.sort(key=lambda day: day["date"])
+        features = _features_for(db, existing, patient_id, days[0]["date"])
+        _update_features(db, features, days, plans, vectors)
+    return len(observations)
+
+def get_features(db: Session, patient_id: int) -> Optional[PatientFeatures]:
+    return db.get(PatientFeatures, patient_id)
+
+def feature_dict(db: Session, features: PatientFeatures, model_version: str) -> Dict[str, Optional[float]]:
+    """
+    The patient's features for `model_version`, by name.
+
+    Raises:
+        FeaturesUnavailable: They can't be served from the store, rather
+            than scoring with missing values.
+    """
+    plan = plan_for(model_version)
+    vector = db.get(PatientFeatureVector, (features.patient_id, model_version))
+    row = row_from_storage(
+        plan,
+        vector.spec_digest if vector is not None else None,
+        vector.values if vector is not None else None,
+        features.window,
+        features.n_days,
+    )
+    if row is None:
+        raise FeaturesUnavailable(
+            f"Stored features of model {model_version} are out of date; they are rebuilt with the patient's next observation."
+        )
+    return {name: None if math.isnan(value) else value for name, value in zip(plan.feature_names, row.tolist())}
+
+def delete_patient(db: Session, patient_id: int):
+    """Removes a patient's observations, features and sweep scores. The caller commits."""
+    db.query(DailyObservation).filter(DailyObservation.patient_id == patient_id).delete()
+    db.query(PatientFeatures).filter(PatientFeatures.patient_id == patient_id).delete()
+    db.query(PatientFeatureVector).filter(PatientFeatureVector.patient_id == patient_id).delete()
+    db.query(PrecomputedRiskScore).filter(PrecomputedRiskScore.patient_id == patient_id).delete()
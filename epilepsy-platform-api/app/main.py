@@ -1,18 +1,30 @@
 # app/main.py
 from fastapi import FastAPI
+from . import metrics
 from .database import engine
-from .models import patient, clinician 
+from .models import patient, clinician, prediction, observation, risk_score
 # --- Import the new router ---
-from .routers import patients, auth 
+from .routers import patients, auth, risk, observations, admin, metrics as metrics_router
 
 patient.Base.metadata.create_all(bind=engine)
 clinician.Base.metadata.create_all(bind=engine)
 
 app = FastAPI(title="Epilepsy Management Platform API")
 
-# --- Include both routers ---
+# --- Instrumentation ---
+if metrics.METRICS_ENABLED:
+    metrics.instrument()
+    app.add_middleware(metrics.MetricsMiddleware)
+    app.include_router(metrics_router.router)
+
+# --- Include all routers ---
 app.include_router(auth.router)
 app.include_router(patients.router)
+app.include_router(risk.router)
+app.include_router(risk.scores_router)
+app.include_router(observations.router)
+app.include_router(observations.bulk_router)
+app.include_router(admin.router)
 
 @app.get("/")
 def read_root():
@@ -0,0 +1,255 @@
+# app/metrics.py
+
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# --- Configuration ---
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+# Adds a Server-Timing header (DB, auth and inference stages) to every response
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "false").lower() in ("1", "true", "yes")
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# --- Metric Types ---
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for v in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Histogram:
+    """A Prometheus histogram with a fixed set of label names."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # label values -> [per-bucket counts (last is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labelvalues: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def collect(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            series = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        for labelvalues, counts, total in sorted(series):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames + ("le",), labelvalues + (_format_value(bound),))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, labelvalues)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+class GaugeCollector:
+    """Gauges read from a callback at scrape time, e.g. cache statistics."""
+
+    def __init__(self, name: str, documentation: str, labelname: str,
+                 read: Callable[[], Dict[str, float]]):
+        self.name = name
+        self.documentation = documentation
+        self.labelname = labelname
+        self.read = read
+
+    def collect(self) -> Iterable[str]:
+        values = self.read()
+        if not values:
+            return
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} gauge"
+        for key, value in sorted(values.items()):
+            yield f"{self.name}{_format_labels((self.labelname,), (key,))} {_format_value(value)}"
+
+# --- Metrics ---
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Time to serve a request, by route template.", ("method", "route", "status"),
+)
+STAGE_LATENCY = Histogram(
+    "stage_duration_seconds", "Time spent in each auth and inference stage.", ("stage",),
+)
+DB_QUERY_LATENCY = Histogram("db_query_duration_seconds", "Time to execute one SQL statement.")
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request", "SQL statements executed while serving a request.", ("route",), buckets=COUNT_BUCKETS,
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "db_time_per_request_seconds", "Total SQL execution time while serving a request.", ("route",),
+)
+
+def _prediction_cache_stats() -> Dict[str, float]:
+    from . import ml
+    # Read the cache only if it exists; scraping must not load the ML stack
+    cache = ml._prediction_cache
+    return cache.stats() if cache is not None else {}
+
+def _principal_cache_stats() -> Dict[str, float]:
+    from .security import principal_cache
+    return principal_cache.stats()
+
+def _pool_stats() -> Dict[str, float]:
+    from . import ml
+    from .security import password_hash_pool
+    return {"inference": ml.inference_pool.pending, "password_hash": password_hash_pool.pending}
+
+COLLECTORS = [
+    REQUEST_LATENCY,
+    STAGE_LATENCY,
+    DB_QUERY_LATENCY,
+    DB_QUERIES_PER_REQUEST,
+    DB_TIME_PER_REQUEST,
+    GaugeCollector("prediction_cache", "Prediction cache statistics.", "stat", _prediction_cache_stats),
+    GaugeCollector("principal_cache", "Authenticated clinician cache statistics.", "stat", _principal_cache_stats),
+    GaugeCollector("pool_pending", "Computations queued or running on each bounded pool.", "pool", _pool_stats),
+]
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    return "\n".join(line for collector in COLLECTORS for line in collector.collect()) + "\n"
+
+# --- Per-Request Timings ---
+class RequestTimings:
+    """
+    What one request spent its time on. Shared by the threads working for it
+    (the event loop, the threadpool, inference workers), so updates are locked.
+    """
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.stages: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add_query(self, seconds: float):
+        with self._lock:
+            self.db_queries += 1
+            self.db_seconds += seconds
+
+    def add_stage(self, name: str, seconds: float):
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def server_timing(self, total_seconds: float) -> str:
+        with self._lock:
+            db_queries, db_seconds, stages = self.db_queries, self.db_seconds, list(self.stages.items())
+        entries = [f'db;dur={db_seconds * 1e3:.3f};desc="queries={db_queries}"']
+        entries += [f"{name};dur={seconds * 1e3:.3f}" for name, seconds in stages]
+        entries.append(f"total;dur={total_seconds * 1e3:.3f}")
+        return ", ".join(entries)
+
+_request_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+def observe_stage(name: str, seconds: float):
+    STAGE_LATENCY.observe(seconds, name)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.add_stage(name, seconds)
+
+_stages_observed = False
+
+@contextmanager
+def stage(name: str):
+    """Times an API stage (e.g. password hashing) once `instrument()` has run."""
+    if not _stages_observed:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(name, time.perf_counter() - started)
+
+# --- SQLAlchemy Hooks ---
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["metrics_query_started"] = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop("metrics_query_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    DB_QUERY_LATENCY.observe(elapsed)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.add_query(elapsed)
+
+def instrument():
+    """Starts recording SQL statements on every engine and the inference/auth stages."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    global _stages_observed
+    _stages_observed = True
+    # The ML stages report through ml_workspace's own timers; app.ml puts it on the path
+    from . import ml  # noqa: F401
+    from ml_workspace.src import timing
+    timing.add_observer(observe_stage)
+
+# --- ASGI Middleware ---
+class MetricsMiddleware:
+    """
+    Records each HTTP request's latency under its route template (never the
+    raw path, which would give every patient id its own series) and the SQL
+    it issued, and optionally reports both in a `Server-Timing` header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _request_timings.set(timings)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if SERVER_TIMING_ENABLED:
+                    header = timings.server_timing(time.perf_counter() - started)
+                    message["headers"] = list(message.get("headers", [])) + [(b"server-timing", header.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_timings.reset(token)
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            REQUEST_LATENCY.observe(time.perf_counter() - started, scope["method"], route_path, str(status_code))
+            DB_QUERIES_PER_REQUEST.observe(timings.db_queries, route_path)
+            DB_TIME_PER_REQUEST.observe(timings.db_seconds, route_path)
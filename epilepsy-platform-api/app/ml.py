@@ -0,0 +1,66 @@
+# app/ml.py
+
+import os
+import sys
+import threading
+from pathlib import Path
+
+from .concurrency_limiter import BoundedPool, PoolFull
+
+# --- Locate the ML workspace ---
+# The API lives next to ml_workspace/ in the repository; make it importable
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.append(str(REPO_ROOT))
+
+# --- Configuration ---
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "2"))
+INFERENCE_MAX_PENDING = int(os.getenv("INFERENCE_MAX_PENDING", "32"))
+PREDICTION_CACHE_TTL_SECONDS = float(os.getenv("PREDICTION_CACHE_TTL_SECONDS", "900"))
+PREDICTION_CACHE_MAX_ENTRIES = int(os.getenv("PREDICTION_CACHE_MAX_ENTRIES", "10000"))
+PREDICTION_CACHE_MAX_BYTES = int(os.getenv("PREDICTION_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Persist cached predictions in the API database so they survive restarts
+PREDICTION_CACHE_PERSIST = os.getenv("PREDICTION_CACHE_PERSIST", "false").lower() in ("1", "true", "yes")
+
+def get_inference_module():
+    # Imported on first use so API startup doesn't pay for pandas/xgboost
+    from ml_workspace.src import inference
+    return inference
+
+_prediction_cache = None
+_prediction_cache_lock = threading.Lock()
+
+def get_prediction_cache():
+    global _prediction_cache
+    if _prediction_cache is None:
+        with _prediction_cache_lock:
+            if _prediction_cache is None:
+                from ml_workspace.src.prediction_cache import PredictionCache
+                store = None
+                if PREDICTION_CACHE_PERSIST:
+                    from .database import SessionLocal
+                    from .prediction_store import SQLPredictionStore
+                    store = SQLPredictionStore(SessionLocal)
+                _prediction_cache = PredictionCache(
+                    max_entries=PREDICTION_CACHE_MAX_ENTRIES,
+                    max_bytes=PREDICTION_CACHE_MAX_BYTES,
+                    ttl_seconds=PREDICTION_CACHE_TTL_SECONDS,
+                    store=store,
+                )
+    return _prediction_cache
+
+def invalidate_patient_predictions(patient_id: int):
+    """Drops a patient's cached scores, e.g. after their data changed."""
+    # Don't load the ML stack just to invalidate an empty cache
+    if _prediction_cache is not None:
+        _prediction_cache.invalidate_patient(patient_id)
+    elif PREDICTION_CACHE_PERSIST:
+        from .database import SessionLocal
+        from .prediction_store import SQLPredictionStore
+        SQLPredictionStore(SessionLocal).delete_patient(patient_id)
+
+# Prediction work shares the generic bounded pool; these names are what the risk routes use
+InferencePool = BoundedPool
+InferencePoolFull = PoolFull
+
+inference_pool = InferencePool(INFERENCE_WORKERS, INFERENCE_MAX_PENDING, thread_name_prefix="inference")
@@ -0,0 +1,40 @@
+# app/models/observation.py
+from sqlalchemy import Column, Integer, Float, String, Date, DateTime, Text, UniqueConstraint
+from sqlalchemy.sql import func
+from ..database import Base
+
+class DailyObservation(Base):
+    __tablename__ = "daily_observations"
+    __table_args__ = (UniqueConstraint("patient_id", "date", name="uq_daily_observations_patient_date"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    patient_id = Column(Integer, index=True, nullable=False)
+    date = Column(Date, nullable=False)
+    hours_of_sleep = Column(Float, nullable=False)
+    stress_level = Column(Float, nullable=False)
+    medication_taken = Column(Integer, nullable=False)
+    eeg_feature_1 = Column(Float)
+    mri_lesion_present = Column(Integer)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class PatientFeatures(Base):
+    """Each patient's latest day and the trailing raw days feature updates read."""
+    __tablename__ = "patient_features"
+
+    patient_id = Column(Integer, primary_key=True)
+    as_of_date = Column(Date, nullable=False, index=True)
+    n_days = Column(Integer, nullable=False)
+    # JSON list of the trailing raw days the next update needs
+    window = Column(Text, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class PatientFeatureVector(Base):
+    """One model version's inputs for a patient's latest day, in the order its feature spec lists them."""
+    __tablename__ = "patient_feature_vectors"
+
+    patient_id = Column(Integer, primary_key=True)
+    model_version = Column(String, primary_key=True)
+    # `FeaturePlan.digest` of the spec the values were computed with
+    spec_digest = Column(String, nullable=False)
+    # JSON list of floats; null for a missing value
+    values = Column(Text, nullable=False)
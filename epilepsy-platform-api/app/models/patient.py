@@ -1,14 +1,18 @@
 # app/models/patient.py
-from sqlalchemy import Column, Integer, String, Date, DateTime
+from sqlalchemy import Column, Integer, String, Date, DateTime, Index
 from sqlalchemy.sql import func
 from ..database import Base
 
 class Patient(Base):
     __tablename__ = "patients"
+    # Keyset pages of one clinician's patients are a range scan of this index
+    __table_args__ = (Index("ix_patients_clinician_id_id", "clinician_id", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
+    # Not indexed: name-prefix filters use LIKE, which SQLite can't serve from a plain index
     full_name = Column(String, nullable=False)
     date_of_birth = Column(Date, nullable=False)
-    clinician_id = Column(Integer, index=True) 
+    # Covered by ix_patients_clinician_id_id as its leading column
+    clinician_id = Column(Integer)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
\ No newline at end of file
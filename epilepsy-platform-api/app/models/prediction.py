@@ -0,0 +1,13 @@
+# app/models/prediction.py
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy.sql import func
+from ..database import Base
+
+class CachedPrediction(Base):
+    __tablename__ = "prediction_cache"
+
+    key = Column(String(64), primary_key=True)
+    patient_id = Column(Integer, index=True)
+    model_version = Column(String, nullable=False)
+    result = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
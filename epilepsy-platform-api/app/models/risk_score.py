@@ -0,0 +1,20 @@
+# app/models/risk_score.py
+from sqlalchemy import Column, Integer, Float, String, Date, DateTime, Text, Index
+from sqlalchemy.sql import func
+from ..database import Base
+
+class PrecomputedRiskScore(Base):
+    """One patient's score from a population sweep (see app/risk_sweep.py)."""
+    __tablename__ = "risk_scores"
+    # "Highest risk on a date" is a reverse range scan of this index
+    __table_args__ = (Index("ix_risk_scores_date_score", "date", "score"),)
+
+    date = Column(Date, primary_key=True)
+    model_version = Column(String, primary_key=True)
+    patient_id = Column(Integer, primary_key=True)
+    score = Column(Float, nullable=False)
+    # JSON object of the largest feature contributions
+    contributions = Column(Text, nullable=False)
+    # Latest observation the features were computed from
+    features_as_of = Column(Date, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,48 @@
+# app/prediction_store.py
+
+import json
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.orm import sessionmaker
+
+from .models.prediction import CachedPrediction
+
+class SQLPredictionStore:
+    """
+    Persistent tier for `PredictionCache`, kept in the `prediction_cache`
+    table of the API database so cached scores survive restarts.
+    """
+
+    def __init__(self, session_factory: sessionmaker):
+        self.session_factory = session_factory
+
+    def get(self, key: str, ttl_seconds: float):
+        with self.session_factory() as db:
+            row = db.get(CachedPrediction, key)
+            if row is None:
+                return None
+            created_at = row.created_at
+            if created_at.tzinfo is None:
+                # SQLite hands back naive UTC timestamps
+                created_at = created_at.replace(tzinfo=timezone.utc)
+            if datetime.now(timezone.utc) - created_at > timedelta(seconds=ttl_seconds):
+                db.delete(row)
+                db.commit()
+                return None
+            return json.loads(row.result), row.patient_id
+
+    def put(self, key: str, result: dict, patient_id, model_version: str):
+        with self.session_factory() as db:
+            db.merge(CachedPrediction(
+                key=key,
+                patient_id=patient_id,
+                model_version=model_version,
+                result=json.dumps(result),
+                created_at=datetime.now(timezone.utc),
+            ))
+            db.commit()
+
+    def delete_patient(self, patient_id):
+        with self.session_factory() as db:
+            db.query(CachedPrediction).filter(CachedPrediction.patient_id == patient_id).delete()
+            db.commit()
@@ -0,0 +1,73 @@
+# app/principal_cache.py
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+class PrincipalCache:
+    """
+    Bounded LRU + TTL cache of authenticated principals, keyed by token subject.
+
+    Lets `get_current_clinician` skip the clinician lookup for tokens it has
+    recently resolved. Only successful lookups are cached, and an entry
+    lives at most `ttl_seconds`, which should be well below the token
+    lifetime. Entries are dropped when the clinician row changes (see
+    `invalidate`); other worker processes catch up within the TTL.
+    """
+
+    def __init__(self, max_entries: int = 10_000, ttl_seconds: float = 60.0, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+
+        # subject -> (principal, stored at)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def get(self, subject: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is not None:
+                if self._clock() - entry[1] <= self.ttl_seconds:
+                    self._entries.move_to_end(subject)
+                    self._hits += 1
+                    return entry[0]
+                del self._entries[subject]
+            self._misses += 1
+            return None
+
+    def put(self, subject: Hashable, principal: Any):
+        if self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[subject] = (principal, self._clock())
+            self._entries.move_to_end(subject)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, subject: Hashable):
+        with self._lock:
+            if self._entries.pop(subject, None) is not None:
+                self._invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': self._hits / lookups if lookups else 0.0,
+                'evictions': self._evictions,
+                'invalidations': self._invalidations,
+            }
@@ -0,0 +1,253 @@
+# app/risk_sweep.py
+"""
+Scores every patient with materialized features and stores the results
+in `risk_scores`, for views like "highest risk today".
+
+Usage (e.g. nightly from cron):
+    python -m app.risk_sweep --workers 4 --chunk-size 1000
+
+Patient ids are streamed from `patient_features` with `yield_per` and cut
+into chunks of consecutive ids. Each chunk is read as one feature matrix,
+scored with a single model call and written in one transaction, so a
+chunk is either fully stored or not at all. A rerun for the same date and
+model version skips patients that already have a score, which makes an
+interrupted sweep resumable by running it again.
+
+Rows are built from the model version's stored feature vectors (see
+`app/feature_store.py`). A version the store doesn't keep is refused
+before any work starts; patients whose stored features are out of date
+for the version are skipped and counted.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import and_, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from . import feature_store
+from .database import DATABASE_URL, create_db_engine
+from .ml import get_inference_module
+from .models.observation import PatientFeatures, PatientFeatureVector
+from .models.risk_score import PrecomputedRiskScore
+
+# --- Configuration ---
+RISK_SWEEP_CHUNK_SIZE = int(os.getenv("RISK_SWEEP_CHUNK_SIZE", "1000"))
+RISK_SWEEP_WORKERS = int(os.getenv("RISK_SWEEP_WORKERS", "1"))
+RISK_SWEEP_TOP_K = int(os.getenv("RISK_SWEEP_TOP_K", "5"))
+
+def _unscored(sweep_date: date, model_version: str, min_days: int):
+    """Condition for feature rows that still need a score in this sweep."""
+    scored = (
+        select(PrecomputedRiskScore.patient_id)
+        .where(
+            PrecomputedRiskScore.date == sweep_date,
+            PrecomputedRiskScore.model_version == model_version,
+            PrecomputedRiskScore.patient_id == PatientFeatures.patient_id,
+        )
+        .exists()
+    )
+    return and_(PatientFeatures.n_days >= min_days, ~scored)
+
+def iter_chunks(db, sweep_date: date, model_version: str, chunk_size: int = RISK_SWEEP_CHUNK_SIZE
+                ) -> Iterator[Tuple[int, int]]:
+    """
+    Streams the ids left to score, yielding `(first_id, last_id)` per chunk.
+
+    Only ids are read, `chunk_size` rows at a time, so memory stays flat
+    however many patients there are.
+    """
+    min_days = get_inference_module().MIN_HISTORY_DAYS
+    result = db.execute(
+        select(PatientFeatures.patient_id)
+        .where(_unscored(sweep_date, model_version, min_days))
+        .order_by(PatientFeatures.patient_id)
+        .execution_options(yield_per=chunk_size)
+    )
+    for partition in result.scalars().partitions():
+        yield partition[0], partition[-1]
+
+# Each worker process keeps one engine per database
+_session_factories: Dict[str, sessionmaker] = {}
+
+def _session_factory(database_url: str) -> sessionmaker:
+    if database_url not in _session_factories:
+        _session_factories[database_url] = sessionmaker(bind=create_db_engine(database_url), autoflush=False)
+    return _session_factories[database_url]
+
+def score_chunk(database_url: str, first_id: int, last_id: int, sweep_date: date,
+                model_version: str, top_k: int = RISK_SWEEP_TOP_K) -> Tuple[int, int]:
+    """
+    Scores the unscored patients with ids in `[first_id, last_id]` and
+    stores their scores in one transaction.
+
+    Runs in a worker process. Returns `(scored, skipped)`: the number of
+    patients scored, and of those whose features couldn't be served.
+    """
+    inference = get_inference_module()
+    plan = feature_store.plan_for(model_version)
+
+    with _session_factory(database_url)() as db:
+        rows = db.execute(
+            select(
+                PatientFeatures.patient_id,
+                PatientFeatures.as_of_date,
+                PatientFeatures.n_days,
+                PatientFeatures.window,
+                PatientFeatureVector.spec_digest,
+                PatientFeatureVector.values.label("vector"),
+            )
+            .outerjoin(PatientFeatureVector, and_(
+                PatientFeatureVector.patient_id == PatientFeatures.patient_id,
+                PatientFeatureVector.model_version == model_version,
+            ))
+            .where(
+                PatientFeatures.patient_id.between(first_id, last_id),
+                _unscored(sweep_date, model_version, inference.MIN_HISTORY_DAYS),
+            )
+            .order_by(PatientFeatures.patient_id)
+        ).all()
+
+        # Rows come out in the plan's order; missing values are NaN, which the model treats as missing
+        X = np.empty((len(rows), len(plan)), dtype=np.float32)
+        scorable = []
+        for row in rows:
+            features = feature_store.row_from_storage(plan, row.spec_digest, row.vector, row.window, row.n_days)
+            if features is not None:
+                X[len(scorable)] = features
+                scorable.append(row)
+        skipped = len(rows) - len(scorable)
+        rows, X = scorable, X[:len(scorable)]
+        if not rows:
+            return 0, skipped
+
+        explain = "top_k" if top_k > 0 else "none"
+        results = inference.score_rows(X, model_version=model_version, explain=explain, top_k=max(top_k, 1))
+
+        db.execute(insert(PrecomputedRiskScore), [
+            {
+                "date": sweep_date,
+                "model_version": model_version,
+                "patient_id": row.patient_id,
+                "score": result["risk_score"],
+                "contributions": json.dumps(result["feature_contributions"]),
+                "features_as_of": row.as_of_date,
+            }
+            for row, result in zip(rows, results)
+        ])
+        db.commit()
+    return len(rows), skipped
+
+def run(database_url: Optional[str] = None, sweep_date: Optional[date] = None,
+        model_version: Optional[str] = None, workers: int = RISK_SWEEP_WORKERS,
+        chunk_size: int = RISK_SWEEP_CHUNK_SIZE, top_k: int = RISK_SWEEP_TOP_K,
+        log: Callable[[str], None] = print) -> dict:
+    """
+    Scores every patient not yet scored for `sweep_date` and `model_version`.
+
+    Args:
+        workers: Worker processes scoring chunks; 1 scores in this process.
+        top_k: Feature contributions stored per patient; 0 stores none.
+
+    Returns:
+        A dictionary of run statistics, including throughput.
+
+    Raises:
+        FeaturesUnavailable: The feature store doesn't keep this version's features.
+        ValueError: The model version doesn't exist.
+    """
+    database_url = database_url or DATABASE_URL
+    sweep_date = sweep_date or date.today()
+    model_version = model_version or get_inference_module().DEFAULT_MODEL_VERSION
+    # Loading the plan once here reports a bad or unstored version before any work starts
+    try:
+        feature_store.plan_for(model_version)
+    except feature_store.FeaturesUnavailable as e:
+        raise feature_store.FeaturesUnavailable(f"Cannot sweep model {model_version}: {e}") from e
+
+    started = time.perf_counter()
+    scored = skipped = chunks = 0
+    args = (sweep_date, model_version, top_k)
+
+    def report(counts):
+        nonlocal scored, skipped, chunks
+        scored += counts[0]
+        skipped += counts[1]
+        chunks += 1
+        elapsed = time.perf_counter() - started
+        log(
+            f"{scored} patients scored ({skipped} skipped) in {chunks} chunks, "
+            f"{scored / elapsed if elapsed > 0 else 0.0:,.0f} rows/s"
+        )
+
+    # Only chunk bounds are kept, and no read transaction stays open while chunks are written
+    with _session_factory(database_url)() as db:
+        pending = list(iter_chunks(db, sweep_date, model_version, chunk_size))
+
+    if workers <= 1:
+        for first_id, last_id in pending:
+            report(score_chunk(database_url, first_id, last_id, *args))
+    else:
+        # Spawned, not forked: xgboost's OpenMP runtime and pooled connections don't survive a fork
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            futures = [
+                executor.submit(score_chunk, database_url, first_id, last_id, *args)
+                for first_id, last_id in pending
+            ]
+            for future in as_completed(futures):
+                report(future.result())
+    elapsed = time.perf_counter() - started
+
+    return {
+        "date": sweep_date.isoformat(),
+        "model_version": model_version,
+        "patients_scored": scored,
+        "patients_skipped": skipped,
+        "chunks": chunks,
+        "seconds": elapsed,
+        "rows_per_second": scored / elapsed if elapsed > 0 else 0.0,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute risk scores for every patient.")
+    parser.add_argument("--database-url", default=None, help="Default: DATABASE_URL")
+    parser.add_argument("--date", type=date.fromisoformat, default=None, help="Sweep date (default: today)")
+    parser.add_argument("--model-version", default=None)
+    parser.add_argument("--workers", type=int, default=RISK_SWEEP_WORKERS, help="Worker processes")
+    parser.add_argument("--chunk-size", type=int, default=RISK_SWEEP_CHUNK_SIZE, help="Patients per model call")
+    parser.add_argument("--top-k", type=int, default=RISK_SWEEP_TOP_K, help="Contributions stored per patient")
+    parser.add_argument("--quiet", action="store_true", help="Only print the final summary")
+    args = parser.parse_args(argv)
+
+    try:
+        stats = run(
+            args.database_url,
+            sweep_date=args.date,
+            model_version=args.model_version,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            top_k=args.top_k,
+            log=(lambda message: None) if args.quiet else print,
+        )
+    except (feature_store.FeaturesUnavailable, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(
+        f"Scored {stats['patients_scored']} patients for {stats['date']} ({stats['model_version']}) "
+        f"in {stats['chunks']} chunks and {stats['seconds']:.1f}s: {stats['rows_per_second']:,.0f} rows/s"
+    )
+    if stats["patients_skipped"]:
+        print(f"Skipped {stats['patients_skipped']} patients whose stored features are out of date for this model")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+# app/routers/admin.py
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse, PlainTextResponse
+from typing import List
+
+from .. import ml, security  # noqa: F401  (ml puts ml_workspace on the path)
+from ..schemas.profile import ProfileSummary
+from ml_workspace.src import profiling
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["Admin"],
+    dependencies=[Depends(security.get_current_admin)],
+)
+
+def _get_profile_or_404(profile_id: str) -> dict:
+    meta = profiling.store.get(profile_id)
+    if meta is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return meta
+
+@router.get("/profiles", response_model=List[ProfileSummary])
+def list_profiles():
+    """Recent captures, newest first; older ones are rotated out of PROFILE_DIR."""
+    return profiling.store.list()
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+def read_profile(
+    profile_id: str,
+    sort: str = Query("cumulative", pattern="^(" + "|".join(profiling.SORT_KEYS) + ")$"),
+    limit: int = Query(profiling.SUMMARY_LINES, ge=1, le=1000),
+):
+    """The capture's top functions as printed by `pstats`."""
+    _get_profile_or_404(profile_id)
+    report = profiling.store.report(profile_id, sort=sort, limit=limit)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return report
+
+@router.get("/profiles/{profile_id}/pstats")
+def download_profile(profile_id: str):
+    """The raw capture, for `pstats`, snakeviz or gprof2dot."""
+    path = profiling.store.pstats_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.pstats")
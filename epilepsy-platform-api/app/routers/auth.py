@@ -1,6 +1,8 @@
 # app/routers/auth.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from contextlib import ExitStack
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from datetime import timedelta
@@ -9,16 +11,57 @@ from datetime import timedelta
 from ..models import clinician as clinician_model
 from ..schemas import clinician as clinician_schema
 from ..dependencies import get_db
-from ..security import verify_password, get_password_hash, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from ..concurrency_limiter import ConcurrencyLimitExceeded, PoolFull
+from ..security import (
+    verify_password_async,
+    get_password_hash_async,
+    create_access_token,
+    account_limiter,
+    ip_limiter,
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+)
 
 router = APIRouter(tags=["Authentication"])
 
+def _get_clinician_by_email(db: Session, email: str):
+    return db.query(clinician_model.Clinician).filter(clinician_model.Clinician.email == email).first()
+
+def _add_clinician(db: Session, db_clinician):
+    db.add(db_clinician)
+    db.commit()
+    db.refresh(db_clinician)
+    return db_clinician
+
+def _client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+TOO_MANY_ATTEMPTS = HTTPException(
+    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+    detail="Too many concurrent attempts, please retry shortly",
+    headers={"Retry-After": "1"},
+)
+HASHING_BUSY = HTTPException(
+    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    detail="Authentication is busy, please retry shortly",
+    headers={"Retry-After": "1"},
+)
+
 @router.post("/token", summary="Create access token for user login")
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    # --- Corrected reference to the clinician model ---
-    clinician = db.query(clinician_model.Clinician).filter(clinician_model.Clinician.email == form_data.username).first()
-    
-    if not clinician or not verify_password(form_data.password, clinician.hashed_password):
+async def login_for_access_token(request: Request, form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    try:
+        with ExitStack() as limits:
+            limits.enter_context(account_limiter.hold(form_data.username.lower()))
+            limits.enter_context(ip_limiter.hold(_client_ip(request)))
+
+            # --- Corrected reference to the clinician model ---
+            clinician = await run_in_threadpool(_get_clinician_by_email, db, form_data.username)
+            valid = clinician is not None and await verify_password_async(form_data.password, clinician.hashed_password)
+    except ConcurrencyLimitExceeded:
+        raise TOO_MANY_ATTEMPTS
+    except PoolFull:
+        raise HASHING_BUSY
+
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -33,16 +76,19 @@ def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db:
 
 # --- Corrected references to the schemas and model ---
 @router.post("/clinicians/", response_model=clinician_schema.Clinician, status_code=status.HTTP_201_CREATED)
-def create_clinician(clinician: clinician_schema.ClinicianCreate, db: Session = Depends(get_db)):
+async def create_clinician(request: Request, clinician: clinician_schema.ClinicianCreate, db: Session = Depends(get_db)):
     
-    db_clinician = db.query(clinician_model.Clinician).filter(clinician_model.Clinician.email == clinician.email).first()
+    db_clinician = await run_in_threadpool(_get_clinician_by_email, db, clinician.email)
     if db_clinician:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    hashed_password = get_password_hash(clinician.password)
+    try:
+        with ip_limiter.hold(_client_ip(request)):
+            hashed_password = await get_password_hash_async(clinician.password)
+    except ConcurrencyLimitExceeded:
+        raise TOO_MANY_ATTEMPTS
+    except PoolFull:
+        raise HASHING_BUSY
     db_clinician = clinician_model.Clinician(email=clinician.email, hashed_password=hashed_password)
     
-    db.add(db_clinician)
-    db.commit()
-    db.refresh(db_clinician)
-    return db_clinician
\ No newline at end of file
+    return await run_in_threadpool(_add_clinician, db, db_clinician)
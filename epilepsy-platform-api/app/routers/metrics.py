@@ -0,0 +1,14 @@
+# app/routers/metrics.py
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from .. import metrics
+
+router = APIRouter(tags=["Monitoring"])
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def read_metrics():
+    # Unauthenticated so Prometheus can scrape it; holds no patient data.
+    # Disable with METRICS_ENABLED=false where the port is publicly reachable.
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,107 @@
+# app/routers/observations.py
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from .. import bulk_ingest, feature_store, models, security
+from ..schemas.observation import BulkIngestResult, Observation, ObservationCreate, PatientFeatures
+from ..schemas.clinician import Clinician as ClinicianSchema
+from ..dependencies import get_db
+from ..ml import get_inference_module, invalidate_patient_predictions
+
+# Tries at writing an observation whose features row a concurrent request may create first
+FEATURES_UPSERT_ATTEMPTS = 2
+
+router = APIRouter(
+    prefix="/patients",
+    tags=["Observations"]
+)
+
+# Uploads span many patients, so they live outside /patients/{id}
+bulk_router = APIRouter(
+    prefix="/observations",
+    tags=["Observations"]
+)
+
+def _get_patient_or_404(db: Session, patient_id: int):
+    db_patient = db.query(models.patient.Patient).filter(models.patient.Patient.id == patient_id).first()
+    if db_patient is None:
+        raise HTTPException(status_code=404, detail="Patient not found")
+    return db_patient
+
+@router.post("/{patient_id}/observations", response_model=Observation, status_code=status.HTTP_201_CREATED)
+def create_observation(patient_id: int, observation: ObservationCreate, db: Session = Depends(get_db), current_clinician: ClinicianSchema = Depends(security.get_current_clinician)):
+    _get_patient_or_404(db, patient_id)
+    for attempt in range(FEATURES_UPSERT_ATTEMPTS):
+        try:
+            db_observation = feature_store.add_observation(db, patient_id, observation.model_dump())
+            db.commit()
+            break
+        except feature_store.DuplicateObservation:
+            db.rollback()
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="An observation for this date already exists")
+        except IntegrityError:
+            # A concurrent first observation created the features row; the retry updates it
+            db.rollback()
+            if attempt == FEATURES_UPSERT_ATTEMPTS - 1:
+                raise
+    db.refresh(db_observation)
+    invalidate_patient_predictions(patient_id)
+    return db_observation
+
+@router.get("/{patient_id}/observations", response_model=List[Observation])
+def read_observations(patient_id: int, db: Session = Depends(get_db), current_clinician: ClinicianSchema = Depends(security.get_current_clinician)):
+    _get_patient_or_404(db, patient_id)
+    return (
+        db.query(models.observation.DailyObservation)
+        .filter(models.observation.DailyObservation.patient_id == patient_id)
+        .order_by(models.observation.DailyObservation.date)
+        .all()
+    )
+
+@router.get("/{patient_id}/features", response_model=PatientFeatures)
+def read_features(patient_id: int, model_version: Optional[str] = None, db: Session = Depends(get_db), current_clinician: ClinicianSchema = Depends(security.get_current_clinician)):
+    """The stored inputs of `model_version` (default: the default model) for the patient's latest day."""
+    _get_patient_or_404(db, patient_id)
+    features = feature_store.get_features(db, patient_id)
+    if features is None:
+        raise HTTPException(status_code=404, detail="No observations recorded for this patient")
+    model_version = model_version or get_inference_module().DEFAULT_MODEL_VERSION
+    try:
+        values = feature_store.feature_dict(db, features, model_version)
+    except feature_store.FeaturesUnavailable as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    return {
+        "patient_id": patient_id,
+        "model_version": model_version,
+        "as_of_date": features.as_of_date,
+        "n_days": features.n_days,
+        "features": values,
+    }
+
+@bulk_router.post("/bulk", response_model=BulkIngestResult)
+async def bulk_ingest_observations(
+    request: Request,
+    batch_size: int = Query(feature_store.BULK_INGEST_BATCH_SIZE, ge=1, le=10000),
+    db: Session = Depends(get_db),
+    current_clinician: ClinicianSchema = Depends(security.get_current_clinician),
+):
+    """
+    Loads observations for many patients from an NDJSON (`application/x-ndjson`)
+    or CSV (`text/csv`, with a header row) body. Every row needs a `patient_id`.
+    """
+    content_type = request.headers.get("content-type", "")
+    if "csv" in content_type:
+        fmt = "csv"
+    elif "ndjson" in content_type or "jsonl" in content_type:
+        fmt = "ndjson"
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send application/x-ndjson or text/csv",
+        )
+    return await bulk_ingest.ingest(request.stream(), fmt, db, batch_size)
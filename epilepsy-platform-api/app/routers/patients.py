@@ -1,13 +1,14 @@
 # app/routers/patients.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Literal, Optional, Union
 
-from .. import models, security
-from ..schemas.patient import Patient, PatientCreate, PatientUpdate
+from .. import feature_store, models, security
+from ..schemas.patient import Patient, PatientCreate, PatientSummary, PatientUpdate
 from ..schemas.clinician import Clinician as ClinicianSchema
 from ..dependencies import get_db
+from ..ml import invalidate_patient_predictions
 
 router = APIRouter(
     prefix="/patients",
@@ -23,10 +24,45 @@ def create_patient(patient: PatientCreate, db: Session = Depends(get_db), curren
     db.refresh(db_patient)
     return db_patient
 
-@router.get("/", response_model=List[Patient])
-def read_patients(db: Session = Depends(get_db), current_clinician: ClinicianSchema = Depends(security.get_current_clinician)):
-    patients = db.query(models.patient.Patient).all()
-    return patients
+# Columns selected for each response view; no ORM objects are built
+PATIENT_VIEWS = {
+    "full": ("id", "full_name", "date_of_birth", "clinician_id", "created_at"),
+    "summary": ("id", "full_name", "clinician_id"),
+}
+
+@router.get("/", response_model=Union[List[Patient], List[PatientSummary]])
+def read_patients(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    after: Optional[int] = Query(None, description="Return patients with an id greater than this"),
+    clinician_id: Optional[int] = None,
+    name_prefix: Optional[str] = Query(None, min_length=1),
+    view: Literal["full", "summary"] = "full",
+    db: Session = Depends(get_db),
+    current_clinician: ClinicianSchema = Depends(security.get_current_clinician),
+):
+    """
+    Lists patients in id order, one keyset page at a time.
+
+    When more patients follow, the `X-Next-After` header holds the value to
+    pass as `after` for the next page.
+    """
+    PatientModel = models.patient.Patient
+    columns = [getattr(PatientModel, name) for name in PATIENT_VIEWS[view]]
+    query = db.query(*columns)
+    if clinician_id is not None:
+        query = query.filter(PatientModel.clinician_id == clinician_id)
+    if name_prefix is not None:
+        query = query.filter(PatientModel.full_name.startswith(name_prefix, autoescape=True))
+    if after is not None:
+        query = query.filter(PatientModel.id > after)
+
+    # One extra row tells us whether there is a next page
+    rows = query.order_by(PatientModel.id).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-After"] = str(rows[-1].id)
+    return [row._asdict() for row in rows]
 
 @router.get("/{patient_id}", response_model=Patient)
 def read_patient(patient_id: int, db: Session = Depends(get_db), current_clinician: ClinicianSchema = Depends(security.get_current_clinician)):
@@ -58,5 +94,8 @@ def delete_patient(patient_id: int, db: Session = Depends(get_db), current_clini
         raise HTTPException(status_code=404, detail="Patient not found")
 
     db.delete(db_patient)
+    feature_store.delete_patient(db, patient_id)
     db.commit()
+    # Scores cached for this patient must not outlive the record
+    invalidate_patient_predictions(patient_id)
     return None
\ No newline at end of file
@@ -0,0 +1,154 @@
+# app/routers/risk.py
+
+import hashlib
+import json
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from typing import List, Optional
+
+from .. import feature_store, models, security
+from ..ml import InferencePool, InferencePoolFull, get_inference_module
+from ..schemas.risk import RankedRiskScore, RiskRequest, RiskScore
+from ..schemas.clinician import Clinician as ClinicianSchema
+from ..dependencies import get_db, get_inference_pool, get_prediction_cache
+from ml_workspace.src import profiling
+
+router = APIRouter(
+    prefix="/patients",
+    tags=["Risk"]
+)
+
+# Sweep results span many patients, so they live outside /patients/{id}
+scores_router = APIRouter(
+    prefix="/risk-scores",
+    tags=["Risk"]
+)
+
+def _patient_exists(db: Session, patient_id: int) -> bool:
+    return db.query(models.patient.Patient.id).filter(models.patient.Patient.id == patient_id).first() is not None
+
+def _history_key(patient_id: int, history: list, model_version: str, explain: str, top_k: int) -> tuple:
+    # Identical requests for the same patient share one computation
+    digest = hashlib.sha256(json.dumps(history, sort_keys=True, default=str).encode()).hexdigest()
+    return (patient_id, model_version, explain, top_k, digest)
+
+def _stored_features(db: Session, patient_id: int, model_version: str, min_days: int):
+    features = feature_store.get_features(db, patient_id)
+    if features is None or features.n_days < min_days:
+        return None
+    return feature_store.feature_dict(db, features, model_version), features.n_days, features.as_of_date
+
+def _profiled(compute, **context):
+    with profiling.profile("predict", **context) as capture:
+        result = compute()
+    return result, capture.profile_id
+
+@router.post("/{patient_id}/risk", response_model=RiskScore)
+async def predict_patient_risk(
+    patient_id: int,
+    response: Response,
+    request: Optional[RiskRequest] = None,
+    profile: bool = Query(False, description="Admins only: profile this prediction, bypassing the cache"),
+    db: Session = Depends(get_db),
+    pool: InferencePool = Depends(get_inference_pool),
+    cache=Depends(get_prediction_cache),
+    current_clinician: ClinicianSchema = Depends(security.get_current_clinician),
+):
+    if not await run_in_threadpool(_patient_exists, db, patient_id):
+        raise HTTPException(status_code=404, detail="Patient not found")
+    if profile and not security.is_admin(current_clinician):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+
+    inference = get_inference_module()
+    request = request or RiskRequest()
+    model_version = request.model_version or inference.DEFAULT_MODEL_VERSION
+    scoring = dict(model_version=model_version, explain=request.explain, top_k=request.top_k)
+    options = dict(scoring, patient_id=patient_id)
+
+    if request.history is not None:
+        history = [day.model_dump() for day in request.history]
+        key = _history_key(patient_id, history, model_version, request.explain, request.top_k)
+        compute = lambda: cache.predict(history, **options)
+        uncached = lambda: inference.predict(history, **scoring)
+    else:
+        # A single row read of the materialized features instead of a history scan
+        try:
+            stored = await run_in_threadpool(_stored_features, db, patient_id, model_version, inference.MIN_HISTORY_DAYS)
+        except feature_store.FeaturesUnavailable as e:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+        if stored is None:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Insufficient data. At least 8 days of observations are required to generate features.",
+            )
+        features, n_days, as_of_date = stored
+        key = (patient_id, model_version, request.explain, request.top_k, "stored", as_of_date, n_days)
+        compute = lambda: cache.predict_features(features, **options)
+        uncached = lambda: inference.predict_features(features, **scoring)
+
+    if profile:
+        # Profile the real computation: never a cache hit, never work shared with another request
+        key = object()
+        compute = lambda: _profiled(uncached, patient_id=patient_id, stored=request.history is None, **scoring)
+
+    try:
+        result = await pool.run(key, compute)
+    except InferencePoolFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Prediction queue is full, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+    if profile:
+        result, profile_id = result
+        # None when another capture was already running
+        if profile_id is not None:
+            response.headers["X-Profile-Id"] = profile_id
+
+    return {"patient_id": patient_id, "model_version": model_version, **result}
+
+@scores_router.get("/", response_model=List[RankedRiskScore])
+def read_top_risk_scores(
+    sweep_date: Optional[date] = Query(None, alias="date", description="Sweep date; defaults to the latest sweep"),
+    model_version: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_clinician: ClinicianSchema = Depends(security.get_current_clinician),
+):
+    """Highest precomputed scores of one sweep, highest first (see app/risk_sweep.py)."""
+    Score = models.risk_score.PrecomputedRiskScore
+    model_version = model_version or get_inference_module().DEFAULT_MODEL_VERSION
+    if sweep_date is None:
+        sweep_date = db.query(func.max(Score.date)).filter(Score.model_version == model_version).scalar()
+        if sweep_date is None:
+            return []
+
+    # A reverse scan of the (date, score) index
+    scores = (
+        db.query(Score)
+        .filter(Score.date == sweep_date, Score.model_version == model_version)
+        .order_by(Score.score.desc())
+        .limit(limit)
+        .all()
+    )
+    return [
+        {
+            "patient_id": score.patient_id,
+            "date": score.date,
+            "model_version": score.model_version,
+            "risk_score": score.score,
+            "feature_contributions": json.loads(score.contributions),
+            "features_as_of": score.features_as_of,
+        }
+        for score in scores
+    ]
@@ -0,0 +1,37 @@
+# app/schemas/observation.py
+
+from pydantic import BaseModel, ConfigDict
+from datetime import date
+from typing import Dict, List, Optional
+
+from .risk import DailyObservation
+
+class ObservationCreate(DailyObservation):
+    pass
+
+class Observation(DailyObservation):
+    id: int
+    patient_id: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+class PatientFeatures(BaseModel):
+    patient_id: int
+    model_version: str
+    as_of_date: date
+    n_days: int
+    features: Dict[str, Optional[float]]
+
+class BulkObservation(DailyObservation):
+    patient_id: int
+
+class RowError(BaseModel):
+    row: int
+    errors: List[str]
+
+class BulkIngestResult(BaseModel):
+    received: int
+    inserted: int
+    failed: int
+    errors: List[RowError]
+    errors_truncated: bool = False
@@ -22,4 +22,9 @@ class Patient(PatientBase):
     created_at: datetime
 
     # --- Use model_config instead of class Config ---
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class PatientSummary(BaseModel):
+    id: int
+    full_name: str
+    clinician_id: int
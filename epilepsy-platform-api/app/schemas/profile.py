@@ -0,0 +1,13 @@
+# app/schemas/profile.py
+
+from pydantic import BaseModel
+from typing import Any, Dict
+
+class ProfileSummary(BaseModel):
+    id: str
+    name: str
+    # Unix time the capture started
+    started_at: float
+    seconds: float
+    pid: int
+    context: Dict[str, Any]
@@ -0,0 +1,37 @@
+# app/schemas/risk.py
+
+from pydantic import BaseModel, Field
+from datetime import date
+from typing import Dict, List, Literal, Optional
+
+class DailyObservation(BaseModel):
+    date: date
+    hours_of_sleep: float
+    stress_level: float
+    medication_taken: int
+    eeg_feature_1: Optional[float] = None
+    mri_lesion_present: Optional[int] = None
+
+class RiskRequest(BaseModel):
+    # Omit to score from the patient's stored observations
+    history: Optional[List[DailyObservation]] = Field(None, min_length=1)
+    model_version: Optional[str] = None
+    # 'full' returns every feature contribution, 'top_k' the largest few, 'none' just the score
+    explain: Literal['none', 'top_k', 'full'] = 'full'
+    top_k: int = Field(5, ge=1)
+
+class RiskScore(BaseModel):
+    patient_id: int
+    model_version: str
+    risk_score: float
+    feature_contributions: Dict[str, float]
+
+class RankedRiskScore(BaseModel):
+    """A precomputed score from a population sweep."""
+    patient_id: int
+    date: date
+    model_version: str
+    risk_score: float
+    feature_contributions: Dict[str, float]
+    # Latest observation the score's features were computed from
+    features_as_of: date
@@ -8,11 +8,16 @@ from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from dotenv import load_dotenv
-from sqlalchemy.orm import Session
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
 
 # --- Import database and model dependencies ---
 from .dependencies import get_db
+from .concurrency_limiter import BoundedPool, ConcurrencyLimiter
+from .metrics import stage
 from .models import clinician as clinician_model
+from .principal_cache import PrincipalCache
+from .schemas import clinician as clinician_schema
 from .schemas import token as token_schema
 
 
@@ -22,15 +27,54 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
+# Resolved clinicians are reused for this long; never longer than a token lives
+PRINCIPAL_CACHE_TTL_SECONDS = min(
+    float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60")), ACCESS_TOKEN_EXPIRE_MINUTES * 60 / 2
+)
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+# Comma-separated emails of clinicians allowed to use the /admin endpoints
+ADMIN_EMAILS = {email.strip().lower() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()}
 
 # --- Password Hashing ---
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+# Argon2 cost; unset values keep passlib's defaults. Existing hashes keep verifying after a change.
+ARGON2_SETTINGS = {
+    f"argon2__{name}": int(os.environ[env])
+    for name, env in (
+        ("rounds", "ARGON2_TIME_COST"),
+        ("memory_cost", "ARGON2_MEMORY_COST"),
+        ("parallelism", "ARGON2_PARALLELISM"),
+    )
+    if os.getenv(env)
+}
+pwd_context = CryptContext(schemes=["argon2"], deprecated="auto", **ARGON2_SETTINGS)
+
+# Hashing runs on its own small pool so a login burst can't take the threads other requests need
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+password_hash_pool = BoundedPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING, thread_name_prefix="password-hash")
+
+# Logins one account or client IP may have in progress at once
+LOGIN_MAX_CONCURRENT_PER_ACCOUNT = int(os.getenv("LOGIN_MAX_CONCURRENT_PER_ACCOUNT", "2"))
+LOGIN_MAX_CONCURRENT_PER_IP = int(os.getenv("LOGIN_MAX_CONCURRENT_PER_IP", "8"))
+account_limiter = ConcurrencyLimiter(LOGIN_MAX_CONCURRENT_PER_ACCOUNT)
+ip_limiter = ConcurrencyLimiter(LOGIN_MAX_CONCURRENT_PER_IP)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    with stage("argon2_verify"):
+        return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    with stage("argon2_hash"):
+        return pwd_context.hash(password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """`verify_password` on the hashing pool. Raises `PoolFull` when it is saturated."""
+    # A fresh key per call: password work must never be shared between requests
+    return await password_hash_pool.run(object(), verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """`get_password_hash` on the hashing pool. Raises `PoolFull` when it is saturated."""
+    return await password_hash_pool.run(object(), get_password_hash, password)
 
 # --- JWT Token Creation ---
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -43,6 +87,36 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+# --- Principal Cache ---
+principal_cache = PrincipalCache(max_entries=PRINCIPAL_CACHE_MAX_ENTRIES, ttl_seconds=PRINCIPAL_CACHE_TTL_SECONDS)
+
+# Clinician changes are noted at flush but only invalidated once committed: dropping the
+# entry at flush would let a concurrent request re-cache the old row before the commit.
+# Bulk `query(Clinician).update()` / `.delete()` skip these mapper events; callers of
+# those must invalidate (or clear) `principal_cache` themselves after committing.
+_STALE_PRINCIPALS = "stale_principals"
+
+@event.listens_for(clinician_model.Clinician, "after_insert")
+@event.listens_for(clinician_model.Clinician, "after_update")
+@event.listens_for(clinician_model.Clinician, "after_delete")
+def _note_changed_principal(mapper, connection, target):
+    session = object_session(target)
+    if session is None:
+        return
+    # Covers a changed email too: drop the entry under the old address as well
+    history = inspect(target).attrs.email.history
+    session.info.setdefault(_STALE_PRINCIPALS, set()).update({target.email, *history.deleted})
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_principals(session):
+    for email in session.info.pop(_STALE_PRINCIPALS, ()):
+        principal_cache.invalidate(email)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_principals(session):
+    # Nothing was written, so cached principals are still current
+    session.info.pop(_STALE_PRINCIPALS, None)
+
 # --- NEW: OAuth2PasswordBearer Scheme ---
 # "token" is the URL of our login endpoint
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
@@ -55,7 +129,8 @@ def get_current_clinician(token: str = Depends(oauth2_scheme), db: Session = Dep
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        with stage("jwt_decode"):
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
@@ -63,8 +138,23 @@ def get_current_clinician(token: str = Depends(oauth2_scheme), db: Session = Dep
     except JWTError:
         raise credentials_exception
 
+    principal = principal_cache.get(token_data.email)
+    if principal is not None:
+        return principal
+
     clinician = db.query(clinician_model.Clinician).filter(clinician_model.Clinician.email == token_data.email).first()
 
     if clinician is None:
         raise credentials_exception
-    return clinician
\ No newline at end of file
+    principal = clinician_schema.Clinician.model_validate(clinician)
+    principal_cache.put(token_data.email, principal)
+    return principal
+
+# --- Admin Access ---
+def is_admin(clinician: clinician_schema.Clinician) -> bool:
+    return clinician.email.lower() in ADMIN_EMAILS
+
+def get_current_admin(current_clinician: clinician_schema.Clinician = Depends(get_current_clinician)):
+    if not is_admin(current_clinician):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return current_clinician
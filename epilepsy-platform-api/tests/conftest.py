@@ -12,7 +12,7 @@ from app.dependencies import get_db
 
 # --- CRITICAL: Import all SQLAlchemy models ---
 # This ensures that Base.metadata knows about all your tables.
-from app.models import patient, clinician
+from app.models import patient, clinician, prediction, observation, risk_score
 
 # --- Test Database Setup ---
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
@@ -65,4 +65,15 @@ def authenticated_client(client: TestClient):
 
     client.headers["Authorization"] = f"Bearer {token}"
 
-    return client
\ No newline at end of file
+    return client
+
+
+@pytest.fixture
+def patient_id(authenticated_client: TestClient):
+    # Fixture to provide a patient owned by the authenticated clinician
+    response = authenticated_client.post("/patients/", json={
+        "full_name": "Test Patient",
+        "date_of_birth": "1990-01-01",
+        "clinician_id": 1
+    })
+    return response.json()["id"]
@@ -0,0 +1,59 @@
+# tests/test_admin.py
+
+import os
+import subprocess
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import security
+from ml_workspace.src import profiling
+from tests.test_risk import make_history
+
+@pytest.fixture
+def profile_store(tmp_path, monkeypatch):
+    store = profiling.ProfileStore(tmp_path, max_profiles=5)
+    monkeypatch.setattr(profiling, "store", store)
+    return store
+
+@pytest.fixture
+def admin_client(authenticated_client: TestClient, monkeypatch):
+    monkeypatch.setattr(security, "ADMIN_EMAILS", {"testauth@example.com"})
+    return authenticated_client
+
+def test_profiling_requires_admin(authenticated_client: TestClient, patient_id: int, profile_store):
+    assert authenticated_client.get("/admin/profiles").status_code == 403
+    response = authenticated_client.post(f"/patients/{patient_id}/risk?profile=true", json={"history": make_history()})
+    assert response.status_code == 403
+    assert profile_store.list() == []
+
+def test_profile_prediction_and_retrieve(admin_client: TestClient, patient_id: int, profile_store):
+    history = make_history()
+    plain = admin_client.post(f"/patients/{patient_id}/risk", json={"history": history})
+    assert "x-profile-id" not in plain.headers
+
+    response = admin_client.post(f"/patients/{patient_id}/risk?profile=true", json={"history": history})
+    assert response.status_code == 200
+    # Profiling doesn't change the answer
+    assert response.json() == plain.json()
+    profile_id = response.headers["x-profile-id"]
+
+    listed = admin_client.get("/admin/profiles").json()
+    assert [(p["id"], p["name"], p["context"]["patient_id"]) for p in listed] == [(profile_id, "predict", patient_id)]
+
+    report = admin_client.get(f"/admin/profiles/{profile_id}?sort=tottime&limit=10")
+    assert report.status_code == 200
+    assert "function calls" in report.text
+
+    download = admin_client.get(f"/admin/profiles/{profile_id}/pstats")
+    assert download.status_code == 200
+    assert len(download.content) > 0
+
+    assert admin_client.get("/admin/profiles/00000000000000000000-deadbeef").status_code == 404
+    assert admin_client.get(f"/admin/profiles/{profile_id}?sort=bogus").status_code == 422
+
+def test_admin_router_imports_on_its_own():
+    script = "import app.routers.admin\n"
+    api_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run([sys.executable, "-c", script], cwd=api_root, env={**os.environ, "PYTHONPATH": api_root}, check=True)
@@ -1,7 +1,19 @@
 # tests/test_auth.py
 
+import os
+import subprocess
+import sys
+
+import pytest
 from fastapi.testclient import TestClient
 
+from app import security
+from app.concurrency_limiter import BoundedPool, ConcurrencyLimiter, ConcurrencyLimitExceeded
+from app.models.clinician import Clinician
+from app.principal_cache import PrincipalCache
+from app.security import principal_cache
+from .conftest import TestingSessionLocal
+
 def test_create_clinician_success(client: TestClient):
     response = client.post("/clinicians/", json={
         "email": "test@example.com",
@@ -56,4 +68,98 @@ def test_access_protected_route_with_token(client: TestClient):
     # Now, use the token to access the protected route
     headers = {"Authorization": f"Bearer {token}"}
     response = client.get("/patients/", headers=headers)
-    assert response.status_code == 200
\ No newline at end of file
+    assert response.status_code == 200
+
+def test_principal_cache_skips_lookup_and_follows_changes(client: TestClient):
+    client.post("/clinicians/", json={"email": "cached@example.com", "password": "testpassword"})
+    token = client.post("/token", data={
+        "username": "cached@example.com",
+        "password": "testpassword"
+    }).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    principal_cache.clear()
+    before = principal_cache.stats()
+    assert client.get("/patients/", headers=headers).status_code == 200
+    assert client.get("/patients/", headers=headers).status_code == 200
+    after = principal_cache.stats()
+    assert after["misses"] - before["misses"] == 1
+    assert after["hits"] - before["hits"] == 1
+
+    # A rolled back rename leaves the cached principal in place
+    with TestingSessionLocal() as db:
+        db.query(Clinician).filter(Clinician.email == "cached@example.com").first().email = "undone@example.com"
+        db.flush()
+        db.rollback()
+    assert principal_cache.get("cached@example.com") is not None
+
+    # Renaming the clinician drops the cached principal once committed, so the old token stops working
+    with TestingSessionLocal() as db:
+        clinician = db.query(Clinician).filter(Clinician.email == "cached@example.com").first()
+        clinician.email = "renamed@example.com"
+        db.flush()
+        # Other requests still see the committed row until the commit, so its entry stays
+        assert principal_cache.get("cached@example.com") is not None
+        db.commit()
+    assert principal_cache.get("cached@example.com") is None
+    assert client.get("/patients/", headers=headers).status_code == 401
+
+def test_principal_cache_ttl_and_capacity():
+    now = [0.0]
+    cache = PrincipalCache(max_entries=2, ttl_seconds=10, clock=lambda: now[0])
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+
+    now[0] = 11
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2 and stats["evictions"] == 1
+    assert stats["hit_ratio"] == 1 / 3
+
+def test_login_concurrency_limit_per_account(client: TestClient):
+    account_limiter = security.account_limiter
+    for _ in range(account_limiter.max_concurrent):
+        account_limiter.acquire("test@example.com")
+    try:
+        response = client.post("/token", data={
+            "username": "Test@example.com",
+            "password": "testpassword"
+        })
+    finally:
+        for _ in range(account_limiter.max_concurrent):
+            account_limiter.release("test@example.com")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+    assert account_limiter.active("test@example.com") == 0
+
+def test_login_hashing_pool_full(client: TestClient, monkeypatch):
+    monkeypatch.setattr(security, "password_hash_pool", BoundedPool(max_workers=1, max_pending=0))
+    response = client.post("/token", data={
+        "username": "test@example.com",
+        "password": "testpassword"
+    })
+    assert response.status_code == 503
+
+def test_concurrency_limiter_releases_on_error():
+    limiter = ConcurrencyLimiter(1)
+    with pytest.raises(RuntimeError):
+        with limiter.hold("a"):
+            with pytest.raises(ConcurrencyLimitExceeded):
+                limiter.acquire("a")
+            with limiter.hold("b"):
+                raise RuntimeError()
+    assert limiter.active("a") == 0
+    assert limiter.active("b") == 0
+
+def test_auth_does_not_load_ml():
+    script = (
+        "import sys\n"
+        "import app.routers.auth, app.security\n"
+        "assert 'app.ml' not in sys.modules\n"
+        "assert not any(name.startswith('ml_workspace') for name in sys.modules)\n"
+    )
+    api_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run([sys.executable, "-c", script], cwd=api_root, env={**os.environ, "PYTHONPATH": api_root}, check=True)
@@ -0,0 +1,75 @@
+# tests/test_metrics.py
+
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+
+from app import metrics
+from app.ml import get_prediction_cache
+from tests.test_risk import make_history
+
+def _sample(text: str, line_prefix: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(line_prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+def test_metrics_endpoint_records_route_templates(authenticated_client: TestClient, patient_id: int):
+    count = 'http_request_duration_seconds_count{method="GET",route="/patients/{patient_id}",status="200"}'
+    before = _sample(authenticated_client.get("/metrics").text, count)
+
+    authenticated_client.get(f"/patients/{patient_id}")
+    response = authenticated_client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert _sample(text, count) == before + 1
+    # Raw paths never become label values
+    assert f'route="/patients/{patient_id}"' not in text
+    assert "# TYPE db_queries_per_request histogram" in text
+    assert _sample(text, 'stage_duration_seconds_count{stage="jwt_decode"}') >= 1
+    assert 'principal_cache{stat="hits"}' in text
+
+def test_histogram_exposition_format():
+    histogram = metrics.Histogram("test_seconds", "Test.", ("kind",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, 'a"b')
+    histogram.observe(0.5, 'a"b')
+    histogram.observe(5.0, 'a"b')
+
+    assert list(histogram.collect()) == [
+        "# HELP test_seconds Test.",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{kind="a\\"b",le="0.1"} 1',
+        'test_seconds_bucket{kind="a\\"b",le="1.0"} 2',
+        'test_seconds_bucket{kind="a\\"b",le="+Inf"} 3',
+        'test_seconds_sum{kind="a\\"b"} 5.55',
+        'test_seconds_count{kind="a\\"b"} 3',
+    ]
+
+def test_server_timing_header(authenticated_client: TestClient, patient_id: int, monkeypatch):
+    assert "server-timing" not in authenticated_client.get(f"/patients/{patient_id}").headers
+
+    monkeypatch.setattr(metrics, "SERVER_TIMING_ENABLED", True)
+    # A cached result would skip the prediction stage
+    get_prediction_cache().clear()
+    response = authenticated_client.post(f"/patients/{patient_id}/risk", json={"history": make_history()})
+
+    assert response.status_code == 200
+    entries = {entry.split(";")[0] for entry in response.headers["server-timing"].split(", ")}
+    # Stages that ran on the inference pool are attributed to the request too
+    assert {"db", "jwt_decode", "features", "predict", "total"} <= entries
+    assert 'desc="queries=' in response.headers["server-timing"]
+
+def test_request_timings_from_many_threads():
+    timings = metrics.RequestTimings()
+
+    def work(_):
+        for _ in range(1000):
+            timings.add_query(0.001)
+            timings.add_stage("predict", 0.001)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(work, range(8)))
+    assert timings.db_queries == 8000
+    assert round(timings.db_seconds, 6) == round(timings.stages["predict"], 6) == 8.0
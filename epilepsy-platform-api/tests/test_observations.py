@@ -0,0 +1,271 @@
+# tests/test_observations.py
+
+import asyncio
+import json
+import random
+
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from app import bulk_ingest, feature_store
+from app.feature_store import get_features
+from app.models.observation import PatientFeatureVector
+from app.ml import get_inference_module
+from .conftest import TestingSessionLocal
+from .test_risk import make_history
+
+VERSIONS = get_inference_module().registry.available_versions()
+
+def stored_features(client: TestClient, patient_id: int, model_version: str = "v1.0"):
+    data = client.get(f"/patients/{patient_id}/features?model_version={model_version}").json()
+    return np.array(list(data["features"].values()), dtype=float).astype(np.float32)
+
+def expected_features(history, model_version: str = "v1.0"):
+    inference = get_inference_module()
+    plan = inference.registry.get(model_version).feature_plan
+    features = inference.create_features(pd.DataFrame(history), plan=plan)
+    return features.iloc[-1][plan.feature_names].to_numpy(dtype=float).astype(np.float32)
+
+def test_observations_materialize_features(authenticated_client: TestClient, patient_id: int):
+    history = make_history(12)
+    for day in history:
+        response = authenticated_client.post(f"/patients/{patient_id}/observations", json=day)
+        assert response.status_code == 201
+
+    data = authenticated_client.get(f"/patients/{patient_id}/features").json()
+    assert data["n_days"] == 12
+    assert data["as_of_date"] == history[-1]["date"]
+    assert data["model_version"] == get_inference_module().DEFAULT_MODEL_VERSION
+    # Every version's vector, in its spec's order
+    for version in VERSIONS:
+        data = authenticated_client.get(f"/patients/{patient_id}/features?model_version={version}").json()
+        assert list(data["features"]) == get_inference_module().registry.get(version).feature_names
+        np.testing.assert_array_equal(stored_features(authenticated_client, patient_id, version),
+                                      expected_features(history, version))
+
+    observations = authenticated_client.get(f"/patients/{patient_id}/observations").json()
+    assert [day["date"] for day in observations] == [day["date"] for day in history]
+
+    # Scoring from stored features gives the same answer as sending the history
+    stored_risk = authenticated_client.post(f"/patients/{patient_id}/risk").json()
+    sent_risk = authenticated_client.post(f"/patients/{patient_id}/risk", json={"history": history}).json()
+    assert stored_risk == sent_risk
+
+def test_out_of_order_observations(authenticated_client: TestClient, patient_id: int):
+    history = make_history(10)
+    shuffled = history[:]
+    random.Random(3).shuffle(shuffled)
+    for day in shuffled:
+        authenticated_client.post(f"/patients/{patient_id}/observations", json=day)
+
+    data = authenticated_client.get(f"/patients/{patient_id}/features").json()
+    assert data["n_days"] == 10
+    assert data["as_of_date"] == history[-1]["date"]
+    for version in VERSIONS:
+        np.testing.assert_array_equal(stored_features(authenticated_client, patient_id, version),
+                                      expected_features(history, version))
+
+def test_features_of_unstored_versions_are_refused(authenticated_client: TestClient, patient_id: int,
+                                                   monkeypatch):
+    monkeypatch.setattr(feature_store, "FEATURE_STORE_MODEL_VERSIONS", ["v2.0"])
+    for day in make_history(9):
+        authenticated_client.post(f"/patients/{patient_id}/observations", json=day)
+    with TestingSessionLocal() as db:
+        assert [row.model_version for row in db.query(PatientFeatureVector).filter_by(patient_id=patient_id)] == ["v2.0"]
+
+    response = authenticated_client.get(f"/patients/{patient_id}/features?model_version=v1.0")
+    assert response.status_code == 409
+    assert "not stored" in response.json()["detail"]
+    response = authenticated_client.post(f"/patients/{patient_id}/risk", json={"model_version": "v1.0"})
+    assert response.status_code == 409
+    assert authenticated_client.post(f"/patients/{patient_id}/risk", json={"model_version": "v2.0"}).status_code == 200
+    assert authenticated_client.get(f"/patients/{patient_id}/features?model_version=v9").status_code == 422
+
+def test_stale_vectors_are_rebuilt_from_the_window(authenticated_client: TestClient, patient_id: int):
+    history = make_history(12)
+    for day in history:
+        authenticated_client.post(f"/patients/{patient_id}/observations", json=day)
+
+    # As if the v1.0 spec had been replaced since the vector was written
+    with TestingSessionLocal() as db:
+        db.query(PatientFeatureVector).filter_by(patient_id=patient_id, model_version="v1.0").update(
+            {"spec_digest": "replaced", "values": "[]"}
+        )
+        db.commit()
+    np.testing.assert_array_equal(stored_features(authenticated_client, patient_id), expected_features(history))
+
+    # Without enough trailing days to rebuild it, the features are refused rather than scored with gaps
+    with TestingSessionLocal() as db:
+        features = get_features(db, patient_id)
+        features.window = json.dumps(json.loads(features.window)[-2:])
+        db.commit()
+    assert authenticated_client.get(f"/patients/{patient_id}/features").status_code == 409
+    assert authenticated_client.post(f"/patients/{patient_id}/risk").status_code == 409
+
+def test_duplicate_observation_date(authenticated_client: TestClient, patient_id: int):
+    day = make_history(1)[0]
+    assert authenticated_client.post(f"/patients/{patient_id}/observations", json=day).status_code == 201
+    response = authenticated_client.post(f"/patients/{patient_id}/observations", json=day)
+    assert response.status_code == 409
+    assert authenticated_client.get(f"/patients/{patient_id}/features").json()["n_days"] == 1
+
+def test_observation_retries_concurrent_features_insert(authenticated_client: TestClient, patient_id: int,
+                                                       monkeypatch):
+    history = make_history(2)
+    authenticated_client.post(f"/patients/{patient_id}/observations", json=history[0])
+
+    # The first attempt misses the features row, as if another request had just created it
+    locked_features = feature_store._locked_features
+    calls = []
+    def racing_locked_features(db, patient_ids):
+        calls.append(patient_ids)
+        return {} if len(calls) == 1 else locked_features(db, patient_ids)
+    monkeypatch.setattr(feature_store, "_locked_features", racing_locked_features)
+
+    response = authenticated_client.post(f"/patients/{patient_id}/observations", json=history[1])
+    assert response.status_code == 201
+    assert len(calls) == 2
+    assert authenticated_client.get(f"/patients/{patient_id}/features").json()["n_days"] == 2
+
+def test_risk_from_stored_features_needs_history(authenticated_client: TestClient, patient_id: int):
+    response = authenticated_client.post(f"/patients/{patient_id}/risk")
+    assert response.status_code == 422
+
+    for day in make_history(5):
+        authenticated_client.post(f"/patients/{patient_id}/observations", json=day)
+    response = authenticated_client.post(f"/patients/{patient_id}/risk", json={})
+    assert response.status_code == 422
+    assert "Insufficient data" in response.json()["detail"]
+
+def test_delete_patient_removes_observations(authenticated_client: TestClient, patient_id: int):
+    for day in make_history(3):
+        authenticated_client.post(f"/patients/{patient_id}/observations", json=day)
+    authenticated_client.delete(f"/patients/{patient_id}")
+
+    response = authenticated_client.get(f"/patients/{patient_id}/observations")
+    assert response.status_code == 404
+    with TestingSessionLocal() as db:
+        assert get_features(db, patient_id) is None
+
+def test_bulk_ingest_ndjson(authenticated_client: TestClient, patient_id: int):
+    other_id = authenticated_client.post("/patients/", json={
+        "full_name": "Second Observed Patient",
+        "date_of_birth": "1979-09-09",
+        "clinician_id": 1
+    }).json()["id"]
+    history = make_history(9)
+    lines = [json.dumps({"patient_id": pid, **day}) for day in history for pid in (patient_id, other_id)]
+    lines.insert(3, "{not json")
+    lines.insert(6, json.dumps({"patient_id": patient_id, "date": "2026-01-01", "hours_of_sleep": "lots"}))
+    lines.insert(9, "")
+    lines.append(json.dumps({"patient_id": 99999, **history[0]}))
+    lines.append(json.dumps({"patient_id": patient_id, **history[0]}))
+
+    response = authenticated_client.post(
+        "/observations/bulk?batch_size=4",
+        content="\n".join(lines).encode(),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["received"] == 22
+    assert data["inserted"] == 18
+    assert data["failed"] == 4
+    assert [error["row"] for error in data["errors"]] == [4, 7, 21, 22]
+    assert "hours_of_sleep" in data["errors"][1]["errors"][0]
+    assert "Patient not found" in data["errors"][2]["errors"][0]
+    assert "already exists" in data["errors"][3]["errors"][0]
+
+    for pid in (patient_id, other_id):
+        features = authenticated_client.get(f"/patients/{pid}/features").json()
+        assert features["n_days"] == 9
+        np.testing.assert_array_equal(stored_features(authenticated_client, pid), expected_features(history))
+
+def test_bulk_ingest_csv(authenticated_client: TestClient, patient_id: int):
+    history = make_history(10)
+    authenticated_client.post(f"/patients/{patient_id}/observations", json=history[0])
+    header = "patient_id,date,hours_of_sleep,stress_level,medication_taken,eeg_feature_1,mri_lesion_present"
+    rows = [
+        f"{patient_id},{day['date']},{day['hours_of_sleep']},{day['stress_level']},{day['medication_taken']},{day['eeg_feature_1']},"
+        for day in history[1:]
+    ]
+    rows.append(f"{patient_id},2026-02-02,7")
+
+    response = authenticated_client.post(
+        "/observations/bulk",
+        content=("\r\n".join([header] + rows) + "\r\n").encode(),
+        headers={"Content-Type": "text/csv"},
+    )
+    data = response.json()
+    assert (data["received"], data["inserted"], data["failed"]) == (10, 9, 1)
+    assert data["errors"] == [{"row": 10, "errors": ["Expected 7 fields, got 3"]}]
+
+    observations = authenticated_client.get(f"/patients/{patient_id}/observations").json()
+    assert len(observations) == 10
+    assert observations[-1]["mri_lesion_present"] is None
+    assert authenticated_client.post(f"/patients/{patient_id}/risk").status_code == 200
+
+def test_csv_records_may_span_lines():
+    async def chunks():
+        body = b'a,b\r\n1,"two\r\nlines, ""quoted"""\r\n\r\n2,"\n\n"\r\n3,"open\n'
+        for i in range(0, len(body), 3):
+            yield body[i:i + 3]
+
+    async def records():
+        return [record async for record in bulk_ingest.iter_records(bulk_ingest.iter_lines(chunks()), "csv")]
+
+    assert asyncio.run(records()) == [
+        (1, {"a": "1", "b": 'two\nlines, "quoted"'}, None),
+        (2, {"a": "2", "b": "\n\n"}, None),
+        (3, None, "Unterminated quoted field"),
+    ]
+
+def test_bulk_ingest_reports_undecodable_and_overlong_lines(authenticated_client: TestClient, patient_id: int):
+    history = make_history(2)
+    lines = [
+        json.dumps({"patient_id": patient_id, **history[0]}).encode(),
+        b"\xff\xfe",
+        b'{"patient_id": ' + b" " * bulk_ingest.MAX_RECORD_BYTES + b"1}",
+        json.dumps({"patient_id": patient_id, **history[1]}).encode(),
+    ]
+    response = authenticated_client.post(
+        "/observations/bulk", content=b"\n".join(lines), headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["received"], data["inserted"], data["failed"]) == (4, 2, 2)
+    assert data["errors"] == [
+        {"row": 2, "errors": ["Invalid UTF-8"]},
+        {"row": 3, "errors": [f"Line longer than {bulk_ingest.MAX_RECORD_BYTES} bytes"]},
+    ]
+
+def test_iter_lines_skips_the_rest_of_an_overlong_line():
+    async def chunks():
+        for chunk in (b"ok\nabcd", b"efgh", b"ij\nnext\r\n", b"tail"):
+            yield chunk
+
+    async def lines():
+        return [line async for line in bulk_ingest.iter_lines(chunks(), max_bytes=5)]
+
+    assert asyncio.run(lines()) == [b"ok", None, b"next", b"tail"]
+
+def test_failed_batch_keeps_row_errors(authenticated_client: TestClient, patient_id: int, monkeypatch):
+    def fail(db, rows):
+        raise RuntimeError("disk full")
+    monkeypatch.setattr(feature_store, "add_observations", fail)
+
+    lines = [json.dumps({"patient_id": pid, **make_history(1)[0]}) for pid in (99999, patient_id)]
+    response = authenticated_client.post(
+        "/observations/bulk", content="\n".join(lines).encode(), headers={"Content-Type": "application/x-ndjson"},
+    )
+    data = response.json()
+    assert (data["inserted"], data["failed"]) == (0, 2)
+    assert data["errors"] == [
+        {"row": 1, "errors": ["patient_id: Patient not found"]},
+        {"row": 2, "errors": ["Batch could not be written: disk full"]},
+    ]
+
+def test_bulk_ingest_rejects_unknown_format(authenticated_client: TestClient):
+    response = authenticated_client.post("/observations/bulk", json=[{"patient_id": 1}])
+    assert response.status_code == 415
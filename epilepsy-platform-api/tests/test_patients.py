@@ -46,4 +46,43 @@ def test_update_nonexistent_patient(authenticated_client: TestClient):
 
 def test_delete_nonexistent_patient(authenticated_client: TestClient):
     response = authenticated_client.delete("/patients/99999")
-    assert response.status_code == 404
\ No newline at end of file
+    assert response.status_code == 404
+
+def test_list_patients_pagination_and_filters(authenticated_client: TestClient):
+    created = []
+    for i, (name, clinician_id) in enumerate([
+        ("Ada Page", 501), ("Adam Page", 502), ("Bea Page", 501), ("Ada_Page", 501), ("Adele Page", 501),
+    ]):
+        response = authenticated_client.post("/patients/", json={
+            "full_name": name,
+            "date_of_birth": f"1990-01-0{i + 1}",
+            "clinician_id": clinician_id
+        })
+        created.append(response.json()["id"])
+
+    # Walk one clinician's patients two at a time
+    seen, after = [], None
+    while True:
+        params = {"clinician_id": 501, "limit": 2}
+        if after is not None:
+            params["after"] = after
+        response = authenticated_client.get("/patients/", params=params)
+        assert response.status_code == 200
+        seen.extend(patient["id"] for patient in response.json())
+        after = response.headers.get("X-Next-After")
+        if after is None:
+            break
+    assert seen == [created[0], created[2], created[3], created[4]]
+
+    # Prefix matching treats wildcards literally
+    response = authenticated_client.get("/patients/", params={"name_prefix": "Ada_", "clinician_id": 501})
+    assert [patient["id"] for patient in response.json()] == [created[3]]
+    response = authenticated_client.get("/patients/", params={"name_prefix": "Ad", "clinician_id": 501})
+    assert [patient["id"] for patient in response.json()] == [created[0], created[3], created[4]]
+
+    response = authenticated_client.get("/patients/", params={"view": "summary", "clinician_id": 502})
+    assert response.json() == [{"id": created[1], "full_name": "Adam Page", "clinician_id": 502}]
+    full = authenticated_client.get("/patients/", params={"clinician_id": 502}).json()
+    assert full[0]["date_of_birth"] == "1990-01-02" and "created_at" in full[0]
+
+    assert authenticated_client.get("/patients/", params={"limit": 0}).status_code == 422
@@ -0,0 +1,103 @@
+# tests/test_risk.py
+
+import asyncio
+import threading
+from datetime import date, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.dependencies import get_inference_pool
+from app.ml import InferencePool, InferencePoolFull
+
+def make_history(days=10):
+    start = date(2025, 1, 1)
+    return [
+        {
+            "date": (start + timedelta(days=i)).isoformat(),
+            "hours_of_sleep": 6 + (i % 3),
+            "stress_level": 1 + (i % 4),
+            "medication_taken": i % 2,
+            "eeg_feature_1": 100.0 + 5 * i,
+            "mri_lesion_present": 1,
+        }
+        for i in range(days)
+    ]
+
+def test_predict_patient_risk(authenticated_client: TestClient, patient_id: int):
+    response = authenticated_client.post(f"/patients/{patient_id}/risk", json={"history": make_history()})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["patient_id"] == patient_id
+    assert data["model_version"] == "v1.0"
+    assert 0.0 <= data["risk_score"] <= 1.0
+    assert "hours_of_sleep" in data["feature_contributions"]
+
+def test_predict_risk_explain_modes(authenticated_client: TestClient, patient_id: int):
+    url = f"/patients/{patient_id}/risk"
+    top = authenticated_client.post(url, json={"history": make_history(), "explain": "top_k", "top_k": 2}).json()
+    bare = authenticated_client.post(url, json={"history": make_history(), "explain": "none"}).json()
+
+    assert len(top["feature_contributions"]) == 2
+    assert bare["feature_contributions"] == {}
+    assert bare["risk_score"] == top["risk_score"]
+
+    response = authenticated_client.post(url, json={"history": make_history(), "explain": "everything"})
+    assert response.status_code == 422
+
+def test_predict_risk_nonexistent_patient(authenticated_client: TestClient):
+    response = authenticated_client.post("/patients/99999/risk", json={"history": make_history()})
+    assert response.status_code == 404
+
+def test_predict_risk_insufficient_history(authenticated_client: TestClient, patient_id: int):
+    response = authenticated_client.post(f"/patients/{patient_id}/risk", json={"history": make_history(5)})
+    assert response.status_code == 422
+    assert "Insufficient data" in response.json()["detail"]
+
+def test_predict_risk_queue_full(authenticated_client: TestClient, patient_id: int):
+    app.dependency_overrides[get_inference_pool] = lambda: InferencePool(max_workers=1, max_pending=0)
+    response = authenticated_client.post(f"/patients/{patient_id}/risk", json={"history": make_history()})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+def test_inference_pool_coalesces_and_sheds_load():
+    pool = InferencePool(max_workers=2, max_pending=2)
+    calls = []
+    release = threading.Event()
+
+    def work(value):
+        calls.append(value)
+        release.wait(timeout=5)
+        return value * 2
+
+    async def scenario():
+        same = [asyncio.create_task(pool.run("patient-1", work, 21)) for _ in range(5)]
+        other = asyncio.create_task(pool.run("patient-2", work, 1))
+        await asyncio.sleep(0.05)
+        assert pool.pending == 2
+        with pytest.raises(InferencePoolFull):
+            await pool.run("patient-3", work, 3)
+        release.set()
+        return await asyncio.gather(*same), await other
+
+    same_results, other_result = asyncio.run(scenario())
+    assert same_results == [42] * 5
+    assert other_result == 2
+    assert sorted(calls) == [1, 21]
+    assert pool.pending == 0
+    pool.shutdown()
+
+def test_sql_prediction_store_round_trip():
+    from app.prediction_store import SQLPredictionStore
+    from tests.conftest import TestingSessionLocal
+
+    store = SQLPredictionStore(TestingSessionLocal)
+    result = {"risk_score": 0.25, "feature_contributions": {"stress_level": 0.1}}
+    store.put("abc", result, 3, "v1.0")
+
+    assert store.get("abc", ttl_seconds=60) == (result, 3)
+    assert store.get("abc", ttl_seconds=-1) is None  # expired rows are dropped
+    store.put("abc", result, 3, "v1.0")
+    store.delete_patient(3)
+    assert store.get("abc", ttl_seconds=60) is None
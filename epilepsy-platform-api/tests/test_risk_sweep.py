@@ -0,0 +1,151 @@
+# tests/test_risk_sweep.py
+
+import json
+from datetime import date, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from app import feature_store, risk_sweep
+from app.database import Base, create_db_engine
+from app.ml import get_inference_module
+from app.models.observation import PatientFeatureVector
+from app.models.risk_score import PrecomputedRiskScore
+from tests.conftest import TestingSessionLocal
+
+SWEEP_DATE = date(2025, 3, 1)
+
+@pytest.fixture
+def database_url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'sweep.db'}"
+    engine = create_db_engine(url)
+    Base.metadata.create_all(bind=engine)
+
+    # 30 patients with 10 days each, and 2 with too little history to score
+    rows = []
+    for patient_id in range(1, 33):
+        days = 10 if patient_id <= 30 else 5
+        for i in range(days):
+            rows.append({
+                "patient_id": patient_id,
+                "date": date(2025, 1, 1) + timedelta(days=i),
+                "hours_of_sleep": 5 + (patient_id + i) % 4,
+                "stress_level": 1 + (patient_id * i) % 5,
+                "medication_taken": (patient_id + i) % 2,
+                "eeg_feature_1": 90.0 + patient_id + 3 * i,
+                "mri_lesion_present": patient_id % 2,
+            })
+    with sessionmaker(bind=engine)() as db:
+        feature_store.add_observations(db, rows)
+        db.commit()
+    engine.dispose()
+    return url
+
+def _stored(url):
+    engine = create_db_engine(url)
+    with sessionmaker(bind=engine)() as db:
+        scores = {row.patient_id: row for row in db.query(PrecomputedRiskScore).all()}
+    engine.dispose()
+    return scores
+
+def test_sweep_scores_every_patient(database_url):
+    messages = []
+    stats = risk_sweep.run(database_url, sweep_date=SWEEP_DATE, chunk_size=8, top_k=3, log=messages.append)
+
+    assert stats["patients_scored"] == 30
+    assert stats["chunks"] == 4
+    assert stats["rows_per_second"] > 0
+    assert len(messages) == 4
+
+    scores = _stored(database_url)
+    assert sorted(scores) == list(range(1, 31))
+
+    # Same answer as scoring the patient's stored features directly
+    engine = create_db_engine(database_url)
+    with sessionmaker(bind=engine)() as db:
+        features = feature_store.feature_dict(db, feature_store.get_features(db, 7), "v1.0")
+    engine.dispose()
+    expected = get_inference_module().predict_features(features, explain="top_k", top_k=3)
+    assert scores[7].score == expected["risk_score"]
+    assert json.loads(scores[7].contributions) == expected["feature_contributions"]
+    assert scores[7].features_as_of == date(2025, 1, 10)
+
+def test_sweep_resumes_after_interruption(database_url):
+    # A crash after the first chunk committed
+    engine = create_db_engine(database_url)
+    with sessionmaker(bind=engine)() as db:
+        first_id, last_id = next(risk_sweep.iter_chunks(db, SWEEP_DATE, "v1.0", chunk_size=8))
+    engine.dispose()
+    assert risk_sweep.score_chunk(database_url, first_id, last_id, SWEEP_DATE, "v1.0") == (8, 0)
+
+    stats = risk_sweep.run(database_url, sweep_date=SWEEP_DATE, model_version="v1.0", chunk_size=8, log=lambda _: None)
+    assert stats["patients_scored"] == 22
+    assert len(_stored(database_url)) == 30
+
+    # Nothing left to do
+    stats = risk_sweep.run(database_url, sweep_date=SWEEP_DATE, model_version="v1.0", log=lambda _: None)
+    assert stats["patients_scored"] == 0
+
+def test_sweep_with_worker_processes(database_url):
+    stats = risk_sweep.run(database_url, sweep_date=SWEEP_DATE, workers=2, chunk_size=10, top_k=0, log=lambda _: None)
+
+    assert stats["patients_scored"] == 30
+    scores = _stored(database_url)
+    assert len(scores) == 30
+    assert all(json.loads(score.contributions) == {} for score in scores.values())
+
+def test_sweep_refuses_unstored_version(database_url, monkeypatch, capsys):
+    monkeypatch.setattr(feature_store, "FEATURE_STORE_MODEL_VERSIONS", ["v2.0"])
+    with pytest.raises(feature_store.FeaturesUnavailable, match="Cannot sweep model v1.0"):
+        risk_sweep.run(database_url, sweep_date=SWEEP_DATE, model_version="v1.0", log=lambda _: None)
+    assert _stored(database_url) == {}
+
+    assert risk_sweep.main(["--database-url", database_url, "--model-version", "v1.0", "--quiet"]) == 1
+    assert "not stored" in capsys.readouterr().err
+
+def test_sweep_skips_outdated_features(database_url):
+    # Patient 3's v1.0 vector was written with another spec, and too few raw days are kept to rebuild it
+    engine = create_db_engine(database_url)
+    with sessionmaker(bind=engine)() as db:
+        db.query(PatientFeatureVector).filter_by(patient_id=3, model_version="v1.0").update({"spec_digest": "replaced"})
+        features = feature_store.get_features(db, 3)
+        features.window = json.dumps(json.loads(features.window)[-2:])
+        db.commit()
+    engine.dispose()
+
+    stats = risk_sweep.run(database_url, sweep_date=SWEEP_DATE, model_version="v1.0", log=lambda _: None)
+    assert (stats["patients_scored"], stats["patients_skipped"]) == (29, 1)
+    assert 3 not in _stored(database_url)
+
+def test_read_top_risk_scores(authenticated_client: TestClient):
+    with TestingSessionLocal() as db:
+        db.add_all([
+            PrecomputedRiskScore(date=day, model_version="v1.0", patient_id=patient_id, score=score,
+                                 contributions=json.dumps({"stress_level": 0.1}), features_as_of=day)
+            for day, patient_id, score in [
+                (date(2025, 2, 1), 1, 0.9),
+                (date(2025, 2, 2), 1, 0.2),
+                (date(2025, 2, 2), 2, 0.7),
+                (date(2025, 2, 2), 3, 0.5),
+            ]
+        ])
+        db.commit()
+
+    latest = authenticated_client.get("/risk-scores/?limit=2").json()
+    assert [(s["patient_id"], s["risk_score"]) for s in latest] == [(2, 0.7), (3, 0.5)]
+    assert latest[0]["feature_contributions"] == {"stress_level": 0.1}
+
+    earlier = authenticated_client.get("/risk-scores/?date=2025-02-01").json()
+    assert [s["patient_id"] for s in earlier] == [1]
+    assert authenticated_client.get("/risk-scores/?model_version=v9").json() == []
+
+def test_deleted_patient_leaves_risk_scores(authenticated_client: TestClient, patient_id: int):
+    with TestingSessionLocal() as db:
+        db.add(PrecomputedRiskScore(date=date(2025, 4, 1), model_version="v1.0", patient_id=patient_id, score=0.8,
+                                    contributions="{}", features_as_of=date(2025, 4, 1)))
+        db.commit()
+    assert [s["patient_id"] for s in authenticated_client.get("/risk-scores/?date=2025-04-01").json()] == [patient_id]
+
+    assert authenticated_client.delete(f"/patients/{patient_id}").status_code == 204
+    assert authenticated_client.get("/risk-scores/?date=2025-04-01").json() == []
@@ -0,0 +1,48 @@
+# ml_workspace/benchmarks/bench_microbatch.py
+"""
+Throughput of per-call `predict` versus the `MicroBatcher` under concurrency.
+
+Usage:
+    python -m ml_workspace.benchmarks.bench_microbatch --requests 2000
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ml_workspace.src import inference
+from ml_workspace.src.batching import MicroBatcher
+
+from .synthetic import make_histories
+
+CONCURRENCY_LEVELS = [1, 8, 64, 256]
+
+def measure(fn, histories, concurrency):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as callers:
+        list(callers.map(fn, histories))
+    return len(histories) / (time.perf_counter() - started)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    parser.add_argument('--max-delay-ms', type=float, default=2.0)
+    args = parser.parse_args(argv)
+
+    histories = make_histories(args.requests)
+    inference.predict(histories[0])  # load artifacts outside the timed region
+
+    print(f"{'callers':>8} {'per-call req/s':>15} {'batched req/s':>14} {'speedup':>8} {'mean batch':>11}")
+    for concurrency in CONCURRENCY_LEVELS:
+        per_call = measure(inference.predict, histories, concurrency)
+
+        batcher = MicroBatcher(max_batch_size=args.max_batch_size, max_delay_ms=args.max_delay_ms)
+        batched = measure(batcher.predict, histories, concurrency)
+        mean_batch = batcher.metrics()['mean_batch_size']
+        batcher.close()
+
+        print(f"{concurrency:>8} {per_call:>15.0f} {batched:>14.0f} {batched / per_call:>7.1f}x {mean_batch:>11.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,314 @@
+# ml_workspace/benchmarks/suite.py
+"""
+End-to-end benchmarks of the ML and API hot paths.
+
+Usage:
+    python -m ml_workspace.benchmarks.suite run --scale quick --output bench.json
+    python -m ml_workspace.benchmarks.suite run --baseline baseline.json
+    python -m ml_workspace.benchmarks.suite compare bench.json baseline.json --threshold 0.2
+
+`run` times every case at the chosen scale and writes the results as JSON;
+with `--baseline` it then compares them like `compare` does. `compare`
+exits with status 1 if any case's median time grew by more than
+`--threshold` (a fraction) over the baseline.
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from ml_workspace.src import inference
+from ml_workspace.src.eeg_features import calculate_band_power, calculate_band_powers, detect_spikes_multichannel
+
+from .synthetic import make_eeg, make_histories
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+API_DIR = REPO_ROOT / 'epilepsy-platform-api'
+
+# Sizes each case is run at
+SCALES = {
+    'quick': {
+        'days': [8, 365],
+        'channels': [1, 23],
+        'patients': [1, 100],
+        'clients': [1, 8],
+        'api_requests': 50,
+        'eeg_seconds': 60,
+    },
+    'full': {
+        'days': [8, 90, 365, 1825],
+        'channels': [1, 8, 23],
+        'patients': [1, 100, 1000, 10_000],
+        'clients': [1, 8, 32],
+        'api_requests': 500,
+        'eeg_seconds': 600,
+    },
+}
+
+SF = 256
+
+# --- Timing ---
+
+def time_case(fn, min_time=0.5, min_repeats=3, max_repeats=50):
+    """Calls `fn` once to warm up, then repeatedly until `min_time` has been spent."""
+    fn()
+    times = []
+    while len(times) < max_repeats and (len(times) < min_repeats or sum(times) < min_time):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return times
+
+def case_key(name, params):
+    return name + ''.join(f'[{k}={v}]' for k, v in params.items())
+
+def summarize(name, params, items, times):
+    median = statistics.median(times)
+    return {
+        'key': case_key(name, params),
+        'name': name,
+        'params': params,
+        'items': items,
+        'repeats': len(times),
+        'min_s': min(times),
+        'median_s': median,
+        'mean_s': statistics.fmean(times),
+        'stdev_s': statistics.stdev(times) if len(times) > 1 else 0.0,
+        'items_per_s': items / median if median > 0 else float('inf'),
+    }
+
+# --- Cases ---
+# Each generator yields (name, params, items processed per call, callable)
+
+def ml_cases(scale):
+    for days in scale['days']:
+        history = make_histories(1, days=days, seed=days)[0]
+        frame = pd.DataFrame(history)
+        yield 'create_features', {'days': days}, days, lambda frame=frame: inference.create_features(frame)
+        yield 'predict', {'days': days}, 1, lambda history=history: inference.predict(history)
+        yield 'predict_pandas', {'days': days}, 1, lambda history=history: inference.predict(history, use_pandas=True)
+
+    for patients in scale['patients']:
+        histories = make_histories(patients, days=8, seed=patients)
+        grouped = pd.DataFrame([row for history in histories for row in history])
+        yield ('create_features_grouped', {'patients': patients}, patients,
+               lambda grouped=grouped: inference.create_features(grouped, by='patient_id'))
+        yield ('predict_batch', {'patients': patients}, patients,
+               lambda histories=histories: inference.predict_batch(histories))
+
+    for channels in scale['channels']:
+        signal = make_eeg(channels, scale['eeg_seconds'], SF, seed=channels)
+        yield ('calculate_band_power', {'channels': channels}, channels,
+               lambda signal=signal: calculate_band_power(signal, SF, (8, 13), window_sec=4, relative=True))
+        yield ('calculate_band_powers', {'channels': channels}, channels,
+               lambda signal=signal: calculate_band_powers(signal, SF, window_sec=4))
+        yield ('detect_spikes_multichannel', {'channels': channels}, channels,
+               lambda signal=signal: detect_spikes_multichannel(signal, SF, prominence=0.7, width=2))
+
+def _api_client():
+    """An authenticated in-process client backed by a private SQLite file."""
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+    os.environ.setdefault('ACCESS_TOKEN_EXPIRE_MINUTES', '30')
+    os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+    if str(API_DIR) not in sys.path:
+        sys.path.insert(0, str(API_DIR))
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy.orm import sessionmaker
+
+    from app.database import Base, create_db_engine
+    from app.dependencies import get_db
+    from app.main import app
+
+    # A real file so concurrent clients get their own pooled connections, as in production
+    db_path = Path(tempfile.mkdtemp(prefix='epilepsy-bench-')) / 'bench.db'
+    engine = create_db_engine(f'sqlite:///{db_path}')
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(app)
+    client.post('/clinicians/', json={'email': 'bench@example.com', 'password': 'benchmark-password'})
+    token = client.post('/token', data={
+        'username': 'bench@example.com',
+        'password': 'benchmark-password',
+    }).json()['access_token']
+    client.headers['Authorization'] = f'Bearer {token}'
+    return client, session_factory
+
+def _concurrently(client, requests, clients):
+    def send(request):
+        method, url, body = request
+        response = client.request(method, url, json=body)
+        response.raise_for_status()
+    with ThreadPoolExecutor(max_workers=clients) as callers:
+        list(callers.map(send, requests))
+
+def api_cases(scale):
+    client, session_factory = _api_client()
+    from app.ml import get_prediction_cache
+    from app.models.patient import Patient
+
+    patient_id = client.post('/patients/', json={
+        'full_name': 'Benchmark Patient', 'date_of_birth': '1990-01-01', 'clinician_id': 1,
+    }).json()['id']
+
+    n_requests = scale['api_requests']
+    create = [('POST', '/patients/', {
+        'full_name': f'Created {i}', 'date_of_birth': '1990-01-01', 'clinician_id': 2,
+    }) for i in range(n_requests)]
+    histories = make_histories(n_requests, days=30)
+    risk = [('POST', f'/patients/{patient_id}/risk', {'history': history}) for history in histories]
+    for request in risk:
+        for day in request[2]['history']:
+            day['date'] = day['date'].date().isoformat()
+
+    def score(clients):
+        # Every round starts cold so the cache doesn't turn it into a lookup benchmark
+        get_prediction_cache().clear()
+        _concurrently(client, risk, clients)
+
+    for clients in scale['clients']:
+        yield 'api_create_patient', {'clients': clients}, n_requests, lambda c=clients: _concurrently(client, create, c)
+        yield 'api_risk', {'clients': clients}, n_requests, lambda c=clients: score(c)
+
+    total = 0
+    for patients in scale['patients']:
+        # Grow the table to the target size directly; listing cost is what's measured
+        with session_factory() as db:
+            db.bulk_insert_mappings(Patient, [
+                {'full_name': f'Listed {i}', 'date_of_birth': datetime(1980, 1, 1).date(), 'clinician_id': 3}
+                for i in range(total, patients)
+            ])
+            db.commit()
+        total = max(total, patients)
+        pages = [('GET', '/patients/?clinician_id=3&limit=100', None)] * 20
+        yield 'api_list_patients', {'patients': patients}, len(pages), lambda pages=pages: _concurrently(client, pages, 1)
+
+CASE_GROUPS = {'ml': ml_cases, 'api': api_cases}
+
+def run(scale='quick', groups=('ml', 'api'), only=None, min_time=0.5, log=print):
+    """
+    Runs the benchmark cases of `groups` at `scale`.
+
+    Args:
+        only: Optional glob matched against case keys, e.g. 'predict*'.
+
+    Returns:
+        A JSON-serializable report: run metadata plus one summary per case.
+    """
+    settings = SCALES[scale]
+    results = []
+    for group in groups:
+        for name, params, items, fn in CASE_GROUPS[group](settings):
+            key = case_key(name, params)
+            if only and not fnmatch.fnmatch(key, only):
+                continue
+            result = summarize(name, params, items, time_case(fn, min_time=min_time))
+            results.append(result)
+            log(f"{key:<50} {result['median_s'] * 1e3:>10.3f} ms {result['items_per_s']:>12,.1f} items/s")
+    return {
+        'meta': {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'scale': scale,
+            'groups': list(groups),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'results': results,
+    }
+
+def compare(current, baseline, threshold=0.2):
+    """
+    Compares median times case by case.
+
+    Returns:
+        One row per case present in both reports with the time ratio
+        (current / baseline) and whether it exceeds `1 + threshold`.
+    """
+    previous = {result['key']: result for result in baseline['results']}
+    rows = []
+    for result in current['results']:
+        before = previous.get(result['key'])
+        if before is None or before['median_s'] <= 0:
+            continue
+        ratio = result['median_s'] / before['median_s']
+        rows.append({
+            'key': result['key'],
+            'baseline_s': before['median_s'],
+            'current_s': result['median_s'],
+            'ratio': ratio,
+            'regression': ratio > 1 + threshold,
+        })
+    return rows
+
+def print_comparison(rows, threshold):
+    print(f"{'case':<50} {'baseline ms':>12} {'current ms':>12} {'ratio':>7}")
+    for row in rows:
+        flag = '  REGRESSION' if row['regression'] else ''
+        print(f"{row['key']:<50} {row['baseline_s'] * 1e3:>12.3f} {row['current_s'] * 1e3:>12.3f} {row['ratio']:>6.2f}x{flag}")
+    regressions = sum(row['regression'] for row in rows)
+    print(f"{regressions} of {len(rows)} cases slower than {1 + threshold:.2f}x baseline")
+    return regressions
+
+def _load(path):
+    with open(path) as f:
+        return json.load(f)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the ML and API hot paths.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="Run the benchmarks")
+    run_parser.add_argument('--scale', choices=sorted(SCALES), default='quick')
+    run_parser.add_argument('--group', choices=sorted(CASE_GROUPS), action='append',
+                            help="Case group to run (repeatable; default: all)")
+    run_parser.add_argument('--only', help="Glob on case keys, e.g. 'predict*'")
+    run_parser.add_argument('--min-time', type=float, default=0.5, help="Seconds to spend timing each case")
+    run_parser.add_argument('--output', help="Write the JSON report here")
+    run_parser.add_argument('--baseline', help="Compare against this JSON report")
+    run_parser.add_argument('--threshold', type=float, default=0.2)
+
+    compare_parser = commands.add_parser('compare', help="Compare two JSON reports")
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('--threshold', type=float, default=0.2)
+
+    args = parser.parse_args(argv)
+    if args.command == 'compare':
+        rows = compare(_load(args.current), _load(args.baseline), args.threshold)
+        return 1 if print_comparison(rows, args.threshold) else 0
+
+    report = run(args.scale, groups=args.group or list(CASE_GROUPS), only=args.only, min_time=args.min_time)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        rows = compare(report, _load(args.baseline), args.threshold)
+        return 1 if print_comparison(rows, args.threshold) else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
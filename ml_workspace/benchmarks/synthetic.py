@@ -0,0 +1,40 @@
+# ml_workspace/benchmarks/synthetic.py
+"""
+Synthetic inputs for the benchmarks: patient histories and EEG signals.
+"""
+
+import numpy as np
+import pandas as pd
+
+from ml_workspace.src.eeg_features import BANDS
+
+def make_histories(n, days=8, seed=0):
+    """`n` patient histories of `days` daily records, in the format `predict` takes."""
+    rng = np.random.default_rng(seed)
+    histories = []
+    for patient_id in range(n):
+        histories.append(pd.DataFrame({
+            'date': pd.date_range('2025-01-01', periods=days, freq='D'),
+            'patient_id': patient_id,
+            'hours_of_sleep': np.round(rng.uniform(3, 10, days), 1),
+            'stress_level': rng.integers(1, 6, days),
+            'medication_taken': rng.integers(0, 2, days),
+            'eeg_feature_1': np.round(rng.uniform(60, 180, days), 2),
+            'mri_lesion_present': 1,
+        }).to_dict('records'))
+    return histories
+
+def make_eeg(n_channels, seconds, sf=256, seed=0):
+    """
+    Band-limited noise with occasional spikes, shaped (channels x samples), in volts.
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sf)) / sf
+    signal = rng.normal(0, 5e-6, (n_channels, len(t)))
+    for low, high in BANDS.values():
+        freq = rng.uniform(low, high, (n_channels, 1))
+        signal += rng.uniform(2e-6, 10e-6, (n_channels, 1)) * np.sin(2 * np.pi * freq * t)
+    # Roughly one spike every ten seconds per channel
+    spikes = rng.random(signal.shape) < 1 / (10 * sf)
+    signal[spikes] += 80e-6
+    return signal
@@ -0,0 +1,175 @@
+# ml_workspace/src/batching.py
+
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future, InvalidStateError
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from . import inference
+
+class MicroBatcher:
+    """
+    Aggregates concurrent `predict` calls into batched model calls.
+
+    Callers submit single patient histories from any thread. A background
+    worker takes the first waiting request, keeps collecting for up to
+    `max_delay_ms` or until `max_batch_size` requests have arrived, builds
+    each request's feature row, and scores every row that asks for the same
+    model version and explain mode with one `inference.score_rows` call.
+    Each caller's future then receives its own row of results.
+    """
+
+    def __init__(self, max_batch_size: int = 64, max_delay_ms: float = 2.0):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1.")
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay_ms / 1000.0
+
+        self._queue = queue.Queue()
+        self._metrics_lock = threading.Lock()
+        self._batches = 0
+        self._requests = 0
+        self._max_batch_seen = 0
+        self._batch_size_counts = defaultdict(int)
+
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name="inference-microbatcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, patient_history: List[Dict[str, Any]], model_version: Optional[str] = None,
+               explain: str = 'full', top_k: int = inference.DEFAULT_TOP_K) -> Future:
+        """Queues one prediction and returns a future for its result."""
+        future = Future()
+        # Nothing is queued after the stop marker, where it would never be served
+        with self._close_lock:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed.")
+            self._queue.put((patient_history, (model_version, explain, top_k), future))
+        return future
+
+    def predict(self, patient_history: List[Dict[str, Any]], model_version: Optional[str] = None,
+                explain: str = 'full', top_k: int = inference.DEFAULT_TOP_K) -> Dict[str, Any]:
+        """Blocking equivalent of `inference.predict`, served from a batch."""
+        return self.submit(patient_history, model_version, explain, top_k).result()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Current queue depth and batch-size statistics."""
+        with self._metrics_lock:
+            return {
+                'queue_depth': self._queue.qsize(),
+                'batches': self._batches,
+                'requests': self._requests,
+                'mean_batch_size': self._requests / self._batches if self._batches else 0.0,
+                'max_batch_size': self._max_batch_seen,
+                'batch_size_counts': dict(self._batch_size_counts),
+            }
+
+    def close(self):
+        """Stops the worker once already queued requests are served."""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._worker.join()
+
+        # Fail anything left behind, e.g. if the worker stopped on an unexpected error
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                _fail([item[2]], RuntimeError("MicroBatcher is closed."))
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # Put the stop marker back so the loop ends after this batch
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            with self._metrics_lock:
+                self._batches += 1
+                self._requests += len(batch)
+                self._max_batch_seen = max(self._max_batch_seen, len(batch))
+                self._batch_size_counts[len(batch)] += 1
+
+            # Rows can only share a model call if they want the same model and output
+            by_options = defaultdict(list)
+            for item in batch:
+                by_options[item[1]].append(item)
+            for options, items in by_options.items():
+                try:
+                    self._score(*options, items)
+                except Exception as e:
+                    # One bad batch must not stop the worker, or every later caller would wait forever
+                    _fail((future for _, _, future in items), e)
+
+    def _score(self, model_version, explain, top_k, items):
+        # Requests their callers cancelled are dropped; the rest can no longer be cancelled
+        items = [item for item in items if item[2].set_running_or_notify_cancel()]
+        if not items:
+            return
+        try:
+            plan = inference.feature_plan_for(inference.registry.get(model_version))
+        except Exception as e:
+            _fail((future for _, _, future in items), e)
+            return
+
+        # Requests with bad input fail on their own without sinking the batch
+        X = np.empty((len(items), len(plan)), dtype=np.float32)
+        futures = []
+        for patient_history, _, future in items:
+            try:
+                if len(patient_history) < inference.MIN_HISTORY_DAYS:
+                    raise ValueError("Insufficient data. At least 8 days of history are required to generate features.")
+                plan.fill(patient_history, X[len(futures)])
+                futures.append(future)
+            except Exception as e:
+                future.set_exception(e)
+        if not futures:
+            return
+
+        try:
+            results = inference.score_rows(
+                X[:len(futures)], model_version=model_version, explain=explain, top_k=top_k
+            )
+        except Exception as e:
+            _fail(futures, e)
+            return
+        for future, result in zip(futures, results):
+            future.set_result(result)
+
+def _fail(futures: Iterable[Future], error: BaseException):
+    """Sets `error` on every future that isn't cancelled or already resolved."""
+    for future in futures:
+        if future.done():
+            continue
+        try:
+            future.set_exception(error)
+        except InvalidStateError:
+            # Cancelled by its caller in the meantime
+            pass
@@ -0,0 +1,355 @@
+# ml_workspace/src/compiled_model.py
+"""
+Array-backed tree ensembles for scoring without importing xgboost.
+
+Usage:
+    python -m ml_workspace.src.compiled_model ml_workspace/models
+
+`export_model` reads an XGBoost JSON model (`xgb_model_<version>.json`) as
+plain JSON and flattens every tree into a handful of NumPy arrays, saved
+next to it as `compiled_model_<version>.npz`. `CompiledModel` evaluates
+those arrays for a whole batch at once and matches `Booster.predict`
+to within float32 rounding. With node covers in the archive it also
+computes XGBoost's TreeSHAP contributions (`pred_contribs=True`).
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+# Objective -> transform from margin to prediction
+OBJECTIVE_TRANSFORMS = {
+    'reg:squarederror': 'identity',
+    'reg:absoluteerror': 'identity',
+    'reg:pseudohubererror': 'identity',
+    'binary:logitraw': 'identity',
+    'reg:logistic': 'logistic',
+    'binary:logistic': 'logistic',
+}
+
+# Rows evaluated per block; bounds the (rows x trees) index arrays
+BLOCK_ROWS = 4096
+# Bounds the (rows x leaves x path length) arrays of a contributions block
+CONTRIBUTION_BLOCK_CELLS = 1 << 21
+
+def compiled_path_for(model_path) -> str:
+    """`.../xgb_model_v1.0.json` -> `.../compiled_model_v1.0.npz`"""
+    model_path = Path(model_path)
+    version = model_path.stem[len('xgb_model_'):] if model_path.stem.startswith('xgb_model_') else model_path.stem
+    return str(model_path.with_name(f'compiled_model_{version}.npz'))
+
+def source_digest(model_path) -> str:
+    with open(model_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def _base_margin(base_score: float, transform: str) -> float:
+    if transform == 'logistic':
+        return float(np.log(base_score / (1.0 - base_score)))
+    return base_score
+
+def compile_model(model_path) -> dict:
+    """
+    Flatten an XGBoost JSON model into arrays.
+
+    Nodes of all trees share one set of arrays. Leaves point to themselves
+    as both children, so walking every tree a fixed `max_depth` steps lands
+    each row on its leaf without per-tree bookkeeping.
+
+    Returns:
+        A dictionary of arrays, as stored by `export_model`.
+    """
+    with open(model_path) as f:
+        learner = json.load(f)['learner']
+
+    objective = learner['objective']['name']
+    if objective not in OBJECTIVE_TRANSFORMS:
+        raise ValueError(f"Unsupported objective '{objective}' in {model_path}.")
+    booster = learner['gradient_booster']
+    if booster['name'] != 'gbtree':
+        raise ValueError(f"Only gbtree models can be compiled, got '{booster['name']}'.")
+    params = learner['learner_model_param']
+    if int(params.get('num_class', 0)) > 1 or int(params.get('num_target', 1)) > 1:
+        raise ValueError("Only single-output models can be compiled.")
+
+    feature, threshold, left, right, default_left, cover, roots = [], [], [], [], [], [], []
+    depths = []
+    offset = 0
+    for tree in booster['model']['trees']:
+        if any(tree.get('split_type', [])):
+            raise ValueError("Categorical splits are not supported.")
+        lefts = np.asarray(tree['left_children'], dtype=np.int64)
+        rights = np.asarray(tree['right_children'], dtype=np.int64)
+        n_nodes = len(lefts)
+        is_leaf = lefts == -1
+        own = np.arange(n_nodes)
+
+        roots.append(offset)
+        feature.append(np.where(is_leaf, 0, tree['split_indices']))
+        # Leaves keep their value in split_conditions
+        threshold.append(tree['split_conditions'])
+        left.append(np.where(is_leaf, own, lefts) + offset)
+        right.append(np.where(is_leaf, own, rights) + offset)
+        default_left.append(tree['default_left'])
+        cover.append(tree['sum_hessian'])
+
+        # Depth of the deepest leaf; parents always precede children
+        depth = np.zeros(n_nodes, dtype=np.int64)
+        for node in range(n_nodes):
+            if not is_leaf[node]:
+                depth[lefts[node]] = depth[rights[node]] = depth[node] + 1
+        depths.append(int(depth.max()))
+        offset += n_nodes
+
+    transform = OBJECTIVE_TRANSFORMS[objective]
+    base_score = float(params['base_score'].strip('[]'))
+    return {
+        'feature': np.concatenate(feature).astype(np.int32),
+        'threshold': np.concatenate(threshold).astype(np.float32),
+        'left': np.concatenate(left).astype(np.int32),
+        'right': np.concatenate(right).astype(np.int32),
+        'default_left': np.concatenate(default_left).astype(bool),
+        'cover': np.concatenate(cover).astype(np.float64),
+        'roots': np.asarray(roots, dtype=np.int32),
+        'max_depth': np.int32(max(depths, default=0)),
+        'base_margin': np.float64(_base_margin(base_score, transform)),
+        'transform': np.str_(transform),
+        'feature_names': np.asarray(learner.get('feature_names') or [], dtype=str),
+        'source_sha256': np.str_(source_digest(model_path)),
+    }
+
+def export_model(model_path, output_path=None) -> str:
+    """
+    Compile `model_path` and save it as an `.npz` archive.
+
+    Returns:
+        The path written, `compiled_model_<version>.npz` next to the model by default.
+    """
+    output_path = output_path or compiled_path_for(model_path)
+    arrays = compile_model(model_path)
+    tmp_path = f"{output_path}.tmp.npz"
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, output_path)
+    return output_path
+
+class CompiledModel:
+    """
+    A tree ensemble evaluated with NumPy.
+
+    Splits follow XGBoost's rules: features are compared as float32, a row
+    goes left when `value < threshold`, and missing (NaN) values follow each
+    node's default direction.
+    """
+
+    def __init__(self, arrays):
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.left = arrays['left']
+        self.right = arrays['right']
+        self.default_left = arrays['default_left']
+        self.roots = arrays['roots']
+        self.max_depth = int(arrays['max_depth'])
+        self.base_margin = float(arrays['base_margin'])
+        self.transform = str(arrays['transform'])
+        self.feature_names: List[str] = [str(name) for name in arrays['feature_names']] or None
+        self.source_sha256 = str(arrays['source_sha256'])
+        # Archives exported before covers were stored can score but not explain
+        self.cover = arrays['cover'] if 'cover' in arrays else None
+        self._paths = None
+
+    @classmethod
+    def load(cls, path) -> 'CompiledModel':
+        with np.load(path, allow_pickle=False) as archive:
+            return cls({name: archive[name] for name in archive.files})
+
+    @classmethod
+    def from_json(cls, model_path) -> 'CompiledModel':
+        return cls(compile_model(model_path))
+
+    @property
+    def num_trees(self) -> int:
+        return len(self.roots)
+
+    def leaf_indices(self, X) -> np.ndarray:
+        """Global node index of the leaf each row reaches in each tree, shape (rows, trees)."""
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))[:, np.newaxis]
+        node = np.broadcast_to(self.roots, (len(X), self.num_trees))
+        for _ in range(self.max_depth):
+            values = X[rows, self.feature[node]]
+            go_left = np.where(np.isnan(values), self.default_left[node], values < self.threshold[node])
+            node = np.where(go_left, self.left[node], self.right[node])
+        return node
+
+    def predict_margin(self, X) -> np.ndarray:
+        """Untransformed scores (log-odds for logistic objectives)."""
+        X = np.atleast_2d(np.asarray(X, dtype=np.float32))
+        margin = np.empty(len(X))
+        for start in range(0, len(X), BLOCK_ROWS):
+            leaves = self.leaf_indices(X[start:start + BLOCK_ROWS])
+            margin[start:start + BLOCK_ROWS] = self.threshold[leaves].sum(axis=1, dtype=np.float64)
+        return margin + self.base_margin
+
+    def predict(self, X) -> np.ndarray:
+        """Scores in the same space as `Booster.predict`, as float32."""
+        margin = self.predict_margin(X)
+        if self.transform == 'logistic':
+            margin = 1.0 / (1.0 + np.exp(-margin))
+        return margin.astype(np.float32)
+
+    @property
+    def can_explain(self) -> bool:
+        return self.cover is not None
+
+    def _leaf_paths(self) -> dict:
+        """
+        Every root-to-leaf path as padded arrays, built on first use.
+
+        Splits on a feature already seen on the path are merged into that
+        feature's slot, as TreeSHAP does, so each slot is one unique feature.
+        """
+        if self._paths is not None:
+            return self._paths
+        n_nodes = len(self.left)
+        is_leaf = self.left == np.arange(n_nodes)
+
+        leaves = []
+        for root in self.roots:
+            # (node, [(split node, went left, cover fraction)])
+            stack = [(int(root), [])]
+            while stack:
+                node, path = stack.pop()
+                if is_leaf[node]:
+                    if path:
+                        leaves.append((node, path))
+                    continue
+                for child, went_left in ((int(self.left[node]), True), (int(self.right[node]), False)):
+                    stack.append((child, path + [(node, went_left, self.cover[child] / self.cover[node])]))
+
+        n_edges = max((len(path) for _, path in leaves), default=1)
+        n_leaves = len(leaves)
+        edge_node = np.zeros((n_leaves, n_edges), dtype=np.int64)
+        edge_left = np.zeros((n_leaves, n_edges), dtype=bool)
+        # Arrays per slot are slot-major, so each slot is a contiguous (rows x leaves) plane
+        slot_edges = np.zeros((n_edges, n_leaves, n_edges), dtype=bool)
+        slot_feature = np.zeros((n_edges, n_leaves), dtype=np.int64)
+        slot_zero = np.ones((n_edges, n_leaves))
+        slot_valid = np.zeros((n_edges, n_leaves), dtype=bool)
+        n_unique = np.zeros(n_leaves, dtype=np.int64)
+        for i, (_, path) in enumerate(leaves):
+            slots = {}
+            for e, (node, went_left, zero_fraction) in enumerate(path):
+                slot = slots.setdefault(int(self.feature[node]), len(slots))
+                edge_node[i, e], edge_left[i, e] = node, went_left
+                slot_edges[slot, i, e] = True
+                slot_feature[slot, i] = self.feature[node]
+                slot_zero[slot, i] *= zero_fraction
+                slot_valid[slot, i] = True
+            n_unique[i] = len(slots)
+
+        # Shapley weight of a coalition of s other features on a path of m: s! (m - s - 1)! / m!
+        s = np.arange(n_edges)[:, np.newaxis]
+        weights = np.where(
+            s < n_unique,
+            np.exp(_log_factorial(s) + _log_factorial(np.maximum(n_unique - s - 1, 0)) - _log_factorial(n_unique)),
+            0.0,
+        )
+        with np.errstate(divide='ignore'):
+            # A split no training row went through (zero cover) adds nothing
+            inverse_zero = np.where(slot_zero > 0, 1.0 / slot_zero, 0.0)
+
+        self._paths = {
+            'leaf_value': self.threshold[[node for node, _ in leaves]].astype(np.float64),
+            'edge_node': edge_node,
+            'edge_left': edge_left,
+            'slot_edges': slot_edges,
+            'slot_feature': slot_feature,
+            'slot_zero': slot_zero,
+            'inverse_zero': inverse_zero,
+            'slot_valid': slot_valid,
+            'weights': weights,
+        }
+        return self._paths
+
+    def contributions(self, X, n_features: int) -> np.ndarray:
+        """
+        Path-dependent TreeSHAP values, as `Booster.predict(pred_contribs=True)`
+        returns them without the trailing bias column.
+
+        For every leaf the Shapley sum over coalitions of the path's other
+        features is a polynomial in the number of features taken from the
+        row. Its coefficients are built once for all rows and leaves, and
+        each feature's factor is divided back out to weight the rest.
+
+        Returns:
+            A float64 array of shape (rows, n_features).
+        """
+        if not self.can_explain:
+            raise ValueError("This archive has no node covers; re-export it to compute contributions.")
+        X = np.atleast_2d(np.asarray(X, dtype=np.float32))
+        paths = self._leaf_paths()
+        n_slots, n_leaves = paths['slot_zero'].shape
+        zero, inverse_zero, weights = paths['slot_zero'], paths['inverse_zero'], paths['weights']
+        # Sums each slot's (rows x leaves) contributions into its feature's column
+        to_features = np.zeros((n_slots, n_leaves, n_features))
+        to_features[np.arange(n_slots)[:, np.newaxis], np.arange(n_leaves), paths['slot_feature']] = (
+            paths['slot_valid'] * paths['leaf_value']
+        )
+
+        phi = np.zeros((len(X), n_features))
+        block_rows = max(1, CONTRIBUTION_BLOCK_CELLS // max(1, n_leaves * (n_slots + 1)))
+        for start in range(0, len(X), block_rows):
+            block = X[start:start + block_rows]
+
+            # Whether each row follows each split of each path
+            node = paths['edge_node']
+            values = block[:, self.feature[node]]
+            go_left = np.where(np.isnan(values), self.default_left[node], values < self.threshold[node])
+            follows = go_left == paths['edge_left']
+
+            # 1 where the row follows every split on the slot's feature, else 0
+            one = np.empty((n_slots, len(block), n_leaves))
+            for i in range(n_slots):
+                one[i] = np.all(follows | ~paths['slot_edges'][i], axis=2) & paths['slot_valid'][i]
+
+            # Coefficients of prod over slots j of (zero_j + one_j * t)
+            full = np.zeros((n_slots + 1, len(block), n_leaves))
+            full[0] = 1.0
+            for j in range(n_slots):
+                full[1:] = full[1:] * zero[j] + full[:-1] * one[j]
+                full[0] *= zero[j]
+
+            for i in range(n_slots):
+                # Divide slot i's factor back out: by t + zero_i where the row follows it, else by zero_i
+                followed = one[i] > 0
+                total = np.zeros((len(block), n_leaves))
+                quotient = full[n_slots]
+                for k in range(n_slots - 1, -1, -1):
+                    total += np.where(followed, quotient, full[k] * inverse_zero[i]) * weights[k]
+                    quotient = full[k] - zero[i] * quotient
+                phi[start:start + len(block)] += (total * (one[i] - zero[i])) @ to_features[i]
+        return phi
+
+def _log_factorial(n) -> np.ndarray:
+    n = np.asarray(n)
+    table = np.concatenate([[0.0], np.cumsum(np.log(np.arange(1, int(n.max(initial=0)) + 1)))])
+    return table[n]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile XGBoost JSON models into NumPy archives.")
+    parser.add_argument('paths', nargs='+', help="xgb_model_<version>.json files or directories containing them")
+    args = parser.parse_args(argv)
+
+    for path in map(Path, args.paths):
+        models = sorted(path.glob('xgb_model_*.json')) if path.is_dir() else [path]
+        for model_path in models:
+            print(f"{model_path} -> {export_model(model_path)}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
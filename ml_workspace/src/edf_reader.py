@@ -0,0 +1,243 @@
+# ml_workspace/src/edf_reader.py
+
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .eeg_features import BANDS, calculate_band_powers, detect_spikes_multichannel, epoch_signal
+from .profiling import sampled
+
+# Physical dimensions we know how to convert to volts (what MNE returns)
+UNIT_SCALES = {'uV': 1e-6, 'µV': 1e-6, 'mV': 1e-3, 'V': 1.0}
+
+# Windows decoded per block when iterating a recording; bounds peak memory
+DEFAULT_BLOCK_WINDOWS = 16
+
+def _field(raw: bytes) -> str:
+    return raw.decode('latin-1').strip()
+
+class EDFRecording:
+    """
+    A memory-mapped EDF/EDF+ recording.
+
+    Only the header is parsed on open. The data records stay on disk behind
+    an `np.memmap` and int16 samples are decoded to floats for just the
+    channels and sample range that are asked for, so memory use depends on
+    the window size rather than on the length of the recording.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        with open(self.path, 'rb') as f:
+            header = f.read(256)
+            if len(header) < 256:
+                raise ValueError(f"{self.path} is too short to be an EDF file.")
+            self.header_bytes = int(_field(header[184:192]))
+            self.n_records = int(_field(header[236:244]))
+            self.record_duration = float(_field(header[244:252]))
+            n_signals = int(_field(header[252:256]))
+
+            signal_header = f.read(256 * n_signals)
+
+        self.start_datetime = self._parse_start(_field(header[168:176]), _field(header[176:184]))
+
+        def fields(offset, width):
+            start = offset * n_signals
+            return [
+                _field(signal_header[start + i * width:start + (i + 1) * width])
+                for i in range(n_signals)
+            ]
+
+        labels = fields(0, 16)
+        offset = 16 + 80
+        units = fields(offset, 8)
+        offset += 8
+        phys_min = np.array(fields(offset, 8), dtype=float)
+        offset += 8
+        phys_max = np.array(fields(offset, 8), dtype=float)
+        offset += 8
+        dig_min = np.array(fields(offset, 8), dtype=float)
+        offset += 8
+        dig_max = np.array(fields(offset, 8), dtype=float)
+        offset += 8 + 80
+        samples_per_record = np.array(fields(offset, 8), dtype=int)
+
+        if self.n_records < 0:
+            # Unknown record count (-1) is allowed while recording; infer it from the file size
+            data_bytes = os.path.getsize(self.path) - self.header_bytes
+            self.n_records = data_bytes // (2 * samples_per_record.sum())
+
+        self.labels = labels
+        self.units = units
+        self.samples_per_record = samples_per_record
+        self._record_offsets = np.concatenate(([0], np.cumsum(samples_per_record)))
+
+        # Digital -> physical: phys = dig * gain + offset
+        self._gain = (phys_max - phys_min) / (dig_max - dig_min)
+        self._offset = phys_min - dig_min * self._gain
+
+        self._data = np.memmap(
+            self.path,
+            dtype='<i2',
+            mode='r',
+            offset=self.header_bytes,
+            shape=(self.n_records, int(self._record_offsets[-1])),
+        )
+
+    @staticmethod
+    def _parse_start(date_str, time_str):
+        try:
+            return datetime.strptime(f"{date_str} {time_str}", "%d.%m.%y %H.%M.%S")
+        except ValueError:
+            return None
+
+    @property
+    def channel_names(self):
+        """EEG channel labels, excluding EDF+ annotation channels."""
+        return [label for label in self.labels if label != 'EDF Annotations']
+
+    def channel_index(self, channel):
+        if isinstance(channel, (int, np.integer)):
+            return int(channel)
+        try:
+            return self.labels.index(channel)
+        except ValueError:
+            raise KeyError(f"Channel '{channel}' not found in {self.path}.") from None
+
+    def sampling_frequency(self, channel=0):
+        return self.samples_per_record[self.channel_index(channel)] / self.record_duration
+
+    def n_samples(self, channel=0):
+        return int(self.samples_per_record[self.channel_index(channel)] * self.n_records)
+
+    def _resolve_channels(self, channels):
+        if channels is None:
+            channels = self.channel_names
+        indices = [self.channel_index(ch) for ch in channels]
+        spr = {int(self.samples_per_record[i]) for i in indices}
+        if len(spr) != 1:
+            raise ValueError("Selected channels do not share a sampling frequency.")
+        return indices, spr.pop()
+
+    def read(self, channels=None, start=0, stop=None, to_volts=True):
+        """
+        Decode samples `[start, stop)` of the given channels.
+
+        Only the data records overlapping that range are touched.
+
+        Returns:
+            A float array of shape (channels x samples).
+        """
+        indices, spr = self._resolve_channels(channels)
+        total = spr * self.n_records
+        stop = total if stop is None else min(stop, total)
+        if not 0 <= start <= stop:
+            raise ValueError(f"Invalid sample range [{start}, {stop}).")
+
+        first_record = start // spr
+        last_record = -(-stop // spr)
+        out = np.empty((len(indices), stop - start))
+        for row, i in enumerate(indices):
+            columns = slice(self._record_offsets[i], self._record_offsets[i + 1])
+            samples = self._data[first_record:last_record, columns].reshape(-1)
+            samples = samples[start - first_record * spr:stop - first_record * spr]
+            scale = UNIT_SCALES.get(self.units[i], 1.0) if to_volts else 1.0
+            np.multiply(samples, self._gain[i] * scale, out=out[row])
+            out[row] += self._offset[i] * scale
+        return out
+
+    def iter_windows(self, window_sec, hop_sec=None, channels=None,
+                     block_windows=DEFAULT_BLOCK_WINDOWS, to_volts=True):
+        """
+        Yield `(start_times, epochs)` for consecutive blocks of windows.
+
+        Each block decodes at most `block_windows` windows' worth of samples
+        and epochs them with `epoch_signal`, so peak memory stays constant
+        regardless of recording length. A trailing partial window is dropped.
+        """
+        indices, spr = self._resolve_channels(channels)
+        sf = spr / self.record_duration
+        window_samples = int(window_sec * sf)
+        hop_samples = window_samples if hop_sec is None else int(hop_sec * sf)
+        total = spr * self.n_records
+        if total < window_samples:
+            return
+        n_windows = (total - window_samples) // hop_samples + 1
+
+        for first in range(0, n_windows, block_windows):
+            last = min(first + block_windows, n_windows)
+            start = first * hop_samples
+            stop = (last - 1) * hop_samples + window_samples
+            block = self.read(indices, start, stop, to_volts=to_volts)
+            epochs, start_times = epoch_signal(block, sf, window_sec, hop_sec)
+            yield start_times + start / sf, epochs
+
+@sampled('extract_recording_features')
+def extract_recording_features(path, window_sec=60, hop_sec=None, channels=None, bands=None,
+                               prominence=0.7, width=2, block_windows=DEFAULT_BLOCK_WINDOWS):
+    """
+    Compute per-window features for one EDF recording without preloading it.
+
+    `path` may also be an already opened `EDFRecording`.
+
+    Returns:
+        A long-format DataFrame with one row per (window, channel):
+        `window_start_time`, `channel`, `rel_power_<band>` and `spike_count`.
+    """
+    if bands is None:
+        bands = BANDS
+    recording = path if isinstance(path, EDFRecording) else EDFRecording(path)
+    if channels is None:
+        channels = recording.channel_names
+    sf = recording.sampling_frequency(channels[0])
+
+    frames = []
+    for start_times, epochs in recording.iter_windows(window_sec, hop_sec, channels, block_windows):
+        rel_powers = calculate_band_powers(epochs, sf, bands)[..., 1]
+        spike_counts, _ = detect_spikes_multichannel(epochs, sf, prominence=prominence, width=width)
+
+        block = {
+            'window_start_time': np.repeat(start_times, len(channels)),
+            'channel': np.tile(channels, len(start_times)),
+        }
+        for i, band_name in enumerate(bands):
+            block[f'rel_power_{band_name}'] = rel_powers[..., i].ravel()
+        block['spike_count'] = spike_counts.ravel()
+        frames.append(pd.DataFrame(block))
+
+    if not frames:
+        columns = ['window_start_time', 'channel'] + [f'rel_power_{b}' for b in bands] + ['spike_count']
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True)
+
+def summarize_features(features_df: pd.DataFrame, patient_id, date) -> pd.DataFrame:
+    """
+    Aggregate per-window features into the one-row daily summary layout of
+    `data/processed/*_eeg_features.csv` (band power mean/std, spike count sum).
+    """
+    aggregations = {}
+    for col in features_df.columns:
+        if col.startswith('rel_power'):
+            aggregations[col] = ['mean', 'std']
+        elif col == 'spike_count':
+            aggregations[col] = ['sum']
+
+    summary = features_df.agg(aggregations)
+    flat = {
+        f'{col}_{stat}': summary.loc[stat, col]
+        for col, stats in aggregations.items()
+        for stat in stats
+    }
+    return pd.DataFrame([{'patient_id': patient_id, 'date': pd.to_datetime(date), **flat}])
+
+def write_features(df: pd.DataFrame, output_path):
+    """
+    Write features as CSV or, for a `.parquet` path, as a columnar file.
+    """
+    output_path = str(output_path)
+    if output_path.endswith('.parquet'):
+        df.to_parquet(output_path, index=False)
+    else:
+        df.to_csv(output_path, index=False)
@@ -1,36 +1,172 @@
+from collections import deque
+
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from scipy.signal import welch, find_peaks
 from scipy.integrate import simpson  # <-- THIS LINE IS CHANGED
 
+# Standard clinical EEG frequency bands (in Hz)
+BANDS = {
+    'delta': (0.5, 4),
+    'theta': (4, 8),
+    'alpha': (8, 12),
+    'beta': (12, 30),
+    'gamma': (30, 100)
+}
+
+# One record per detected spike, as returned by `detect_spikes_multichannel`
+SPIKE_DTYPE = np.dtype([
+    ('window', np.int32),
+    ('channel', np.int16),
+    ('sample', np.int32),
+    ('amplitude', np.float32),
+])
+
+def epoch_signal(data, sf, window_sec, hop_sec=None, tail='drop'):
+    """
+    Split a recording into fixed-length windows without copying it.
+
+    Args:
+        data: 1-D (samples) or 2-D (channels x samples) signal.
+        sf: Sampling frequency in Hz.
+        window_sec: Window length in seconds.
+        hop_sec: Distance between window starts in seconds. Defaults to
+                 `window_sec` (non-overlapping windows).
+        tail: What to do with a final window shorter than `window_sec`.
+              'drop' discards it; 'pad' zero-pads it, which costs one copy
+              of the signal.
+
+    Returns:
+        A tuple `(epochs, start_times)`. `epochs` has shape
+        (windows x samples) or (windows x channels x samples) and is a
+        read-only strided view into `data` when `tail='drop'`.
+        `start_times` holds each window's start in seconds.
+    """
+    if tail not in ('drop', 'pad'):
+        raise ValueError(f"Unknown tail mode '{tail}'. Expected 'drop' or 'pad'.")
+
+    data = np.asarray(data)
+    window_samples = int(window_sec * sf)
+    hop_samples = window_samples if hop_sec is None else int(hop_sec * sf)
+    if window_samples < 1 or hop_samples < 1:
+        raise ValueError("Window and hop must each span at least one sample.")
+
+    n_samples = data.shape[-1]
+    if tail == 'pad':
+        if n_samples <= window_samples:
+            n_windows = 1
+        else:
+            n_windows = -(-(n_samples - window_samples) // hop_samples) + 1
+        padded_len = (n_windows - 1) * hop_samples + window_samples
+        if padded_len > n_samples:
+            pad_width = [(0, 0)] * (data.ndim - 1) + [(0, padded_len - n_samples)]
+            data = np.pad(data, pad_width)
+    elif n_samples < window_samples:
+        empty = np.empty((0,) + data.shape[:-1] + (window_samples,), dtype=data.dtype)
+        return empty, np.empty(0)
+
+    windows = sliding_window_view(data, window_samples, axis=-1)[..., ::hop_samples, :]
+    # Put the window axis first: (channels, windows, samples) -> (windows, channels, samples)
+    epochs = np.moveaxis(windows, -2, 0)
+    start_times = np.arange(epochs.shape[0]) * hop_samples / sf
+    return epochs, start_times
+
 def calculate_band_power(data, sf, band, window_sec=None, relative=False):
     """
     Calculate the power in a specific frequency band.
+
+    Time is the last axis, so a stack of windows from `epoch_signal` can be
+    passed directly and yields one power per window (and channel).
     """
     low, high = band
     if window_sec is not None:
         nperseg = window_sec * sf
     else:
-        nperseg = len(data)
+        nperseg = np.shape(data)[-1]
 
-    freqs, psd = welch(data, sf, nperseg=nperseg)
+    freqs, psd = welch(data, sf, nperseg=nperseg, axis=-1)
     idx_band = np.logical_and(freqs >= low, freqs <= high)
     freq_res = freqs[1] - freqs[0]
 
     # Compute absolute power using Simpson's rule
-    band_power = simpson(psd[idx_band], dx=freq_res)  # <-- THIS LINE IS CHANGED
+    band_power = simpson(psd[..., idx_band], dx=freq_res, axis=-1)  # <-- THIS LINE IS CHANGED
 
     if relative:
-        total_power = simpson(psd, dx=freq_res)  # <-- THIS LINE IS CHANGED
-        if total_power == 0:
-            return 0.0
-        return band_power / total_power
+        total_power = simpson(psd, dx=freq_res, axis=-1)  # <-- THIS LINE IS CHANGED
+        if np.ndim(total_power) == 0:
+            if total_power == 0:
+                return 0.0
+            return band_power / total_power
+        return np.divide(
+            band_power,
+            total_power,
+            out=np.zeros_like(band_power),
+            where=total_power != 0,
+        )
     else:
         return band_power
 
+def calculate_band_powers(data, sf, bands=None, window_sec=None):
+    """
+    Calculate absolute and relative power for several bands in one PSD pass.
+
+    `data` may be 1-D (samples), 2-D (channels x samples) or 3-D
+    (windows x channels x samples); time is always the last axis. The PSD is
+    computed once per segment with a vectorized Welch and every band is
+    integrated from it, matching `calculate_band_power` band for band.
+
+    Returns:
+        An array of shape `data.shape[:-1] + (len(bands), 2)` where
+        `[..., 0]` is the absolute and `[..., 1]` the relative band power.
+    """
+    if bands is None:
+        bands = BANDS
+    data = np.asarray(data, dtype=float)
+    if window_sec is not None:
+        nperseg = window_sec * sf
+    else:
+        nperseg = data.shape[-1]
+
+    freqs, psd = welch(data, sf, nperseg=nperseg, axis=-1)
+    return _band_powers_from_psd(freqs, psd, bands)
+
+def _band_powers_from_psd(freqs, psd, bands):
+    """
+    Integrate absolute and relative band power from a PSD (frequency last).
+    """
+    freq_res = freqs[1] - freqs[0]
+
+    total_power = simpson(psd, dx=freq_res, axis=-1)
+    powers = np.zeros(psd.shape[:-1] + (len(bands), 2))
+    for i, (low, high) in enumerate(bands.values()):
+        idx_band = np.logical_and(freqs >= low, freqs <= high)
+        if not idx_band.any():
+            continue
+        powers[..., i, 0] = simpson(psd[..., idx_band], dx=freq_res, axis=-1)
+
+    # Relative power is 0 wherever the segment carries no power at all
+    np.divide(
+        powers[..., 0],
+        total_power[..., np.newaxis],
+        out=powers[..., 1],
+        where=total_power[..., np.newaxis] != 0,
+    )
+    return powers
+
 def detect_spikes(data, sf, prominence=0.5, width=1):
     """
     Detects spikes in an EEG signal.
+
+    For n-D input (e.g. windows from `epoch_signal`) each 1-D trace along the
+    last axis is normalized and searched independently, and an integer array
+    of counts with shape `data.shape[:-1]` is returned.
     """
+    data = np.asarray(data)
+    if data.ndim > 1:
+        traces = data.reshape(1, -1, data.shape[-1])
+        counts, _ = detect_spikes_multichannel(traces, sf, prominence=prominence, width=width)
+        return counts.reshape(data.shape[:-1])
+
     normalized_data = data / np.std(data)
     height_threshold = 3 * np.std(normalized_data)
     peaks, _ = find_peaks(
@@ -39,4 +175,235 @@ def detect_spikes(data, sf, prominence=0.5, width=1):
         width=width,
         height=height_threshold
     )
-    return len(peaks)
\ No newline at end of file
+    return len(peaks)
+
+def detect_spikes_multichannel(data, sf, prominence=0.5, width=1, baseline='window', prefilter=True):
+    """
+    Detects spikes across all windows and channels in a single pass.
+
+    Uses the same criteria as `detect_spikes` (a peak at least 3 standard
+    deviations high with the given prominence and width), but each trace's
+    standard deviation is computed once and all traces are searched with one
+    `find_peaks` call on a buffer where they are separated by sentinel
+    samples taller than any peak, which behave exactly like trace edges.
+
+    Args:
+        data: 2-D (channels x samples) or 3-D (windows x channels x samples).
+        sf: Sampling frequency in Hz.
+        baseline: Where the normalization statistics come from. 'window'
+                  uses each trace on its own (as `detect_spikes` does),
+                  'channel' pools every window of a channel, and an integer
+                  `k` uses a rolling baseline of the current and previous
+                  `k - 1` windows of that channel.
+        prefilter: Skip traces that never cross the height threshold before
+                   running the peak search. Pure NumPy, no effect on results.
+
+    Returns:
+        A tuple `(counts, spikes)`. `counts` has shape `data.shape[:-1]`;
+        `spikes` is a structured array of `SPIKE_DTYPE` with one record per
+        spike (window, channel, sample index within the window, amplitude in
+        signal units), ordered by window, channel and sample.
+    """
+    data = np.asarray(data, dtype=float)
+    if data.ndim not in (2, 3):
+        raise ValueError("Expected 2-D (channels x samples) or 3-D (windows x channels x samples) data.")
+    windows = data if data.ndim == 3 else data[np.newaxis]
+    n_windows, n_channels, n_samples = windows.shape
+
+    # --- Normalization statistics, computed once per trace ---
+    if baseline == 'window':
+        std = windows.std(axis=-1)
+    else:
+        # Pool per-window moments, which is exact since all windows have equal length
+        moments = np.stack([windows.mean(axis=-1), np.mean(windows ** 2, axis=-1)])
+        if baseline == 'channel':
+            pooled = np.broadcast_to(moments.mean(axis=1, keepdims=True), moments.shape)
+        elif isinstance(baseline, (int, np.integer)) and baseline > 0:
+            cumulative = np.cumsum(moments, axis=1)
+            lagged = np.zeros_like(cumulative)
+            lagged[:, baseline:] = cumulative[:, :-baseline]
+            n_pooled = np.minimum(np.arange(1, n_windows + 1), baseline)[:, np.newaxis]
+            pooled = (cumulative - lagged) / n_pooled
+        else:
+            raise ValueError(f"Unknown baseline '{baseline}'. Expected 'window', 'channel' or a positive int.")
+        std = np.sqrt(np.maximum(pooled[1] - pooled[0] ** 2, 0.0))
+
+    valid = std > 0
+    normalized = np.divide(windows, std[..., np.newaxis], out=np.zeros_like(windows),
+                           where=valid[..., np.newaxis])
+    # After normalization the height threshold is simply 3 standard deviations
+    height_threshold = 3.0
+
+    # --- Threshold-crossing prefilter ---
+    candidates = valid
+    if prefilter:
+        candidates = candidates & np.any(normalized >= height_threshold, axis=-1)
+    trace_ids = np.flatnonzero(candidates)
+
+    counts = np.zeros((n_windows, n_channels), dtype=int)
+    spikes = np.empty(0, dtype=SPIKE_DTYPE)
+    if trace_ids.size:
+        traces = normalized.reshape(-1, n_samples)[trace_ids]
+        stride = n_samples + 1
+        sentinel = traces.max() + 1.0
+        buffer = np.empty((trace_ids.size, stride))
+        buffer[:, 0] = sentinel
+        buffer[:, 1:] = traces
+        buffer = np.append(buffer.ravel(), sentinel)
+
+        peaks, _ = find_peaks(buffer, prominence=prominence, width=width, height=height_threshold)
+        row, sample = np.divmod(peaks, stride)
+        is_spike = (sample > 0) & (row < trace_ids.size)
+        row, sample = row[is_spike], sample[is_spike] - 1
+
+        window_idx, channel_idx = np.divmod(trace_ids[row], n_channels)
+        np.add.at(counts, (window_idx, channel_idx), 1)
+        spikes = np.empty(row.size, dtype=SPIKE_DTYPE)
+        spikes['window'] = window_idx
+        spikes['channel'] = channel_idx
+        spikes['sample'] = sample
+        spikes['amplitude'] = windows[window_idx, channel_idx, sample]
+
+    if data.ndim == 2:
+        counts = counts[0]
+    return counts, spikes
+
+class StreamingEEGFeatureExtractor:
+    """
+    Computes windowed EEG features from a live feed, one chunk at a time.
+
+    Samples are kept in a per-channel ring buffer of one window. Welch
+    segments are turned into periodograms as soon as they complete, so when
+    a window closes its PSD is just the mean of the periodograms already held
+    for it. Every `hop_sec` a result is emitted with the same band powers as
+    `calculate_band_powers(window, sf, bands, window_sec=segment_sec)` and the
+    same spike counts as `detect_spikes(window, sf, prominence, width)`.
+
+    Work per chunk is bounded by the number of segments and windows that
+    complete inside it, never by the length of the stream.
+    """
+
+    def __init__(self, sf, n_channels, window_sec, hop_sec=None, segment_sec=None,
+                 bands=None, prominence=0.5, width=1):
+        self.sf = sf
+        self.n_channels = n_channels
+        self.bands = BANDS if bands is None else bands
+        self.prominence = prominence
+        self.width = width
+
+        self.window_samples = int(window_sec * sf)
+        self.hop_samples = self.window_samples if hop_sec is None else int(hop_sec * sf)
+        self.nperseg = self.window_samples if segment_sec is None else int(segment_sec * sf)
+        if not 0 < self.nperseg <= self.window_samples:
+            raise ValueError("segment_sec must be positive and no longer than window_sec.")
+        if self.hop_samples < 1:
+            raise ValueError("hop_sec must span at least one sample.")
+
+        # Welch's default 50% overlap. Segments sit on a global grid of
+        # `seg_step` samples, so a hop that is a multiple of it lets
+        # consecutive windows share their periodograms.
+        self.seg_step = self.nperseg - self.nperseg // 2
+        self.incremental = self.nperseg < self.window_samples
+        if self.incremental and self.hop_samples % self.seg_step != 0:
+            raise ValueError(
+                f"hop_sec must be a multiple of the segment step ({self.seg_step / sf} s)."
+            )
+        self.segments_per_window = (self.window_samples - self.nperseg) // self.seg_step + 1
+
+        self.reset()
+
+    def reset(self):
+        """Clear all buffered samples and periodograms."""
+        self._buffer = np.zeros((self.n_channels, self.window_samples))
+        self._write_pos = 0
+        self._n_seen = 0
+        self._periodograms = deque(maxlen=self.segments_per_window)
+        self._freqs = None
+
+    def _latest(self, n):
+        # The most recent `n` samples of every channel, oldest first
+        start = (self._write_pos - n) % self.window_samples
+        if start + n <= self.window_samples:
+            return self._buffer[:, start:start + n]
+        return np.concatenate(
+            (self._buffer[:, start:], self._buffer[:, :self._write_pos]), axis=1
+        )
+
+    @staticmethod
+    def _until_boundary(n_seen, first, step):
+        # Samples left until the next point of the grid first, first + step, ...
+        if n_seen < first:
+            return first - n_seen
+        return step - (n_seen - first) % step
+
+    @staticmethod
+    def _at_boundary(n_seen, first, step):
+        return n_seen >= first and (n_seen - first) % step == 0
+
+    def _samples_until_next_event(self):
+        until_window = self._until_boundary(self._n_seen, self.window_samples, self.hop_samples)
+        if not self.incremental:
+            return until_window
+        until_segment = self._until_boundary(self._n_seen, self.nperseg, self.seg_step)
+        return min(until_window, until_segment)
+
+    def push(self, chunk):
+        """
+        Feed a chunk of samples and collect any windows it completes.
+
+        Args:
+            chunk: Array of shape (channels x samples); any number of samples.
+
+        Returns:
+            A list (possibly empty) of dictionaries, one per completed window,
+            with the window's start time in seconds, its `band_powers`
+            (channels x bands x [absolute, relative]) and `spike_counts`.
+        """
+        chunk = np.asarray(chunk, dtype=float)
+        if chunk.ndim == 1 and self.n_channels == 1:
+            chunk = chunk[np.newaxis, :]
+        if chunk.ndim != 2 or chunk.shape[0] != self.n_channels:
+            raise ValueError(f"Expected a chunk of shape ({self.n_channels}, n_samples).")
+
+        results = []
+        offset = 0
+        while offset < chunk.shape[1]:
+            n = min(chunk.shape[1] - offset, self._samples_until_next_event())
+            self._write(chunk[:, offset:offset + n])
+            offset += n
+
+            if self.incremental and self._at_boundary(self._n_seen, self.nperseg, self.seg_step):
+                self._add_periodogram(self._latest(self.nperseg))
+            if self._at_boundary(self._n_seen, self.window_samples, self.hop_samples):
+                results.append(self._emit())
+        return results
+
+    def _write(self, samples):
+        n = samples.shape[1]
+        end = self._write_pos + n
+        if end <= self.window_samples:
+            self._buffer[:, self._write_pos:end] = samples
+        else:
+            split = self.window_samples - self._write_pos
+            self._buffer[:, self._write_pos:] = samples[:, :split]
+            self._buffer[:, :n - split] = samples[:, split:]
+        self._write_pos = end % self.window_samples
+        self._n_seen += n
+
+    def _add_periodogram(self, segment):
+        self._freqs, psd = welch(segment, self.sf, nperseg=self.nperseg, axis=-1)
+        self._periodograms.append(psd)
+
+    def _emit(self):
+        window = self._latest(self.window_samples)
+        if not self.incremental:
+            self._add_periodogram(window)
+        psd = np.mean(self._periodograms, axis=0)
+
+        return {
+            'window_start_time': (self._n_seen - self.window_samples) / self.sf,
+            'band_powers': _band_powers_from_psd(self._freqs, psd, self.bands),
+            'spike_counts': detect_spikes(
+                window, self.sf, prominence=self.prominence, width=self.width
+            ),
+        }
@@ -0,0 +1,215 @@
+# ml_workspace/src/extract_features.py
+"""
+Batch EEG feature extraction for a directory of EDF recordings.
+
+Usage:
+    python -m ml_workspace.src.extract_features data/raw data/processed --workers 8
+
+Each recording is processed in its own worker process and written atomically
+to `<output_dir>/<recording>_eeg_features.csv` (or `.parquet`). A manifest in
+the output directory remembers what each output was built from, so reruns
+only process recordings that are new or have changed.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from . import profiling
+from .edf_reader import EDFRecording, extract_recording_features, summarize_features, write_features
+
+MANIFEST_NAME = '.eeg_features_manifest.json'
+
+# Extraction settings; notebook 3.0 used 1-minute windows and these spike criteria
+DEFAULT_PARAMS = {
+    'window_sec': 60,
+    'channels': None,
+    'prominence': 0.7,
+    'width': 2,
+    'per_window': False,
+}
+
+def output_path_for(recording_path, output_dir, fmt='csv'):
+    return Path(output_dir) / f"{Path(recording_path).stem}_eeg_features.{fmt}"
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def source_fingerprint(path, check='mtime'):
+    """Identifies the version of a recording an output was built from."""
+    stat = os.stat(path)
+    fingerprint = {'size': stat.st_size}
+    if check == 'hash':
+        fingerprint['sha256'] = file_sha256(path)
+    else:
+        fingerprint['mtime_ns'] = stat.st_mtime_ns
+    return fingerprint
+
+def load_manifest(output_dir):
+    try:
+        with open(Path(output_dir) / MANIFEST_NAME) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+@contextmanager
+def atomic_output(path):
+    """
+    Yield a temporary path next to `path` and rename it into place on success,
+    so readers never see a partially written file.
+    """
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.stem}.", suffix=path.suffix)
+    os.close(fd)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def is_up_to_date(recording_path, output_path, manifest, params, check='mtime'):
+    entry = manifest.get(Path(recording_path).name)
+    if entry is None or not Path(output_path).exists():
+        return False
+    return entry.get('params') == params and entry.get('source') == source_fingerprint(recording_path, check)
+
+def process_recording(recording_path, output_path, params, profile=False):
+    """
+    Extract and atomically write the features of one recording.
+
+    Runs in a worker process. With `profile`, the run is captured with
+    cProfile into the profile store (see `profiling`).
+    Returns the number of samples processed.
+    """
+    if profile:
+        with profiling.profile('extract_features', recording=Path(recording_path).name, params=params):
+            return process_recording(recording_path, output_path, params)
+
+    recording = EDFRecording(recording_path)
+    channels = params['channels'] or recording.channel_names
+    features = extract_recording_features(
+        recording,
+        window_sec=params['window_sec'],
+        channels=channels,
+        prominence=params['prominence'],
+        width=params['width'],
+    )
+    if not params['per_window']:
+        start = recording.start_datetime
+        patient_id = Path(recording_path).stem.split('_')[0]
+        features = summarize_features(features, patient_id, start.date() if start else None)
+
+    with atomic_output(output_path) as tmp_path:
+        write_features(features, tmp_path)
+    return sum(recording.n_samples(ch) for ch in channels)
+
+def run(input_dir, output_dir, workers=None, fmt='csv', check='mtime', force=False, profile=False, **params):
+    """
+    Extract features for every EDF in `input_dir`, skipping up-to-date outputs.
+
+    Returns:
+        A dictionary of run statistics, including throughput.
+    """
+    params = {**DEFAULT_PARAMS, **params}
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest(output_dir)
+
+    recordings = sorted(p for p in Path(input_dir).iterdir() if p.suffix.lower() == '.edf')
+    pending = []
+    for path in recordings:
+        output_path = output_path_for(path, output_dir, fmt)
+        if force or not is_up_to_date(path, output_path, manifest, params, check):
+            pending.append((path, output_path))
+
+    started = time.perf_counter()
+    total_samples = 0
+    failed = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(process_recording, str(path), str(output_path), params, profile): path
+            for path, output_path in pending
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                total_samples += future.result()
+            except Exception as e:
+                print(f"Failed to process {path.name}: {e}", file=sys.stderr)
+                failed.append(path.name)
+                continue
+            manifest[path.name] = {'source': source_fingerprint(path, check), 'params': params}
+            # Persist after every recording so an interrupted run can resume
+            with atomic_output(output_dir / MANIFEST_NAME) as tmp_path:
+                with open(tmp_path, 'w') as f:
+                    json.dump(manifest, f, indent=2, sort_keys=True)
+    elapsed = time.perf_counter() - started
+
+    processed = len(pending) - len(failed)
+    return {
+        'recordings_total': len(recordings),
+        'recordings_processed': processed,
+        'recordings_skipped': len(recordings) - len(pending),
+        'recordings_failed': failed,
+        'samples': total_samples,
+        'seconds': elapsed,
+        'recordings_per_second': processed / elapsed if elapsed > 0 else 0.0,
+        'samples_per_second': total_samples / elapsed if elapsed > 0 else 0.0,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract EEG features from a directory of EDF recordings.")
+    parser.add_argument('input_dir', help="Directory containing .edf recordings")
+    parser.add_argument('output_dir', help="Directory for *_eeg_features outputs")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--check', choices=['mtime', 'hash'], default='mtime',
+                        help="How to decide whether an output is up to date")
+    parser.add_argument('--force', action='store_true', help="Reprocess every recording")
+    parser.add_argument('--profile', action='store_true',
+                        help="Save a cProfile capture of every recording to PROFILE_DIR")
+    parser.add_argument('--window-sec', type=float, default=60)
+    parser.add_argument('--channels', nargs='+', default=None, help="Channel labels (default: all)")
+    parser.add_argument('--prominence', type=float, default=0.7)
+    parser.add_argument('--width', type=float, default=2)
+    parser.add_argument('--per-window', action='store_true',
+                        help="Write per-window features instead of the daily summary")
+    args = parser.parse_args(argv)
+
+    stats = run(
+        args.input_dir,
+        args.output_dir,
+        workers=args.workers,
+        fmt=args.format,
+        check=args.check,
+        force=args.force,
+        profile=args.profile,
+        window_sec=args.window_sec,
+        channels=args.channels,
+        prominence=args.prominence,
+        width=args.width,
+        per_window=args.per_window,
+    )
+    print(
+        f"Processed {stats['recordings_processed']} recordings "
+        f"({stats['recordings_skipped']} up to date, {len(stats['recordings_failed'])} failed) "
+        f"in {stats['seconds']:.1f}s: "
+        f"{stats['recordings_per_second']:.2f} recordings/s, "
+        f"{stats['samples_per_second']:,.0f} samples/s"
+    )
+    return 1 if stats['recordings_failed'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,190 @@
+# ml_workspace/src/feature_spec.py
+"""
+Versioned feature specs, shipped next to each model, and the plans
+compiled from them.
+
+`models/feature_spec_<version>.json` declares what the model with the same
+version consumes:
+
+    {
+      "format": 1,
+      "version": "v2.0",
+      "inputs": ["hours_of_sleep", "stress_level", "medication_taken"],
+      "eeg_aggregates": [],
+      "features": [
+        {"name": "hours_of_sleep", "source": "hours_of_sleep"},
+        {"name": "sleep_lag_1", "source": "hours_of_sleep", "lag": 1},
+        {"name": "hours_of_sleep_7day_avg", "source": "hours_of_sleep", "window": 7}
+      ]
+    }
+
+`inputs` are raw daily fields. `eeg_aggregates` are daily EEG summary
+columns in the layout `edf_reader.summarize_features` writes (e.g.
+`rel_power_alpha_mean`, `spike_count_sum`); histories must then carry them
+like any other field. `features` are listed in the model's column order;
+each is the mean of `source` over `window` days (default 1) ending `lag`
+days (default 0) before the prediction day, skipping missing values like
+pandas' rolling mean.
+
+`FeaturePlan` compiles a spec once into integer index arrays, so building
+a prediction row is a fill of a preallocated float32 vector by position.
+"""
+
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+SPEC_FORMAT = 1
+
+# Daily summary columns of `edf_reader.summarize_features`
+EEG_AGGREGATE_PATTERN = re.compile(r'^(rel_power_[a-z]+_(mean|std)|spike_count_sum)$')
+
+def feature_spec_path_for(model_path) -> str:
+    """`.../xgb_model_v1.0.json` -> `.../feature_spec_v1.0.json`"""
+    model_path = Path(model_path)
+    version = model_path.stem[len('xgb_model_'):] if model_path.stem.startswith('xgb_model_') else model_path.stem
+    return str(model_path.with_name(f'feature_spec_{version}.json'))
+
+def validate_spec(spec: Dict[str, Any]):
+    """Raises `ValueError` describing the first problem with `spec`."""
+    if spec.get('format') != SPEC_FORMAT:
+        raise ValueError(f"Unsupported feature spec format {spec.get('format')!r}; expected {SPEC_FORMAT}.")
+    for aggregate in spec.get('eeg_aggregates', []):
+        if not EEG_AGGREGATE_PATTERN.match(aggregate):
+            raise ValueError(f"'{aggregate}' is not an EEG summary column (rel_power_<band>_mean/std, spike_count_sum).")
+
+    sources = set(spec.get('inputs', [])) | set(spec.get('eeg_aggregates', []))
+    names = set()
+    for feature in spec.get('features', []):
+        name = feature.get('name')
+        if not name or name in names:
+            raise ValueError(f"Feature names must be present and unique, got {name!r}.")
+        names.add(name)
+        if feature.get('source') not in sources:
+            raise ValueError(f"Feature '{name}' reads '{feature.get('source')}', which is not a declared input.")
+        if int(feature.get('lag', 0)) < 0 or int(feature.get('window', 1)) < 1:
+            raise ValueError(f"Feature '{name}' needs lag >= 0 and window >= 1.")
+    if not names:
+        raise ValueError("A feature spec needs at least one feature.")
+
+def feature_definitions(specs: Sequence[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Every feature entry of `specs` by name.
+
+    Raises:
+        ValueError: Two specs define the same name differently.
+    """
+    definitions = {}
+    for spec in specs:
+        for feature in spec['features']:
+            known = definitions.setdefault(feature['name'], feature)
+            if _definition(known) != _definition(feature):
+                raise ValueError(f"Feature '{feature['name']}' is defined differently by two specs.")
+    return definitions
+
+def _definition(feature: Dict[str, Any]) -> Tuple[str, int, int]:
+    return feature['source'], int(feature.get('lag', 0)), int(feature.get('window', 1))
+
+def spec_from_definitions(version: str, feature_names: Sequence[str],
+                          definitions: Mapping[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    A spec for `feature_names` from name-keyed feature entries, e.g. those of
+    the shipped specs (see `feature_definitions`); other names are read as is.
+    """
+    features = [dict(definitions.get(name, {'source': name}), name=name) for name in feature_names]
+    return {
+        'format': SPEC_FORMAT,
+        'version': version,
+        'inputs': list(dict.fromkeys(feature['source'] for feature in features)),
+        'eeg_aggregates': [],
+        'features': features,
+    }
+
+class FeaturePlan:
+    """
+    A feature spec compiled into column indexes.
+
+    The trailing `lookback` days of a history are read into a small
+    (days x sources) block; single-day features are then gathered from it
+    with one fancy-indexing step, and windowed features are means over
+    fixed row ranges of one column.
+    """
+
+    def __init__(self, spec: Dict[str, Any]):
+        validate_spec(spec)
+        self.spec = spec
+        self.version = spec.get('version')
+        # Identifies the spec's content, e.g. to tell stored features of a replaced spec apart
+        self.digest = hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:16]
+        features = spec['features']
+        self.feature_names: List[str] = [feature['name'] for feature in features]
+        # Only the fields some feature reads are taken from each day
+        self.sources: List[str] = list(dict.fromkeys(feature['source'] for feature in features))
+
+        column = {source: i for i, source in enumerate(self.sources)}
+        source_index = np.array([column[feature['source']] for feature in features], dtype=np.intp)
+        lag = np.array([int(feature.get('lag', 0)) for feature in features], dtype=np.intp)
+        window = np.array([int(feature.get('window', 1)) for feature in features], dtype=np.intp)
+        self.lookback = int((lag + window).max())
+
+        # Row of the block each single-day feature reads; the last row is the prediction day
+        single = window == 1
+        self._single = np.flatnonzero(single)
+        self._single_rows = self.lookback - 1 - lag[single]
+        self._single_cols = source_index[single]
+        self._windowed = [
+            (int(i), self.lookback - lag[i] - window[i], self.lookback - lag[i], int(source_index[i]))
+            for i in np.flatnonzero(~single)
+        ]
+
+    @classmethod
+    def load(cls, path) -> 'FeaturePlan':
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def __len__(self) -> int:
+        return len(self.feature_names)
+
+    def fill(self, patient_history: List[Dict[str, Any]], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Writes the features of the history's latest day into `out`.
+
+        Args:
+            out: A float32 vector of length `len(self)`; allocated if omitted.
+
+        Returns:
+            `out`. Values are computed in float64 and rounded once to float32,
+            exactly as the model would round them.
+        """
+        if out is None:
+            out = np.empty(len(self.feature_names), dtype=np.float32)
+        days = patient_history[-self.lookback:]
+        # Days before the start of the history stay missing
+        block = np.full((self.lookback, len(self.sources)), np.nan)
+        for row, day in enumerate(days, self.lookback - len(days)):
+            block[row] = [day[source] for source in self.sources]
+
+        out[self._single] = block[self._single_rows, self._single_cols]
+        for i, start, stop, col in self._windowed:
+            values = block[start:stop, col]
+            observed = values[~np.isnan(values)]
+            out[i] = observed.mean() if observed.size else np.nan
+        return out
+
+    def fill_matrix(self, histories: Sequence[List[Dict[str, Any]]]) -> np.ndarray:
+        """Feature rows of many histories in one preallocated float32 matrix."""
+        X = np.empty((len(histories), len(self.feature_names)), dtype=np.float32)
+        for i, history in enumerate(histories):
+            self.fill(history, X[i])
+        return X
+
+    def fill_from_features(self, features: Mapping[str, Any], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Like `fill`, from already computed features; missing or None values become NaN."""
+        if out is None:
+            out = np.empty(len(self.feature_names), dtype=np.float32)
+        out[:] = [features.get(name) for name in self.feature_names]
+        return out
@@ -1,54 +1,216 @@
 # ml_workspace/src/inference.py
 
+import json
 import os
-import pandas as pd
 import numpy as np
-import xgboost as xgb
-import joblib
-from typing import List, Dict, Any
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
+
+from .feature_spec import FeaturePlan, feature_definitions, spec_from_definitions
+from .model_registry import LoadedModel, ModelRegistry
+from .profiling import sampled
+from .timing import stage
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 # --- Configuration ---
 # Get the absolute path of the current script
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 MODELS_DIR = os.path.join(os.path.dirname(BASE_DIR), 'models')
-MODEL_PATH = os.path.join(MODELS_DIR, 'xgb_model_v1.0.json')
-EXPLAINER_PATH = os.path.join(MODELS_DIR, 'shap_explainer_v1.0.joblib')
+DEFAULT_MODEL_VERSION = os.getenv('MODEL_VERSION', 'v1.0')
+MAX_LOADED_MODELS = int(os.getenv('MAX_LOADED_MODELS', '2'))
+# Score and explain with compiled_model_<version>.npz where available, so xgboost is never imported
+USE_COMPILED_MODELS = os.getenv('USE_COMPILED_MODELS', '1') == '1'
 
 # --- Artifact Loading ---
-try:
-    model = xgb.Booster()
-    model.load_model(MODEL_PATH)
-    explainer = joblib.load(EXPLAINER_PATH)
-except Exception as e:
-    # Handle model loading errors gracefully in a real application
-    # For now, we'll raise the exception to make debugging clear.
-    print(f"Error loading model artifacts: {e}")
-    model = None
-    explainer = None
-
-def create_features(df: pd.DataFrame) -> pd.DataFrame:
+# Nothing is loaded at import time; each version is loaded on first use
+registry = ModelRegistry(
+    MODELS_DIR,
+    default_version=DEFAULT_MODEL_VERSION,
+    max_loaded=MAX_LOADED_MODELS,
+    use_compiled=USE_COMPILED_MODELS,
+)
+
+def __getattr__(name):
+    # Keeps `inference.model` / `inference.explainer` working for older callers
+    if name == 'model':
+        return registry.get().model
+    if name == 'explainer':
+        return registry.get().explainer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# --- Feature Definitions ---
+# Features are declared only by the spec shipped with each model (see `feature_spec`)
+
+# Days of history needed before a prediction can be made
+MIN_HISTORY_DAYS = 8
+
+def shipped_specs() -> List[Dict[str, Any]]:
+    """The feature specs in the registry's models directory, in version order."""
+    specs = []
+    for name in sorted(os.listdir(registry.models_dir)):
+        if name.startswith('feature_spec_') and name.endswith('.json'):
+            with open(os.path.join(registry.models_dir, name)) as f:
+                specs.append(json.load(f))
+    return specs
+
+def create_features(df: 'pd.DataFrame', by: Optional[str] = None,
+                    plan: Optional[FeaturePlan] = None) -> 'pd.DataFrame':
     """
     Creates time-series features from raw data.
+
+    Adds the lag and rolling features of `plan`, or of every shipped spec,
+    computed with pandas; `FeaturePlan.fill` is checked against this.
+    If `by` names a column, the data may hold several patients' histories
+    and features are computed within each group in a single pass.
     """
+    import pandas as pd
+
+    definitions = feature_definitions([plan.spec] if plan is not None else shipped_specs())
+
     df_feat = df.copy()
     df_feat['date'] = pd.to_datetime(df_feat['date'])
-    df_feat = df_feat.set_index('date')
-
-    # Create Lag Features
-    df_feat['sleep_lag_1'] = df_feat['hours_of_sleep'].shift(1)
-    df_feat['stress_lag_1'] = df_feat['stress_level'].shift(1)
-    df_feat['medication_lag_1'] = df_feat['medication_taken'].shift(1)
-    df_feat['eeg_lag_1'] = df_feat['eeg_feature_1'].shift(1)
-
-    # Create Rolling Window Features
-    df_feat['sleep_rolling_avg_3'] = df_feat['hours_of_sleep'].rolling(window=3, min_periods=1).mean()
-    df_feat['stress_rolling_avg_3'] = df_feat['stress_level'].rolling(window=3, min_periods=1).mean()
-    df_feat['sleep_rolling_avg_7'] = df_feat['hours_of_sleep'].rolling(window=7, min_periods=1).mean()
-    df_feat['stress_rolling_avg_7'] = df_feat['stress_level'].rolling(window=7, min_periods=1).mean()
-    
-    return df_feat
+    if by is not None:
+        df_feat = df_feat.reset_index(drop=True)
+        source = df_feat.groupby(by, sort=False)
+    else:
+        source = df_feat
+
+    for feature, definition in definitions.items():
+        column = definition['source']
+        lag, window = int(definition.get('lag', 0)), int(definition.get('window', 1))
+        if feature == column and lag == 0 and window == 1:
+            continue
+        # Rolling window features
+        if window > 1:
+            values = source[column].rolling(window=window, min_periods=1).mean()
+            if by is not None:
+                values = values.droplevel(0)
+        else:
+            values = df_feat[column]
+        # Lag features
+        if lag:
+            values = (values.groupby(df_feat[by]) if by is not None else values).shift(lag)
+        df_feat[feature] = values
+
+    return df_feat.set_index('date')
+
+# --- Explainability Modes ---
+# 'none': risk score only; 'top_k': the k largest contributions; 'full': all of them
+EXPLAIN_MODES = ('none', 'top_k', 'full')
+DEFAULT_TOP_K = 5
+
+def _format_result(risk_score, shap_row, feature_columns, explain: str = 'full',
+                   top_k: int = DEFAULT_TOP_K) -> Dict[str, Any]:
+    if explain == 'none':
+        return {
+            "risk_score": round(float(risk_score), 4),
+            "feature_contributions": {}
+        }
+
+    # Round first so ties are ordered exactly as sorting the rounded values would
+    rounded = np.round(np.asarray(shap_row, dtype=np.float64), 4)
+    magnitude = np.abs(rounded)
+    if explain == 'top_k' and top_k < len(rounded):
+        # Partial selection of the k largest, then order only those
+        candidates = np.sort(np.argpartition(-magnitude, top_k - 1)[:top_k])
+        order = candidates[np.argsort(-magnitude[candidates], kind='stable')]
+    else:
+        # Sort contributions by absolute impact
+        order = np.argsort(-magnitude, kind='stable')
+
+    # Format feature contributions into a user-friendly dictionary
+    sorted_contributions = {feature_columns[i]: float(rounded[i]) for i in order}
+
+    return {
+        "risk_score": round(float(risk_score), 4),
+        "feature_contributions": sorted_contributions
+    }
+
+def feature_plan_for(artifacts: LoadedModel) -> FeaturePlan:
+    """
+    The compiled feature plan of a loaded model version.
+
+    Versions ship one as `feature_spec_<version>.json`; for a model without
+    a spec, its features are looked up by name in the shipped specs.
+    """
+    if artifacts.feature_plan is None:
+        artifacts.feature_plan = FeaturePlan(spec_from_definitions(
+            artifacts.version, artifacts.feature_names, feature_definitions(shipped_specs())
+        ))
+    return artifacts.feature_plan
+
+@sampled('score_rows')
+def score_rows(X_pred, model_version: Optional[str] = None, explain: str = 'full',
+               top_k: int = DEFAULT_TOP_K) -> List[Dict[str, Any]]:
+    """
+    Scores and explains a matrix of prepared feature rows in one pass.
+
+    Feature contributions are XGBoost's native TreeSHAP values
+    (`pred_contribs=True`), so the pickled SHAP explainer is never needed.
+    They are exact, path-dependent SHAP values in the model's margin space
+    and sum with the bias to the model margin. When a compiled model is
+    loaded, scores and contributions both come from its tree arrays, so no
+    explain mode imports xgboost.
+
+    Args:
+        X_pred: A DataFrame or 2-D array of feature rows, with columns in the
+                model's feature order.
+        model_version: Model version to score with.
+        explain: One of `EXPLAIN_MODES`. 'none' skips SHAP entirely.
+        top_k: Number of contributions returned when `explain='top_k'`.
+
+    Returns:
+        One result per row, in the format returned by `predict`.
+    """
+    if explain not in EXPLAIN_MODES:
+        raise ValueError(f"Unknown explain mode '{explain}'. Expected one of {EXPLAIN_MODES}.")
+    if explain == 'top_k' and top_k < 1:
+        raise ValueError("top_k must be at least 1.")
+
+    artifacts = registry.get(model_version)
+    feature_columns = artifacts.feature_names
+
+    # --- Prediction ---
+    if artifacts.compiled is not None:
+        X_pred = np.asarray(X_pred, dtype=np.float32)
+        if X_pred.ndim != 2 or X_pred.shape[1] != len(feature_columns):
+            raise ValueError(f"Expected {len(feature_columns)} feature columns, got shape {X_pred.shape}.")
+        with stage('predict'):
+            risk_scores = artifacts.compiled.predict(X_pred)
+    else:
+        risk_scores = None
+
+    # --- Explainability ---
+    if explain == 'none' and risk_scores is not None:
+        shap_values = [None] * len(risk_scores)
+    elif risk_scores is not None and artifacts.compiled.can_explain:
+        with stage('shap'):
+            shap_values = artifacts.compiled.contributions(X_pred, len(feature_columns))
+    else:
+        import xgboost as xgb
 
-def predict(patient_history: List[Dict[str, Any]]) -> Dict[str, Any]:
+        with stage('dmatrix'):
+            dmatrix_pred = xgb.DMatrix(X_pred, feature_names=feature_columns)
+        if risk_scores is None:
+            with stage('predict'):
+                risk_scores = artifacts.model.predict(dmatrix_pred)
+        if explain == 'none':
+            shap_values = [None] * len(risk_scores)
+        else:
+            with stage('shap'):
+                # The last column is the bias term
+                shap_values = artifacts.model.predict(dmatrix_pred, pred_contribs=True)[:, :-1]
+
+    return [
+        _format_result(risk_score, shap_row, feature_columns, explain, top_k)
+        for risk_score, shap_row in zip(risk_scores, shap_values)
+    ]
+
+@sampled('predict')
+def predict(patient_history: List[Dict[str, Any]], use_pandas: bool = False,
+            model_version: Optional[str] = None, explain: str = 'full',
+            top_k: int = DEFAULT_TOP_K) -> Dict[str, Any]:
     """
     Generates a risk score and explainability for a single prediction.
     
@@ -56,48 +218,90 @@ def predict(patient_history: List[Dict[str, Any]]) -> Dict[str, Any]:
         patient_history: A list of dictionaries, where each dictionary represents
                          one day of raw data. Must contain at least 8 days of data
                          (7 historical + 1 for the prediction day).
+        use_pandas: Build features with the full `create_features` pipeline
+                    instead of the NumPy fast path.
+        model_version: Model version to score with, e.g. "v2.0". Defaults to
+                       `DEFAULT_MODEL_VERSION`.
+        explain: 'full' (default) returns every feature contribution, 'top_k'
+                 only the `top_k` largest, and 'none' skips SHAP.
     
     Returns:
         A dictionary containing the risk score and feature contributions.
     """
-    if not model or not explainer:
-        raise RuntimeError("Model artifacts are not loaded. Cannot make predictions.")
-    
-    if len(patient_history) < 8:
+    if len(patient_history) < MIN_HISTORY_DAYS:
         raise ValueError("Insufficient data. At least 8 days of history are required to generate features.")
 
-    # --- 1. Data Preparation ---
-    raw_df = pd.DataFrame(patient_history)
+    artifacts = registry.get(model_version)
 
-    # --- 2. Feature Engineering ---
-    features_df = create_features(raw_df)
-    
-    # --- 3. Select Prediction Row and Features ---
+    # --- 1-3. Feature Engineering for the Prediction Row ---
     # The prediction is for the most recent day
-    prediction_row = features_df.iloc[[-1]] 
-    
-    # Ensure columns are in the same order as the training data
-    # We drop 'patient_id' as it's not a feature for the model
-    feature_columns = model.feature_names
-    X_pred = prediction_row[feature_columns]
+    with stage('features'):
+        if use_pandas:
+            import pandas as pd
 
-    # --- 4. Prediction ---
-    dmatrix_pred = xgb.DMatrix(X_pred)
-    risk_score = model.predict(dmatrix_pred)[0]
+            features_df = create_features(pd.DataFrame(patient_history), plan=feature_plan_for(artifacts))
+            X_pred = features_df.iloc[[-1]][artifacts.feature_names]
+        else:
+            # Columns come out in the model's order from the version's feature spec
+            X_pred = feature_plan_for(artifacts).fill(patient_history)[np.newaxis, :]
 
-    # --- 5. Explainability ---
-    shap_values = explainer.shap_values(X_pred)
-    
-    # Format feature contributions into a user-friendly dictionary
-    feature_contributions = {
-        feature: round(float(shap_value), 4) 
-        for feature, shap_value in zip(feature_columns, shap_values[0])
-    }
+    # --- 4-5. Prediction and Explainability ---
+    return score_rows(X_pred, model_version=artifacts.version, explain=explain, top_k=top_k)[0]
 
-    # Sort contributions by absolute impact
-    sorted_contributions = dict(sorted(feature_contributions.items(), key=lambda item: abs(item[1]), reverse=True))
+@sampled('predict_batch')
+def predict_batch(histories: List[List[Dict[str, Any]]],
+                  model_version: Optional[str] = None, explain: str = 'full',
+                  top_k: int = DEFAULT_TOP_K) -> List[Dict[str, Any]]:
+    """
+    Generates risk scores and explainability for many patients in one call.
 
-    return {
-        "risk_score": round(float(risk_score), 4),
-        "feature_contributions": sorted_contributions
-    }
\ No newline at end of file
+    The feature plan fills the latest day of every history straight into
+    one preallocated matrix, and the model is scored and explained once
+    over that matrix.
+
+    Args:
+        histories: A list of patient histories, each in the format accepted
+                   by `predict` (at least 8 days of raw data).
+        model_version: Model version to score with. Defaults to
+                       `DEFAULT_MODEL_VERSION`.
+        explain: Explainability mode, as for `predict`.
+
+    Returns:
+        A list with one result per history, in the same order and format
+        as `predict`.
+    """
+    if not histories:
+        return []
+
+    for i, history in enumerate(histories):
+        if len(history) < MIN_HISTORY_DAYS:
+            raise ValueError(
+                f"Insufficient data for history {i}. At least 8 days of history are required to generate features."
+            )
+
+    artifacts = registry.get(model_version)
+
+    # --- 1-3. Feature Engineering for the latest day of every history ---
+    with stage('features'):
+        X_pred = feature_plan_for(artifacts).fill_matrix(histories)
+
+    # --- 4-5. Prediction and Explainability ---
+    return score_rows(X_pred, model_version=artifacts.version, explain=explain, top_k=top_k)
+
+@sampled('predict_features')
+def predict_features(features: Dict[str, Any], model_version: Optional[str] = None,
+                     explain: str = 'full', top_k: int = DEFAULT_TOP_K) -> Dict[str, Any]:
+    """
+    Scores one set of precomputed features, skipping feature engineering.
+
+    Args:
+        features: Feature name -> value for the prediction day, covering the
+                  model's feature columns.
+
+    Returns:
+        A dictionary in the format returned by `predict`.
+    """
+    artifacts = registry.get(model_version)
+    with stage('features'):
+        X_pred = feature_plan_for(artifacts).fill_from_features(features)[np.newaxis, :]
+    return score_rows(X_pred, model_version=artifacts.version, explain=explain, top_k=top_k)[0]
@@ -0,0 +1,222 @@
+# ml_workspace/src/model_registry.py
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+from .compiled_model import CompiledModel, compiled_path_for, source_digest
+from .feature_spec import FeaturePlan, feature_spec_path_for
+
+def _mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+class LoadedModel:
+    """
+    The artifacts of one model version.
+
+    If a compiled archive (see `compiled_model`) built from the current model
+    file exists, it is used for scoring and xgboost is not imported until
+    something asks for the booster. Otherwise the XGBoost booster is loaded
+    up front. Serving explains predictions with the booster's own
+    contributions, so the pickled SHAP explainer is only unpickled if
+    something asks for it.
+
+    The feature spec shipped next to the model (`feature_spec_<version>.json`)
+    is compiled into `feature_plan`; it is None for models without one.
+    """
+
+    def __init__(self, version: str, model_path: str, explainer_path: str,
+                 compiled_path: Optional[str] = None):
+        self.version = version
+        self.model_path = model_path
+        self.explainer_path = explainer_path
+        self.compiled_path = compiled_path
+        self.spec_path = feature_spec_path_for(model_path)
+
+        self.model_mtime = _mtime(model_path)
+        # Identifies the model file's content, e.g. so results of a replaced model aren't reused
+        self.model_digest = source_digest(model_path)
+        self.compiled_mtime = _mtime(compiled_path) if compiled_path else None
+        self.compiled = None
+        if self.compiled_mtime is not None:
+            compiled = CompiledModel.load(compiled_path)
+            # An archive left over from an older model file is ignored
+            if compiled.source_sha256 == self.model_digest:
+                self.compiled = compiled
+
+        self._model = None
+        self._explainer = None
+        self._explainer_mtime = None
+        self._lock = threading.Lock()
+        self.last_checked = time.monotonic()
+
+        if self.compiled is not None and self.compiled.feature_names:
+            self.feature_names = self.compiled.feature_names
+        else:
+            self.feature_names = self.model.feature_names
+
+        self.spec_mtime = _mtime(self.spec_path)
+        self.feature_plan = None
+        if self.spec_mtime is not None:
+            plan = FeaturePlan.load(self.spec_path)
+            if plan.feature_names != list(self.feature_names):
+                raise ValueError(
+                    f"{self.spec_path} lists features {plan.feature_names}, "
+                    f"but the model expects {list(self.feature_names)}."
+                )
+            self.feature_plan = plan
+
+    @property
+    def model(self):
+        """The XGBoost booster, loaded on first use."""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    import xgboost as xgb
+
+                    model = xgb.Booster()
+                    model.load_model(self.model_path)
+                    self._model = model
+        return self._model
+
+    @property
+    def explainer(self):
+        if self._explainer is None:
+            with self._lock:
+                if self._explainer is None:
+                    import joblib
+
+                    self._explainer_mtime = _mtime(self.explainer_path)
+                    try:
+                        self._explainer = joblib.load(self.explainer_path)
+                    except Exception as e:
+                        raise RuntimeError(
+                            f"SHAP explainer for {self.version} could not be loaded: {e}"
+                        ) from e
+        return self._explainer
+
+    def is_stale(self) -> bool:
+        """True if an artifact this version has loaded changed on disk."""
+        if _mtime(self.model_path) != self.model_mtime:
+            return True
+        if self.compiled_path and _mtime(self.compiled_path) != self.compiled_mtime:
+            return True
+        if _mtime(self.spec_path) != self.spec_mtime:
+            return True
+        return self._explainer is not None and _mtime(self.explainer_path) != self._explainer_mtime
+
+class ModelRegistry:
+    """
+    Lazily loads model versions on first use and keeps the most recently
+    used ones resident.
+
+    Artifacts follow the `models/` naming scheme (`xgb_model_<version>.json`,
+    `shap_explainer_<version>.joblib`, an optional `feature_spec_<version>.json`
+    and, with `use_compiled`, an optional `compiled_model_<version>.npz`). At most `max_loaded` versions are
+    kept in memory, evicting the least recently used. Every `check_interval`
+    seconds a lookup also checks the files' modification times and reloads a
+    version whose artifacts were replaced on disk. All methods are
+    thread-safe; loading one version does not block lookups of another.
+    """
+
+    def __init__(self, models_dir: str, default_version: str = 'v1.0',
+                 max_loaded: int = 2, check_interval: float = 1.0, use_compiled: bool = True):
+        if max_loaded < 1:
+            raise ValueError("max_loaded must be at least 1.")
+        self.models_dir = models_dir
+        self.use_compiled = use_compiled
+        self.default_version = default_version
+        self.max_loaded = max_loaded
+        self.check_interval = check_interval
+
+        self._loaded = OrderedDict()
+        self._lock = threading.Lock()
+        self._version_locks = {}
+
+    def artifact_paths(self, version: str):
+        return (
+            os.path.join(self.models_dir, f'xgb_model_{version}.json'),
+            os.path.join(self.models_dir, f'shap_explainer_{version}.joblib'),
+        )
+
+    def available_versions(self) -> List[str]:
+        """Versions with a model file in the models directory."""
+        prefix, suffix = 'xgb_model_', '.json'
+        return sorted(
+            name[len(prefix):-len(suffix)]
+            for name in os.listdir(self.models_dir)
+            if name.startswith(prefix) and name.endswith(suffix)
+        )
+
+    def loaded_versions(self) -> List[str]:
+        """Resident versions, least recently used first."""
+        with self._lock:
+            return list(self._loaded)
+
+    def get(self, version: Optional[str] = None) -> LoadedModel:
+        """Returns the artifacts for `version` (default version if None), loading them if needed."""
+        version = version or self.default_version
+        with self._lock:
+            entry = self._loaded.get(version)
+            if entry is not None:
+                self._loaded.move_to_end(version)
+
+        if entry is not None and not self._should_reload(entry):
+            return entry
+
+        with self._version_lock(version):
+            # Another thread may have loaded it while we waited
+            with self._lock:
+                current = self._loaded.get(version)
+            if current is not None and (current is not entry or not current.is_stale()):
+                current.last_checked = time.monotonic()
+                return current
+            return self._load(version)
+
+    def reload(self, version: Optional[str] = None) -> LoadedModel:
+        """Forces `version` to be loaded again from disk."""
+        version = version or self.default_version
+        with self._version_lock(version):
+            return self._load(version)
+
+    def clear(self):
+        """Drops every resident version."""
+        with self._lock:
+            self._loaded.clear()
+
+    def _version_lock(self, version: str) -> threading.Lock:
+        model_path, _ = self.artifact_paths(version)
+        # Versions arrive from requests; an unknown one must not leave a lock behind
+        if not os.path.exists(model_path):
+            raise ValueError(f"Unknown model version '{version}'. No artifact at {model_path}.")
+        with self._lock:
+            return self._version_locks.setdefault(version, threading.Lock())
+
+    def _should_reload(self, entry: LoadedModel) -> bool:
+        now = time.monotonic()
+        if now - entry.last_checked < self.check_interval:
+            return False
+        entry.last_checked = now
+        return entry.is_stale()
+
+    def _load(self, version: str) -> LoadedModel:
+        model_path, explainer_path = self.artifact_paths(version)
+        if not os.path.exists(model_path):
+            raise ValueError(f"Unknown model version '{version}'. No artifact at {model_path}.")
+        try:
+            compiled_path = compiled_path_for(model_path) if self.use_compiled else None
+            entry = LoadedModel(version, model_path, explainer_path, compiled_path)
+        except Exception as e:
+            raise RuntimeError(f"Model artifacts for {version} could not be loaded: {e}") from e
+
+        with self._lock:
+            self._loaded[version] = entry
+            self._loaded.move_to_end(version)
+            while len(self._loaded) > self.max_loaded:
+                self._loaded.popitem(last=False)
+        return entry
@@ -0,0 +1,200 @@
+# ml_workspace/src/prediction_cache.py
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from . import inference
+from .timing import stage
+
+class PredictionCache:
+    """
+    LRU + TTL cache of prediction results.
+
+    Entries are keyed by a hash of the model version, the content of its
+    model file and feature spec, and the exact feature row the model would
+    see, so a patient whose recent history hasn't changed hits the cache
+    while any change that matters to the model, including a model reloaded
+    from replaced files, misses it. The cache holds at most `max_entries` results and roughly
+    `max_bytes` of serialized results, evicting the least recently used.
+    Entries expire `ttl_seconds` after they were stored.
+
+    An optional persistent `store` (see `app.prediction_store`) is consulted
+    on memory misses and written through on every new result, so results
+    survive restarts. It must provide `get(key, ttl_seconds)` returning
+    `(result, patient_id)` or None, `put(key, result, patient_id, model_version)`
+    and `delete_patient(patient_id)`.
+
+    Patients with identical feature rows share one entry, which remembers
+    each of them so invalidating any one of them drops it.
+
+    Cached results are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, max_entries: int = 10_000, max_bytes: int = 64 * 1024 * 1024,
+                 ttl_seconds: float = 900.0, store=None, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.store = store
+        self._clock = clock
+
+        # key -> (result, size in bytes, stored at, set of patient ids)
+        self._entries = OrderedDict()
+        self._patient_keys: Dict[Any, set] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @staticmethod
+    def key_for(feature_row: np.ndarray, model_version: str, explain: str = 'full',
+                top_k: int = inference.DEFAULT_TOP_K, model_id: str = '') -> str:
+        """
+        Stable key for a model version, explainability mode and feature row.
+
+        `model_id` identifies the loaded artifacts' content (see `model_id`).
+        """
+        if explain != 'top_k':
+            top_k = 0
+        digest = hashlib.sha256(f"{model_version}|{model_id}|{explain}|{top_k}".encode())
+        digest.update(np.ascontiguousarray(feature_row, dtype=np.float64).tobytes())
+        return digest.hexdigest()
+
+    @staticmethod
+    def model_id(artifacts) -> str:
+        """The model file and feature spec digests of a loaded version."""
+        return f"{artifacts.model_digest}:{inference.feature_plan_for(artifacts).digest}"
+
+    def get(self, key: str, patient_id=None) -> Optional[Dict[str, Any]]:
+        """The cached result for `key`; a hit also records `patient_id` as one of its owners."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._clock() - entry[2] <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self._add_owner(key, entry[3], patient_id)
+                    self._hits += 1
+                    return entry[0]
+                self._remove(key)
+
+        if self.store is not None:
+            stored = self.store.get(key, self.ttl_seconds)
+            if stored is not None:
+                result, stored_patient_id = stored
+                self._insert(key, result, stored_patient_id)
+                with self._lock:
+                    entry = self._entries.get(key)
+                    if entry is not None:
+                        self._add_owner(key, entry[3], patient_id)
+                    self._hits += 1
+                return result
+
+        with self._lock:
+            self._misses += 1
+        return None
+
+    def put(self, key: str, result: Dict[str, Any], patient_id=None, model_version: Optional[str] = None):
+        self._insert(key, result, patient_id)
+        if self.store is not None:
+            self.store.put(key, result, patient_id, model_version)
+
+    def invalidate_patient(self, patient_id) -> int:
+        """Drops every cached result for a patient, e.g. after new daily data is written."""
+        with self._lock:
+            keys = list(self._patient_keys.get(patient_id, ()))
+            for key in keys:
+                self._remove(key)
+        if self.store is not None:
+            self.store.delete_patient(patient_id)
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._patient_keys.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': self._hits / lookups if lookups else 0.0,
+                'evictions': self._evictions,
+            }
+
+    def predict(self, patient_history: List[Dict[str, Any]], model_version: Optional[str] = None,
+                patient_id=None, explain: str = 'full', top_k: int = inference.DEFAULT_TOP_K) -> Dict[str, Any]:
+        """`inference.predict`, served from the cache when the inputs are unchanged."""
+        if len(patient_history) < inference.MIN_HISTORY_DAYS:
+            raise ValueError("Insufficient data. At least 8 days of history are required to generate features.")
+
+        artifacts = inference.registry.get(model_version)
+        with stage('features'):
+            feature_row = inference.feature_plan_for(artifacts).fill(patient_history)[np.newaxis, :]
+        return self._predict_row(feature_row, artifacts, patient_id, explain, top_k)
+
+    def predict_features(self, features: Dict[str, Any], model_version: Optional[str] = None,
+                         patient_id=None, explain: str = 'full',
+                         top_k: int = inference.DEFAULT_TOP_K) -> Dict[str, Any]:
+        """`inference.predict_features`, served from the cache when the features are unchanged."""
+        artifacts = inference.registry.get(model_version)
+        with stage('features'):
+            feature_row = inference.feature_plan_for(artifacts).fill_from_features(features)[np.newaxis, :]
+        return self._predict_row(feature_row, artifacts, patient_id, explain, top_k)
+
+    def _predict_row(self, feature_row, artifacts, patient_id, explain, top_k):
+        model_version = artifacts.version
+        key = self.key_for(feature_row, model_version, explain, top_k, self.model_id(artifacts))
+
+        result = self.get(key, patient_id)
+        if result is None:
+            result = inference.score_rows(
+                feature_row, model_version=model_version, explain=explain, top_k=top_k
+            )[0]
+            self.put(key, result, patient_id, model_version)
+        return result
+
+    def _insert(self, key, result, patient_id):
+        size = len(json.dumps(result))
+        with self._lock:
+            # Patients already sharing this entry keep owning it
+            owners = set()
+            if key in self._entries:
+                owners = set(self._entries[key][3])
+                self._remove(key)
+            self._entries[key] = (result, size, self._clock(), owners)
+            self._bytes += size
+            for owner in owners:
+                self._add_owner(key, owners, owner)
+            self._add_owner(key, owners, patient_id)
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+    def _add_owner(self, key, owners: set, patient_id):
+        # Caller holds the lock
+        if patient_id is not None:
+            owners.add(patient_id)
+            self._patient_keys.setdefault(patient_id, set()).add(key)
+
+    def _remove(self, key):
+        # Caller holds the lock
+        _, size, _, owners = self._entries.pop(key)
+        self._bytes -= size
+        for patient_id in owners:
+            keys = self._patient_keys.get(patient_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._patient_keys[patient_id]
@@ -0,0 +1,191 @@
+# ml_workspace/src/profiling.py
+"""
+Opt-in cProfile captures of single predictions and EEG extraction runs.
+
+Each capture is written to `PROFILE_DIR` as `<id>.pstats` (load it with
+`pstats`, snakeviz or gprof2dot) next to `<id>.json` holding its name,
+duration, caller-supplied context and a text summary of the top
+functions. Only the newest `PROFILE_MAX_FILES` captures are kept.
+
+Two ways in:
+    - `profile(name, **context)` profiles one block, e.g. a prediction an
+      admin asked to have profiled.
+    - `@sampled(name)` profiles a `PROFILE_SAMPLE_RATE` fraction of calls of
+      the decorated function. At the default rate of 0 a call costs one
+      extra comparison.
+"""
+
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import random
+import re
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# --- Configuration ---
+PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'epilepsy-profiles'))
+PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', '50'))
+# Fraction of calls to `@sampled` functions that are profiled
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+
+# Functions listed in each capture's summary
+SUMMARY_LINES = 30
+SORT_KEYS = ('cumulative', 'tottime', 'calls', 'name')
+
+# Zero-padded start time first, so ids sort oldest to newest
+_ID_PATTERN = re.compile(r'^\d{20}-[0-9a-f]{8}$')
+
+class ProfileStore:
+    """A bounded directory of profile captures; the oldest are deleted first."""
+
+    def __init__(self, directory=PROFILE_DIR, max_profiles: int = PROFILE_MAX_FILES):
+        self.directory = Path(directory)
+        self.max_profiles = max_profiles
+
+    def _path(self, profile_id: str, suffix: str) -> Optional[Path]:
+        # Ids arrive from URLs; never let one name a file outside the store
+        if not _ID_PATTERN.match(profile_id):
+            return None
+        return self.directory / f"{profile_id}{suffix}"
+
+    def save(self, name: str, profiler: cProfile.Profile, started: float, seconds: float,
+             context: Dict[str, Any]) -> str:
+        """Writes one capture and trims the store. Returns the capture's id."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profile_id = f"{int(started * 1e9):020d}-{uuid.uuid4().hex[:8]}"
+
+        summary = io.StringIO()
+        stats = pstats.Stats(profiler, stream=summary)
+        stats.sort_stats('cumulative').print_stats(SUMMARY_LINES)
+
+        pstats_path = self._path(profile_id, '.pstats')
+        stats.dump_stats(f"{pstats_path}.tmp")
+        os.replace(f"{pstats_path}.tmp", pstats_path)
+
+        meta = {
+            'id': profile_id,
+            'name': name,
+            'started_at': started,
+            'seconds': seconds,
+            'pid': os.getpid(),
+            'context': context,
+            'summary': summary.getvalue(),
+        }
+        # The metadata file is written last; a capture without one isn't listed
+        meta_path = self._path(profile_id, '.json')
+        with open(f"{meta_path}.tmp", 'w') as f:
+            json.dump(meta, f, default=str)
+        os.replace(f"{meta_path}.tmp", meta_path)
+
+        self._prune()
+        return profile_id
+
+    def _prune(self):
+        captures = sorted(self.directory.glob('*.json'))
+        for meta_path in captures[:max(0, len(captures) - self.max_profiles)]:
+            # Other processes may be pruning the same directory
+            meta_path.unlink(missing_ok=True)
+            meta_path.with_suffix('.pstats').unlink(missing_ok=True)
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Metadata of every capture, newest first, without the summaries."""
+        captures = []
+        for meta_path in sorted(self.directory.glob('*.json'), reverse=True):
+            meta = self.get(meta_path.stem)
+            if meta is not None:
+                meta.pop('summary', None)
+                captures.append(meta)
+        return captures
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        meta_path = self._path(profile_id, '.json')
+        if meta_path is None:
+            return None
+        try:
+            with open(meta_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def pstats_path(self, profile_id: str) -> Optional[Path]:
+        path = self._path(profile_id, '.pstats')
+        return path if path is not None and path.exists() else None
+
+    def report(self, profile_id: str, sort: str = 'cumulative', limit: int = SUMMARY_LINES) -> Optional[str]:
+        """The capture's top `limit` functions by `sort`, as printed by `pstats`."""
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key '{sort}'. Expected one of {SORT_KEYS}.")
+        path = self.pstats_path(profile_id)
+        if path is None:
+            return None
+        report = io.StringIO()
+        pstats.Stats(str(path), stream=report).sort_stats(sort).print_stats(limit)
+        return report.getvalue()
+
+store = ProfileStore()
+
+# cProfile can't nest, and from Python 3.12 only one profiler may run at a time
+_active = threading.Lock()
+
+class Capture:
+    """Result of a `profile` block; `profile_id` is None if it wasn't profiled."""
+
+    def __init__(self):
+        self.profile_id: Optional[str] = None
+
+@contextmanager
+def profile(name: str, profile_store: Optional[ProfileStore] = None, **context):
+    """
+    Runs the block under cProfile and saves the capture.
+
+    If another capture is already running the block runs unprofiled. When
+    the block raises, a failure to save its capture is swallowed so the
+    block's own exception is what propagates.
+
+    Yields:
+        A `Capture` whose `profile_id` is set when the block exits.
+    """
+    capture = Capture()
+    if not _active.acquire(blocking=False):
+        yield capture
+        return
+    try:
+        profiler = cProfile.Profile()
+        started = time.time()
+        began = time.perf_counter()
+        profiler.enable()
+        failed = True
+        try:
+            yield capture
+            failed = False
+        finally:
+            profiler.disable()
+            seconds = time.perf_counter() - began
+            try:
+                capture.profile_id = (profile_store or store).save(name, profiler, started, seconds, context)
+            except Exception:
+                if not failed:
+                    raise
+    finally:
+        _active.release()
+
+def sampled(name: str):
+    """Decorator: profiles a `PROFILE_SAMPLE_RATE` fraction of calls."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if PROFILE_SAMPLE_RATE <= 0 or random.random() >= PROFILE_SAMPLE_RATE:
+                return fn(*args, **kwargs)
+            with profile(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,38 @@
+# ml_workspace/src/timing.py
+"""
+Stage timers for the inference pipeline.
+
+`stage(name)` times a block and passes `(name, seconds)` to every
+registered observer, e.g. the API's metrics. With no observers the block
+runs untimed, so library use pays nothing.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Callable
+
+# Replaced, never mutated, so readers can iterate without a lock
+_observers = ()
+
+def add_observer(observer: Callable[[str, float], None]):
+    global _observers
+    if observer not in _observers:
+        _observers = _observers + (observer,)
+
+def remove_observer(observer: Callable[[str, float], None]):
+    global _observers
+    _observers = tuple(o for o in _observers if o is not observer)
+
+@contextmanager
+def stage(name: str):
+    observers = _observers
+    if not observers:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        for observer in observers:
+            observer(name, elapsed)
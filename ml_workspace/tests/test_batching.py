@@ -0,0 +1,65 @@
+# ml_workspace/tests/test_batching.py
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from ml_workspace.src.batching import MicroBatcher
+from ml_workspace.src.inference import predict
+
+def make_history(seed, days=9):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'date': pd.date_range('2025-01-01', periods=days, freq='D'),
+        'patient_id': seed,
+        'hours_of_sleep': np.round(rng.uniform(3, 10, days), 1),
+        'stress_level': rng.integers(1, 6, days),
+        'medication_taken': rng.integers(0, 2, days),
+        'eeg_feature_1': np.round(rng.uniform(60, 180, days), 2),
+        'mri_lesion_present': 1,
+    }).to_dict('records')
+
+@pytest.fixture
+def batcher():
+    batcher = MicroBatcher(max_batch_size=16, max_delay_ms=20)
+    yield batcher
+    batcher.close()
+
+def test_microbatcher_matches_predict(batcher):
+    histories = [make_history(seed) for seed in range(40)]
+    with ThreadPoolExecutor(max_workers=40) as callers:
+        results = list(callers.map(batcher.predict, histories))
+
+    assert results == [predict(history) for history in histories]
+
+    metrics = batcher.metrics()
+    assert metrics['requests'] == 40
+    assert metrics['batches'] < 40
+    assert metrics['max_batch_size'] <= 16
+    assert metrics['queue_depth'] == 0
+
+def test_microbatcher_isolates_bad_requests(batcher):
+    good = batcher.submit(make_history(1))
+    bad = batcher.submit(make_history(2, days=3))
+
+    assert good.result() == predict(make_history(1))
+    with pytest.raises(ValueError, match="Insufficient data"):
+        bad.result()
+
+def test_microbatcher_survives_cancelled_requests_in_a_failing_batch():
+    # A long delay leaves time to cancel the request before its batch is scored
+    batcher = MicroBatcher(max_delay_ms=200)
+    try:
+        cancelled = batcher.submit(make_history(1), model_version='v404')
+        assert cancelled.cancel()
+
+        assert batcher.submit(make_history(2)).result(timeout=5) == predict(make_history(2))
+        with pytest.raises(ValueError, match="Unknown model version"):
+            batcher.submit(make_history(3), model_version='v404').result(timeout=5)
+    finally:
+        batcher.close()
+
+    with pytest.raises(RuntimeError, match="closed"):
+        batcher.submit(make_history(4))
@@ -0,0 +1,31 @@
+# ml_workspace/tests/test_benchmarks.py
+
+import json
+
+from ml_workspace.benchmarks import suite
+
+def test_run_writes_report(tmp_path):
+    """A filtered run produces one summary per selected case and valid JSON."""
+    report = suite.run('quick', groups=['ml'], only='detect_spikes_multichannel*', min_time=0, log=lambda _: None)
+
+    assert [r['key'] for r in report['results']] == [
+        'detect_spikes_multichannel[channels=1]',
+        'detect_spikes_multichannel[channels=23]',
+    ]
+    result = report['results'][0]
+    assert result['repeats'] >= 3
+    assert result['min_s'] <= result['median_s']
+    assert report['meta']['scale'] == 'quick'
+
+    path = tmp_path / 'report.json'
+    path.write_text(json.dumps(report))
+    assert suite.main(['compare', str(path), str(path)]) == 0
+
+def test_compare_flags_regressions():
+    def report(**medians):
+        return {'results': [{'key': key, 'median_s': value} for key, value in medians.items()]}
+
+    rows = suite.compare(report(a=1.0, b=1.3, c=0.5), report(a=1.0, b=1.0, d=2.0), threshold=0.2)
+
+    assert [(row['key'], row['regression']) for row in rows] == [('a', False), ('b', True)]
+    assert rows[1]['ratio'] == 1.3
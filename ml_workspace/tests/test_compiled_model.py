@@ -0,0 +1,67 @@
+# ml_workspace/tests/test_compiled_model.py
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+import xgboost as xgb
+
+from ml_workspace.src import inference
+from ml_workspace.src.compiled_model import CompiledModel, export_model
+from ml_workspace.src.model_registry import ModelRegistry
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.mark.parametrize("version", ['v1.0', 'v2.0'])
+def test_compiled_model_matches_booster(version, tmp_path):
+    """NumPy evaluation and contributions agree with the booster, including missing values."""
+    model_path = os.path.join(inference.MODELS_DIR, f'xgb_model_{version}.json')
+    booster = xgb.Booster()
+    booster.load_model(model_path)
+    compiled = CompiledModel.load(export_model(model_path, str(tmp_path / 'model.npz')))
+
+    rng = np.random.default_rng(0)
+    X = rng.uniform(0, 200, (2000, len(booster.feature_names)))
+    X[:, :3] = rng.integers(0, 11, (2000, 3))
+    X[rng.random(X.shape) < 0.1] = np.nan
+
+    dmatrix = xgb.DMatrix(X, feature_names=booster.feature_names)
+    np.testing.assert_allclose(compiled.predict(X), booster.predict(dmatrix), rtol=0, atol=1e-6)
+    assert compiled.feature_names == booster.feature_names
+
+    # The last column of pred_contribs is the bias
+    expected = booster.predict(dmatrix, pred_contribs=True)[:, :-1]
+    np.testing.assert_allclose(compiled.contributions(X, X.shape[1]), expected, rtol=0, atol=1e-5)
+
+def test_shipped_archives_are_current():
+    """The committed archives were exported from the committed model files."""
+    registry = ModelRegistry(inference.MODELS_DIR)
+    for version in registry.available_versions():
+        assert registry.get(version).compiled is not None, version
+
+def test_registry_ignores_archive_from_other_model(tmp_path):
+    """An archive compiled from a different model file falls back to the booster."""
+    for name in ('xgb_model_v1.0.json', 'shap_explainer_v1.0.joblib'):
+        os.symlink(os.path.join(inference.MODELS_DIR, name), tmp_path / name)
+    export_model(os.path.join(inference.MODELS_DIR, 'xgb_model_v2.0.json'), str(tmp_path / 'compiled_model_v1.0.npz'))
+
+    entry = ModelRegistry(str(tmp_path)).get('v1.0')
+    assert entry.compiled is None
+    assert 'eeg_lag_1' in entry.feature_names
+
+def test_scoring_and_explaining_skip_xgboost():
+    """Every explain mode is served by the compiled model without importing xgboost or pandas."""
+    script = (
+        "import sys\n"
+        "from ml_workspace.src import inference\n"
+        "history = [dict(hours_of_sleep=7.0, stress_level=2, medication_taken=1,\n"
+        "                eeg_feature_1=100.0, mri_lesion_present=1)] * 9\n"
+        "for explain in inference.EXPLAIN_MODES:\n"
+        "    result = inference.predict(history, explain=explain)\n"
+        "    assert 0.0 <= result['risk_score'] <= 1.0\n"
+        "assert len(result['feature_contributions']) == len(inference.registry.get().feature_names)\n"
+        "assert 'xgboost' not in sys.modules and 'pandas' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, '-c', script], cwd=REPO_ROOT, check=True)
@@ -0,0 +1,99 @@
+# ml_workspace/tests/test_edf_reader.py
+
+import pytest
+import numpy as np
+
+from ml_workspace.src.edf_reader import (
+    EDFRecording,
+    extract_recording_features,
+    summarize_features,
+    write_features,
+)
+from ml_workspace.src.eeg_features import calculate_band_powers, epoch_signal
+
+SF = 256
+RECORD_SEC = 1
+
+def write_edf(path, signals, labels, phys_range=(-500.0, 500.0), dig_range=(-32768, 32767)):
+    """Writes a minimal EDF file with microvolt channels sampled at SF."""
+    n_signals, n_samples = signals.shape
+    n_records = n_samples // (SF * RECORD_SEC)
+    phys_min, phys_max = phys_range
+    dig_min, dig_max = dig_range
+    gain = (phys_max - phys_min) / (dig_max - dig_min)
+    digital = np.round((signals - phys_min) / gain + dig_min).astype('<i2')
+
+    def pad(value, width):
+        return str(value).ljust(width)[:width]
+
+    header = (
+        pad('0', 8) + pad('patient', 80) + pad('recording', 80)
+        + pad('01.01.25', 8) + pad('10.00.00', 8)
+        + pad(256 * (n_signals + 1), 8) + pad('', 44)
+        + pad(n_records, 8) + pad(RECORD_SEC, 8) + pad(n_signals, 4)
+    )
+    fields = [
+        (labels, 16), (['AgAgCl'] * n_signals, 80), (['uV'] * n_signals, 8),
+        ([phys_min] * n_signals, 8), ([phys_max] * n_signals, 8),
+        ([dig_min] * n_signals, 8), ([dig_max] * n_signals, 8),
+        (['HP:0.1Hz'] * n_signals, 80), ([SF * RECORD_SEC] * n_signals, 8), ([''] * n_signals, 32),
+    ]
+    for values, width in fields:
+        header += ''.join(pad(v, width) for v in values)
+
+    records = digital[:, :n_records * SF * RECORD_SEC].reshape(n_signals, n_records, -1)
+    with open(path, 'wb') as f:
+        f.write(header.encode('latin-1'))
+        f.write(records.transpose(1, 0, 2).tobytes())
+    return digital * gain + phys_min - dig_min * gain
+
+@pytest.fixture
+def edf_file(tmp_path):
+    rng = np.random.default_rng(3)
+    signals = rng.normal(scale=50.0, size=(2, 10 * SF))
+    path = tmp_path / 'chb99_01.edf'
+    expected = write_edf(path, signals, ['FP1-F7', 'F7-T7'])
+    return path, expected * 1e-6
+
+def test_edf_recording_reads_header_and_samples(edf_file):
+    path, expected = edf_file
+    recording = EDFRecording(path)
+
+    assert recording.channel_names == ['FP1-F7', 'F7-T7']
+    assert recording.sampling_frequency('FP1-F7') == SF
+    assert recording.n_samples() == 10 * SF
+    assert recording.start_datetime.year == 2025
+
+    np.testing.assert_allclose(recording.read(), expected)
+    # A range straddling record boundaries decodes only what was asked for
+    np.testing.assert_allclose(recording.read(['F7-T7'], 300, 900), expected[1:, 300:900])
+
+def test_iter_windows_matches_full_epoching(edf_file):
+    path, expected = edf_file
+    recording = EDFRecording(path)
+
+    blocks = list(recording.iter_windows(window_sec=2, hop_sec=1, block_windows=3))
+    start_times = np.concatenate([t for t, _ in blocks])
+    epochs = np.concatenate([e for _, e in blocks])
+
+    expected_epochs, expected_starts = epoch_signal(expected, SF, window_sec=2, hop_sec=1)
+    assert max(e.shape[0] for _, e in blocks) == 3
+    np.testing.assert_array_equal(start_times, expected_starts)
+    np.testing.assert_allclose(epochs, expected_epochs)
+
+def test_extract_and_write_features(edf_file, tmp_path):
+    path, expected = edf_file
+    features = extract_recording_features(path, window_sec=2, block_windows=2)
+
+    assert len(features) == 5 * 2
+    assert list(features['channel'][:2]) == ['FP1-F7', 'F7-T7']
+    expected_powers = calculate_band_powers(epoch_signal(expected, SF, 2)[0], SF)[..., 1]
+    np.testing.assert_allclose(features['rel_power_alpha'], expected_powers[..., 2].ravel())
+
+    summary = summarize_features(features, 'chb99', '2025-01-01')
+    assert list(summary.columns[:3]) == ['patient_id', 'date', 'rel_power_delta_mean']
+    assert 'spike_count_sum' in summary.columns
+
+    output = tmp_path / 'patient_99_eeg_features.csv'
+    write_features(summary, output)
+    assert output.read_text().startswith('patient_id,date,rel_power_delta_mean')
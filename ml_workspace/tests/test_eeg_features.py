@@ -0,0 +1,138 @@
+# ml_workspace/tests/test_eeg_features.py
+
+import pytest
+import numpy as np
+
+from ml_workspace.src.eeg_features import (
+    BANDS,
+    SPIKE_DTYPE,
+    StreamingEEGFeatureExtractor,
+    calculate_band_power,
+    calculate_band_powers,
+    detect_spikes,
+    detect_spikes_multichannel,
+    epoch_signal,
+)
+
+SF = 256
+
+@pytest.fixture
+def multichannel_windows():
+    """Provides 4 windows x 3 channels x 2 seconds of synthetic EEG."""
+    rng = np.random.default_rng(42)
+    t = np.arange(2 * SF) / SF
+    alpha = np.sin(2 * np.pi * 10 * t)
+    return rng.normal(size=(4, 3, 2 * SF)) + alpha
+
+def test_calculate_band_powers_matches_single_band(multichannel_windows):
+    """The batched engine must agree with calculate_band_power for every band."""
+    powers = calculate_band_powers(multichannel_windows, SF, BANDS)
+    assert powers.shape == (4, 3, len(BANDS), 2)
+
+    for w in range(multichannel_windows.shape[0]):
+        for ch in range(multichannel_windows.shape[1]):
+            window = multichannel_windows[w, ch]
+            for i, band in enumerate(BANDS.values()):
+                absolute = calculate_band_power(window, SF, band)
+                relative = calculate_band_power(window, SF, band, relative=True)
+                assert powers[w, ch, i, 0] == pytest.approx(absolute)
+                assert powers[w, ch, i, 1] == pytest.approx(relative)
+
+def test_calculate_band_powers_flat_signal():
+    """A silent channel has zero relative power instead of dividing by zero."""
+    powers = calculate_band_powers(np.zeros((2, SF)), SF)
+    assert np.all(powers == 0.0)
+
+def test_epoch_signal_is_a_view():
+    """Non-overlapping windows share memory with the raw signal and drop the tail."""
+    signal = np.arange(3 * 1000, dtype=float).reshape(3, 1000)
+    epochs, start_times = epoch_signal(signal, SF, window_sec=1)
+
+    assert epochs.shape == (3, 3, SF)
+    assert np.shares_memory(epochs, signal)
+    np.testing.assert_array_equal(epochs[1, 2], signal[2, SF:2 * SF])
+    np.testing.assert_array_equal(start_times, [0.0, 1.0, 2.0])
+
+def test_epoch_signal_overlap_and_padding():
+    """Overlapping windows with tail='pad' cover the whole recording."""
+    signal = np.ones(1000)
+    epochs, start_times = epoch_signal(signal, SF, window_sec=1, hop_sec=0.5, tail='pad')
+
+    assert epochs.shape == (7, SF)
+    np.testing.assert_array_equal(start_times, np.arange(7) * (SF // 2) / SF)
+    assert epochs[-1, -1] == 0.0
+
+def test_epochs_feed_feature_functions(multichannel_windows):
+    """Windowed arrays go straight into calculate_band_power and detect_spikes."""
+    signal = multichannel_windows[0]
+    epochs, _ = epoch_signal(signal, SF, window_sec=0.5)
+
+    powers = calculate_band_power(epochs, SF, BANDS['alpha'], relative=True)
+    spikes = detect_spikes(epochs, SF)
+    assert powers.shape == spikes.shape == (4, 3)
+    assert powers[2, 1] == pytest.approx(
+        calculate_band_power(epochs[2, 1], SF, BANDS['alpha'], relative=True)
+    )
+    assert spikes[3, 0] == detect_spikes(epochs[3, 0], SF)
+
+@pytest.mark.parametrize("segment_sec", [None, 0.5])
+def test_streaming_extractor_matches_batch(segment_sec):
+    """Arbitrary chunking of a stream gives the same features as the batch path."""
+    rng = np.random.default_rng(7)
+    signal = rng.normal(size=(3, 10 * SF))
+    signal[:, 1000] += 25  # a clear spike
+
+    extractor = StreamingEEGFeatureExtractor(
+        SF, n_channels=3, window_sec=2, hop_sec=1, segment_sec=segment_sec,
+        prominence=0.7, width=2,
+    )
+    results = []
+    start = 0
+    while start < signal.shape[1]:
+        size = int(rng.integers(1, 600))
+        results.extend(extractor.push(signal[:, start:start + size]))
+        start += size
+
+    epochs, start_times = epoch_signal(signal, SF, window_sec=2, hop_sec=1)
+    expected_powers = calculate_band_powers(epochs, SF, BANDS, window_sec=segment_sec)
+    expected_spikes = detect_spikes(epochs, SF, prominence=0.7, width=2)
+
+    assert [r['window_start_time'] for r in results] == list(start_times)
+    np.testing.assert_allclose([r['band_powers'] for r in results], expected_powers)
+    np.testing.assert_array_equal([r['spike_counts'] for r in results], expected_spikes)
+    assert expected_spikes.sum() > 0
+
+@pytest.mark.parametrize("prefilter", [True, False])
+def test_detect_spikes_multichannel_matches_per_window(multichannel_windows, prefilter):
+    """One-pass detection agrees with detect_spikes run on every trace."""
+    data = multichannel_windows.copy()
+    data[1, 2, 200:204] += 12  # a spike wide enough to pass width=2
+    data[3, 0, 0:3] += 12      # a bump at the very start of a window
+
+    counts, spikes = detect_spikes_multichannel(data, SF, prominence=0.7, width=2, prefilter=prefilter)
+    expected = np.array([
+        [detect_spikes(data[w, ch], SF, prominence=0.7, width=2) for ch in range(data.shape[1])]
+        for w in range(data.shape[0])
+    ])
+
+    np.testing.assert_array_equal(counts, expected)
+    assert spikes.dtype == SPIKE_DTYPE
+    assert len(spikes) == counts.sum()
+    np.testing.assert_array_equal(
+        np.bincount(spikes['window'] * data.shape[1] + spikes['channel'], minlength=counts.size),
+        counts.ravel(),
+    )
+    hit = spikes[(spikes['window'] == 1) & (spikes['channel'] == 2)]
+    assert np.any((hit['sample'] >= 200) & (hit['sample'] < 204))
+    assert hit['amplitude'].max() == pytest.approx(data[1, 2, 200:204].max())
+
+def test_detect_spikes_multichannel_pooled_baseline(multichannel_windows):
+    """A rolling baseline of one window is the per-window baseline."""
+    per_window, _ = detect_spikes_multichannel(multichannel_windows, SF)
+    rolling, _ = detect_spikes_multichannel(multichannel_windows, SF, baseline=1)
+    pooled, _ = detect_spikes_multichannel(multichannel_windows, SF, baseline='channel')
+
+    np.testing.assert_array_equal(per_window, rolling)
+    assert pooled.shape == per_window.shape
+    with pytest.raises(ValueError, match="Unknown baseline"):
+        detect_spikes_multichannel(multichannel_windows, SF, baseline='median')
@@ -0,0 +1,73 @@
+# ml_workspace/tests/test_extract_features.py
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from ml_workspace.src import profiling
+from ml_workspace.src.extract_features import DEFAULT_PARAMS, main, process_recording, run
+from ml_workspace.tests.test_edf_reader import SF, write_edf
+
+def make_recordings(directory, names):
+    rng = np.random.default_rng(11)
+    directory.mkdir()
+    for name in names:
+        write_edf(directory / f'{name}.edf', rng.normal(scale=40.0, size=(2, 8 * SF)), ['FP1-F7', 'F7-T7'])
+
+def test_run_writes_outputs_and_skips_up_to_date(tmp_path):
+    raw_dir, out_dir = tmp_path / 'raw', tmp_path / 'processed'
+    make_recordings(raw_dir, ['chb01_01', 'chb01_02'])
+
+    stats = run(raw_dir, out_dir, workers=2, window_sec=2)
+    assert stats['recordings_processed'] == 2
+    assert stats['samples'] == 2 * 2 * 8 * SF
+    assert stats['samples_per_second'] > 0
+
+    summary = pd.read_csv(out_dir / 'chb01_01_eeg_features.csv')
+    assert summary.loc[0, 'patient_id'] == 'chb01'
+    assert 'rel_power_gamma_std' in summary.columns
+    # No temporary files from `atomic_output` are left behind
+    assert sorted(os.listdir(out_dir)) == [
+        '.eeg_features_manifest.json', 'chb01_01_eeg_features.csv', 'chb01_02_eeg_features.csv'
+    ]
+
+    # Nothing changed: every output is reused
+    stats = run(raw_dir, out_dir, workers=2, window_sec=2)
+    assert stats['recordings_processed'] == 0
+    assert stats['recordings_skipped'] == 2
+
+    # Touching one recording or changing parameters triggers reprocessing
+    source = raw_dir / 'chb01_02.edf'
+    os.utime(source, ns=(source.stat().st_atime_ns, source.stat().st_mtime_ns + 10**9))
+    assert run(raw_dir, out_dir, workers=2, window_sec=2)['recordings_processed'] == 1
+    assert run(raw_dir, out_dir, workers=2, window_sec=4)['recordings_processed'] == 2
+
+def test_main_per_window_hash_check(tmp_path, capsys):
+    raw_dir, out_dir = tmp_path / 'raw', tmp_path / 'processed'
+    make_recordings(raw_dir, ['chb02_01'])
+
+    argv = [str(raw_dir), str(out_dir), '--workers', '1', '--window-sec', '2', '--per-window', '--check', 'hash']
+    assert main(argv) == 0
+    assert 'recordings/s' in capsys.readouterr().out
+
+    per_window = pd.read_csv(out_dir / 'chb02_01_eeg_features.csv')
+    assert len(per_window) == 4 * 2
+    assert main(argv) == 0
+    assert '0 recordings (1 up to date' in capsys.readouterr().out
+
+def test_process_recording_profile(tmp_path, monkeypatch):
+    raw_dir = tmp_path / 'raw'
+    make_recordings(raw_dir, ['chb01_01'])
+    store = profiling.ProfileStore(tmp_path / 'profiles')
+    monkeypatch.setattr(profiling, 'store', store)
+
+    samples = process_recording(
+        str(raw_dir / 'chb01_01.edf'), str(tmp_path / 'out.csv'), {**DEFAULT_PARAMS, 'window_sec': 2}, profile=True
+    )
+
+    assert samples == 2 * 8 * SF
+    assert [(meta['name'], meta['context']['recording']) for meta in store.list()] == [
+        ('extract_features', 'chb01_01.edf')
+    ]
+    assert 'extract_recording_features' in store.report(store.list()[0]['id'], limit=100)
@@ -0,0 +1,163 @@
+# ml_workspace/tests/test_feature_spec.py
+
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml_workspace.src import inference
+from ml_workspace.src.feature_spec import FeaturePlan, feature_definitions, feature_spec_path_for, validate_spec
+from ml_workspace.src.model_registry import ModelRegistry
+
+def make_history(n_days, seed=0):
+    rng = np.random.default_rng(seed)
+    history = pd.DataFrame({
+        'date': pd.date_range('2025-01-01', periods=n_days, freq='D'),
+        'hours_of_sleep': np.round(rng.uniform(3, 10, n_days), 1),
+        'stress_level': rng.integers(1, 6, n_days),
+        'medication_taken': rng.integers(0, 2, n_days),
+        'eeg_feature_1': np.round(rng.uniform(60, 180, n_days), 2),
+        'mri_lesion_present': 1,
+    }).to_dict('records')
+    # A missing reading the day before
+    history[max(n_days - 2, 0)]['eeg_feature_1'] = None
+    return history
+
+@pytest.mark.parametrize("version", inference.registry.available_versions())
+def test_every_model_ships_a_matching_spec(version):
+    artifacts = inference.registry.get(version)
+    assert os.path.exists(feature_spec_path_for(artifacts.model_path))
+    assert artifacts.feature_plan.feature_names == list(artifacts.feature_names)
+    assert artifacts.feature_plan.version == version
+
+@pytest.mark.parametrize("version", ['v1.0', 'v2.0'])
+@pytest.mark.parametrize("n_days", [2, 8, 30])
+def test_plan_matches_feature_definitions(version, n_days):
+    """The compiled plan builds exactly what the model saw in float32."""
+    artifacts = inference.registry.get(version)
+    history = make_history(n_days, seed=n_days)
+
+    frame = inference.create_features(pd.DataFrame(history), plan=artifacts.feature_plan)
+    expected = frame.iloc[-1][artifacts.feature_names].to_numpy(dtype=float).astype(np.float32)
+    out = np.full(len(artifacts.feature_plan), -1, dtype=np.float32)
+    row = artifacts.feature_plan.fill(history, out)
+
+    assert row is out
+    np.testing.assert_array_equal(row, expected)
+
+def test_single_day_has_missing_lags():
+    plan = inference.registry.get('v1.0').feature_plan
+    history = make_history(1)
+    history[0]['eeg_feature_1'] = 100.0
+    row = plan.fill(history)
+    lagged = [i for i, feature in enumerate(plan.spec['features']) if feature.get('lag')]
+    assert np.isnan(row[lagged]).all()
+    assert not np.isnan(np.delete(row, lagged)).any()
+
+def test_fill_matrix_and_fill_from_features():
+    plan = inference.registry.get('v2.0').feature_plan
+    histories = [make_history(10, seed=i) for i in range(3)]
+
+    X = plan.fill_matrix(histories)
+    assert X.dtype == np.float32 and X.shape == (3, len(plan))
+    np.testing.assert_array_equal(X[1], plan.fill(histories[1]))
+
+    features = dict(zip(plan.feature_names, X[0].tolist()))
+    features['stress_level'] = None
+    row = plan.fill_from_features(features)
+    assert np.isnan(row[plan.feature_names.index('stress_level')])
+
+def test_spec_drives_features_without_code_changes(tmp_path, monkeypatch):
+    """A new version is a model file plus its spec; inference code is untouched."""
+    for name in os.listdir(inference.MODELS_DIR):
+        if 'v2.0' in name and not name.startswith('compiled_model'):
+            shutil.copy(os.path.join(inference.MODELS_DIR, name), tmp_path / name.replace('v2.0', 'v9.0'))
+    spec_path = tmp_path / 'feature_spec_v9.0.json'
+    spec = json.loads(spec_path.read_text())
+    spec['version'] = 'v9.0'
+    # Same column, now a 3-day instead of a 7-day average
+    for feature in spec['features']:
+        if feature['name'] == 'hours_of_sleep_7day_avg':
+            feature['window'] = 3
+    spec_path.write_text(json.dumps(spec))
+    monkeypatch.setattr(inference, 'registry', ModelRegistry(str(tmp_path), default_version='v9.0'))
+
+    history = make_history(10)
+    plan = inference.registry.get().feature_plan
+    row = plan.fill(history)
+    assert row[plan.feature_names.index('hours_of_sleep_7day_avg')] == np.float32(
+        np.mean([day['hours_of_sleep'] for day in history[-3:]])
+    )
+    assert inference.predict(history)['risk_score'] == inference.score_rows(row[np.newaxis])[0]['risk_score']
+
+def test_create_features_follows_shipped_specs():
+    history = pd.DataFrame(make_history(10))
+    frame = inference.create_features(history)
+    for version in inference.registry.available_versions():
+        assert set(inference.registry.get(version).feature_names) <= set(frame.columns)
+
+    grouped = inference.create_features(pd.concat([history.assign(patient_id=1), history.assign(patient_id=2)]),
+                                        by='patient_id')
+    np.testing.assert_array_equal(grouped['sleep_lag_1'].to_numpy()[10:], frame['sleep_lag_1'].to_numpy())
+
+def test_spec_less_model_uses_shipped_definitions(tmp_path):
+    shutil.copy(os.path.join(inference.MODELS_DIR, 'xgb_model_v2.0.json'), tmp_path / 'xgb_model_v2.0.json')
+    artifacts = ModelRegistry(str(tmp_path), use_compiled=False).get('v2.0')
+    assert artifacts.feature_plan is None
+
+    plan = inference.feature_plan_for(artifacts)
+    assert plan.spec['features'] == inference.registry.get('v2.0').feature_plan.spec['features']
+
+def test_conflicting_definitions_are_rejected():
+    spec = json.loads(open(feature_spec_path_for(inference.registry.get('v2.0').model_path)).read())
+    changed = json.loads(json.dumps(spec))
+    changed['features'][-1]['window'] = 3
+    with pytest.raises(ValueError, match="defined differently"):
+        feature_definitions([spec, changed])
+    assert FeaturePlan(spec).digest != FeaturePlan(changed).digest
+
+def test_mismatched_spec_is_rejected(tmp_path):
+    for name in ('xgb_model_v1.0.json', 'feature_spec_v1.0.json'):
+        shutil.copy(os.path.join(inference.MODELS_DIR, name), tmp_path / name)
+    spec = json.loads((tmp_path / 'feature_spec_v1.0.json').read_text())
+    spec['features'].reverse()
+    (tmp_path / 'feature_spec_v1.0.json').write_text(json.dumps(spec))
+
+    with pytest.raises(RuntimeError, match="the model expects"):
+        ModelRegistry(str(tmp_path), use_compiled=False).get('v1.0')
+
+def test_eeg_aggregates():
+    spec = {
+        'format': 1,
+        'version': 'eeg-demo',
+        'inputs': ['hours_of_sleep'],
+        'eeg_aggregates': ['rel_power_alpha_mean', 'spike_count_sum'],
+        'features': [
+            {'name': 'hours_of_sleep', 'source': 'hours_of_sleep'},
+            {'name': 'alpha_3d', 'source': 'rel_power_alpha_mean', 'window': 3},
+            {'name': 'spikes_yesterday', 'source': 'spike_count_sum', 'lag': 1},
+        ],
+    }
+    history = [
+        {'hours_of_sleep': 7.0, 'rel_power_alpha_mean': alpha, 'spike_count_sum': spikes}
+        for alpha, spikes in [(0.1, 4), (0.2, 6), (None, 2), (0.4, 1)]
+    ]
+
+    row = FeaturePlan(spec).fill(history)
+
+    np.testing.assert_array_equal(row, np.float32([7.0, np.mean([0.2, 0.4]), 2]))
+
+@pytest.mark.parametrize("change, message", [
+    ({'format': 2}, "format"),
+    ({'eeg_aggregates': ['alpha_power']}, "EEG summary column"),
+    ({'features': [{'name': 'x', 'source': 'missing'}]}, "not a declared input"),
+    ({'features': [{'name': 'x', 'source': 'a', 'window': 0}]}, "window >= 1"),
+    ({'features': []}, "at least one feature"),
+])
+def test_invalid_specs(change, message):
+    spec = {'format': 1, 'version': 'v', 'inputs': ['a'], 'features': [{'name': 'a', 'source': 'a'}], **change}
+    with pytest.raises(ValueError, match=message):
+        validate_spec(spec)
@@ -1,11 +1,21 @@
 # ml_workspace/tests/test_inference.py
 
 import pytest
+import numpy as np
 import pandas as pd
+import xgboost as xgb
 from datetime import datetime, timedelta
 
 # Import the functions from your inference script
-from ml_workspace.src.inference import create_features, predict
+from ml_workspace.src.inference import (
+    create_features,
+    predict,
+    predict_batch,
+    predict_features,
+    registry,
+)
+from ml_workspace.src import inference, timing
+from ml_workspace.src.model_registry import ModelRegistry
 
 @pytest.fixture
 def sample_raw_data():
@@ -64,4 +74,114 @@ def test_predict_insufficient_data():
     short_history = [{'date': '2025-01-01', 'hours_of_sleep': 7}] * 5
     
     with pytest.raises(ValueError, match="Insufficient data"):
-        predict(short_history)
\ No newline at end of file
+        predict(short_history)
+
+def test_predict_batch_matches_predict(sample_raw_data):
+    """Batch scoring returns exactly what per-patient predict returns, in order."""
+    records = sample_raw_data.to_dict('records')
+    other = sample_raw_data.assign(
+        patient_id=2,
+        hours_of_sleep=sample_raw_data['hours_of_sleep'][::-1].values,
+        stress_level=[5, 4, 4, 3, 5, 2, 1, 1, 3, 4],
+    ).to_dict('records')
+    histories = [records, other[:8], records[1:]]
+
+    results = predict_batch(histories)
+
+    assert results == [predict(history) for history in histories]
+    assert predict_batch([]) == []
+
+def test_predict_batch_insufficient_data(sample_raw_data):
+    """A short history anywhere in the batch is rejected."""
+    records = sample_raw_data.to_dict('records')
+    with pytest.raises(ValueError, match="Insufficient data for history 1"):
+        predict_batch([records, records[:5]])
+
+@pytest.mark.parametrize("n_days", [8, 10, 45])
+def test_feature_plan_matches_pandas_pipeline(n_days):
+    """The version's feature plan reproduces the last row of create_features."""
+    rng = np.random.default_rng(n_days)
+    history = pd.DataFrame({
+        'date': pd.date_range('2025-01-01', periods=n_days, freq='D'),
+        'patient_id': 1,
+        'hours_of_sleep': np.round(rng.uniform(3, 10, n_days), 1),
+        'stress_level': rng.integers(1, 6, n_days),
+        'medication_taken': rng.integers(0, 2, n_days),
+        'eeg_feature_1': np.round(rng.uniform(60, 180, n_days), 2),
+        'mri_lesion_present': 1,
+    }).to_dict('records')
+    plan = registry.get().feature_plan
+
+    expected = create_features(pd.DataFrame(history), plan=plan).iloc[-1][plan.feature_names].to_numpy(dtype=float)
+
+    # Identical at the float32 precision XGBoost evaluates in
+    np.testing.assert_array_equal(plan.fill(history), expected.astype(np.float32))
+    assert predict(history) == predict(history, use_pandas=True)
+
+
+def test_predict_explain_modes(sample_raw_data):
+    """'top_k' is the head of the 'full' ranking and 'none' skips contributions."""
+    history = sample_raw_data.to_dict('records')
+
+    full = predict(history, explain='full')
+    top = predict(history, explain='top_k', top_k=3)
+    bare = predict(history, explain='none')
+
+    assert top['risk_score'] == full['risk_score'] == bare['risk_score']
+    assert list(top['feature_contributions'].items()) == list(full['feature_contributions'].items())[:3]
+    assert bare['feature_contributions'] == {}
+    assert predict_batch([history], explain='top_k', top_k=3) == [top]
+
+    with pytest.raises(ValueError, match="Unknown explain mode"):
+        predict(history, explain='some')
+
+def test_contributions_sum_to_margin(sample_raw_data):
+    """Native contributions plus the bias add up to the model's log-odds."""
+    history = sample_raw_data.to_dict('records')
+    result = predict(history)
+
+    artifacts = registry.get()
+    dmatrix = xgb.DMatrix(artifacts.feature_plan.fill(history)[np.newaxis, :],
+                          feature_names=artifacts.feature_names)
+    margin = artifacts.model.predict(dmatrix, output_margin=True)[0]
+    bias = artifacts.model.predict(dmatrix, pred_contribs=True)[0, -1]
+
+    total = bias + sum(result['feature_contributions'].values())
+    # Each contribution is rounded to 4 decimals
+    assert total == pytest.approx(margin, abs=5e-5 * len(artifacts.feature_names))
+
+def test_predict_v2_without_explainer(sample_raw_data):
+    """v2.0 predictions no longer depend on unpickling its SHAP explainer."""
+    result = predict(sample_raw_data.to_dict('records'), model_version='v2.0')
+
+    assert set(result['feature_contributions']) == set(registry.get('v2.0').feature_names)
+
+def test_predict_features_matches_predict(sample_raw_data):
+    """Scoring precomputed features skips engineering but gives the same result."""
+    history = sample_raw_data.to_dict('records')
+    features = create_features(sample_raw_data).iloc[-1].to_dict()
+
+    assert predict_features(features) == predict(history, use_pandas=True)
+
+@pytest.mark.parametrize("use_compiled, none_expected, full_expected", [
+    (True, ['features', 'predict'], ['features', 'predict', 'shap']),
+    (False, ['features', 'dmatrix', 'predict'], ['features', 'dmatrix', 'predict', 'shap']),
+])
+def test_predict_reports_stage_timings(sample_raw_data, monkeypatch, use_compiled, none_expected, full_expected):
+    """Registered observers see each pipeline stage once per prediction."""
+    # Pin the scoring path; the stages differ between the compiled model and the booster
+    monkeypatch.setattr(inference, 'registry', ModelRegistry(inference.MODELS_DIR, use_compiled=use_compiled))
+    seen = []
+    observer = lambda name, seconds: seen.append((name, seconds))
+    timing.add_observer(observer)
+    try:
+        predict(sample_raw_data.to_dict('records'), explain='none')
+        none_stages = [name for name, _ in seen]
+        seen.clear()
+        predict(sample_raw_data.to_dict('records'))
+    finally:
+        timing.remove_observer(observer)
+
+    assert none_stages == none_expected
+    assert [name for name, _ in seen] == full_expected
+    assert all(seconds >= 0 for _, seconds in seen)
@@ -0,0 +1,57 @@
+# ml_workspace/tests/test_model_registry.py
+
+import os
+import shutil
+import threading
+
+import pytest
+
+from ml_workspace.src import inference
+from ml_workspace.src.model_registry import ModelRegistry
+
+@pytest.fixture
+def models_dir(tmp_path):
+    """A private copy of the shipped model artifacts."""
+    for name in os.listdir(inference.MODELS_DIR):
+        shutil.copy(os.path.join(inference.MODELS_DIR, name), tmp_path / name)
+    return tmp_path
+
+def test_registry_loads_lazily_and_evicts_lru(models_dir):
+    registry = ModelRegistry(str(models_dir), max_loaded=1)
+    assert registry.available_versions() == ['v1.0', 'v2.0']
+    assert registry.loaded_versions() == []
+
+    v1 = registry.get()
+    assert 'eeg_lag_1' in v1.feature_names
+    assert registry.get('v1.0') is v1
+
+    v2 = registry.get('v2.0')
+    assert 'hours_of_sleep_7day_avg' in v2.feature_names
+    assert registry.loaded_versions() == ['v2.0']
+
+    with pytest.raises(ValueError, match="Unknown model version"):
+        registry.get('v9.9')
+    with pytest.raises(ValueError, match="Unknown model version"):
+        registry.reload('v9.8')
+    # Unknown versions leave nothing behind
+    assert set(registry._version_locks) == {'v1.0', 'v2.0'}
+
+def test_registry_hot_reloads_changed_artifacts(models_dir):
+    registry = ModelRegistry(str(models_dir), check_interval=0)
+    first = registry.get('v1.0')
+    assert registry.get('v1.0') is first
+
+    model_path = models_dir / 'xgb_model_v1.0.json'
+    stat = model_path.stat()
+    os.utime(model_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert registry.get('v1.0') is not first
+
+def test_registry_concurrent_first_use_loads_once(models_dir):
+    registry = ModelRegistry(str(models_dir))
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(entry) for entry in results}) == 1
@@ -0,0 +1,119 @@
+# ml_workspace/tests/test_prediction_cache.py
+
+import json
+import os
+import shutil
+
+from ml_workspace.src import inference
+from ml_workspace.src.inference import predict
+from ml_workspace.src.model_registry import ModelRegistry
+from ml_workspace.src.prediction_cache import PredictionCache
+from ml_workspace.tests.test_batching import make_history
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_cache_hits_on_unchanged_history():
+    cache = PredictionCache()
+    history = make_history(1, days=12)
+
+    first = cache.predict(history, patient_id=1)
+    assert first == predict(history)
+    # Older days outside the feature window don't change the key
+    assert cache.predict(history[2:], patient_id=1) is first
+    assert cache.stats()['hits'] == 1
+
+    # A new day changes the features and misses
+    changed = history[:-1] + [dict(history[-1], stress_level=5)]
+    assert cache.predict(changed, patient_id=1) == predict(changed)
+    assert cache.stats()['misses'] == 2
+
+def test_cache_ttl_lru_and_invalidation():
+    clock = FakeClock()
+    cache = PredictionCache(max_entries=2, ttl_seconds=60, clock=clock)
+    histories = [make_history(seed) for seed in range(3)]
+
+    for patient_id, history in enumerate(histories):
+        cache.predict(history, patient_id=patient_id)
+    stats = cache.stats()
+    assert stats['entries'] == 2
+    assert stats['evictions'] == 1
+
+    assert cache.invalidate_patient(2) == 1
+    assert cache.stats()['entries'] == 1
+
+    clock.now = 61
+    cache.predict(histories[1], patient_id=1)
+    assert cache.stats()['hits'] == 0
+
+def test_cache_entry_shared_by_patients_with_identical_features():
+    cache = PredictionCache()
+    history = make_history(3)
+
+    cache.predict(history, patient_id=1)
+    cache.predict(history, patient_id=2)
+    assert cache.stats()['hits'] == 1
+
+    # Either owner's new data drops the shared entry
+    assert cache.invalidate_patient(1) == 1
+    assert cache.stats()['entries'] == 0
+    assert cache.invalidate_patient(2) == 0
+
+    cache.predict(history, patient_id=1)
+    cache.predict(history, patient_id=2)
+    assert cache.invalidate_patient(2) == 1
+
+def test_cache_memory_bound():
+    cache = PredictionCache(max_bytes=1)
+    cache.predict(make_history(4))
+    assert cache.stats()['entries'] == 0
+
+def test_cache_persistent_tier():
+    class DictStore:
+        def __init__(self):
+            self.rows = {}
+
+        def get(self, key, ttl_seconds):
+            return self.rows.get(key)
+
+        def put(self, key, result, patient_id, model_version):
+            self.rows[key] = (result, patient_id)
+
+        def delete_patient(self, patient_id):
+            self.rows = {k: v for k, v in self.rows.items() if v[1] != patient_id}
+
+    store = DictStore()
+    history = make_history(5)
+    expected = PredictionCache(store=store).predict(history, patient_id=7)
+
+    # A fresh cache (e.g. after a restart) is served from the store
+    restarted = PredictionCache(store=store)
+    assert restarted.predict(history, patient_id=7) == expected
+    assert restarted.stats()['hits'] == 1
+
+    restarted.invalidate_patient(7)
+    assert store.rows == {}
+
+def test_cache_misses_after_model_is_replaced(tmp_path, monkeypatch):
+    for name in ('xgb_model_v1.0.json', 'feature_spec_v1.0.json'):
+        shutil.copy(os.path.join(inference.MODELS_DIR, name), tmp_path / name)
+    monkeypatch.setattr(inference, 'registry', ModelRegistry(str(tmp_path), check_interval=0, use_compiled=False))
+    cache = PredictionCache()
+    history = make_history(1, days=12)
+    before = cache.predict(history, patient_id=1)
+
+    # Same version, new model content
+    model_path = tmp_path / 'xgb_model_v1.0.json'
+    model = json.loads(model_path.read_text())
+    model['learner']['learner_model_param']['base_score'] = '8.5E-1'
+    model_path.write_text(json.dumps(model))
+    os.utime(model_path, ns=(0, os.stat(model_path).st_mtime_ns + 10**9))
+
+    after = cache.predict(history, patient_id=1)
+    assert after == predict(history)
+    assert after['risk_score'] != before['risk_score']
+    assert cache.stats()['hits'] == 0
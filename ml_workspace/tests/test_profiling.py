@@ -0,0 +1,79 @@
+# ml_workspace/tests/test_profiling.py
+
+import pstats
+
+import pytest
+
+from ml_workspace.src import profiling
+from ml_workspace.src.profiling import ProfileStore, profile, sampled
+
+def busy(n=20_000):
+    return sum(i * i for i in range(n))
+
+def test_profile_saves_capture(tmp_path):
+    store = ProfileStore(tmp_path, max_profiles=5)
+    with profile('busy', profile_store=store, patient_id=7) as capture:
+        busy()
+
+    meta = store.get(capture.profile_id)
+    assert meta['name'] == 'busy'
+    assert meta['context'] == {'patient_id': 7}
+    assert 'busy' in meta['summary']
+    # The raw capture loads with pstats
+    assert pstats.Stats(str(store.pstats_path(capture.profile_id))).total_calls > 0
+    assert 'busy' in store.report(capture.profile_id, sort='tottime', limit=5)
+    with pytest.raises(ValueError):
+        store.report(capture.profile_id, sort='bogus')
+
+def test_store_keeps_only_newest(tmp_path):
+    store = ProfileStore(tmp_path, max_profiles=3)
+    ids = []
+    for _ in range(5):
+        with profile('busy', profile_store=store) as capture:
+            busy(100)
+        ids.append(capture.profile_id)
+
+    assert [meta['id'] for meta in store.list()] == ids[:-4:-1]
+    assert len(list(tmp_path.glob('*.pstats'))) == 3
+    assert store.get(ids[0]) is None
+
+def test_unknown_or_unsafe_ids(tmp_path):
+    store = ProfileStore(tmp_path)
+    assert store.get('../../etc/passwd') is None
+    assert store.pstats_path('00000000000000000000-deadbeef') is None
+    assert store.report('nope') is None
+
+def test_nested_profile_runs_unprofiled(tmp_path):
+    store = ProfileStore(tmp_path)
+    with profile('outer', profile_store=store) as outer:
+        with profile('inner', profile_store=store) as inner:
+            busy(100)
+
+    assert inner.profile_id is None
+    assert outer.profile_id is not None
+
+def test_failed_save_keeps_block_error(tmp_path):
+    store = ProfileStore(tmp_path / 'not-a-directory')
+    (tmp_path / 'not-a-directory').write_text('')
+
+    with pytest.raises(KeyError):
+        with profile('fails', profile_store=store) as capture:
+            raise KeyError('from the block')
+    assert capture.profile_id is None
+
+    # Without an error in the block, the save error is reported
+    with pytest.raises(OSError):
+        with profile('busy', profile_store=store):
+            busy(100)
+
+def test_sampled_follows_rate(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, 'store', ProfileStore(tmp_path))
+    traced = sampled('busy')(busy)
+
+    monkeypatch.setattr(profiling, 'PROFILE_SAMPLE_RATE', 0.0)
+    assert traced(100) == busy(100)
+    assert profiling.store.list() == []
+
+    monkeypatch.setattr(profiling, 'PROFILE_SAMPLE_RATE', 1.0)
+    traced(100)
+    assert [meta['name'] for meta in profiling.store.list()] == ['busy']